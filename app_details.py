@@ -0,0 +1,142 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains code to get the data of a game from Steam's JSON app details endpoint,
+as an alternative to scraping its store page. A response is only a few KB of JSON, while a store page
+is around half a megabyte of HTML.
+
+The rating is not part of the app details, so it is read from the summary of the game's reviews,
+which is also JSON.
+
+The app details do not have the user tags that the store page shows, which are the genres of the other backend
+and of genres.txt. Steam's own genres, like Action, Indie and RPG, are tags too, and the categories that have a
+matching tag, like Single-player or Online Co-op, are turned into it. The other tags, like Puzzle, Horror or
+Open World, are never found by this backend, so games fetched with it match fewer genre answers.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Andy Zhang, Daniel Lee, Ahmed Hassini, Chris Oh
+"""
+from __future__ import annotations
+from typing import Optional
+import http_client
+from store_page import GameFields, REVIEW_SUMMARY_TO_RATING
+
+# The endpoints used for the app details and review summary of a game.
+# They can be changed to point to a local fake of Steam.
+APP_DETAILS_URL = 'https://store.steampowered.com/api/appdetails'
+APP_REVIEWS_URL = 'https://store.steampowered.com/appreviews/'
+
+# The user tag of each category of the app details that has one, so that games from this backend can match the
+# same genre answers as games scraped from their store page. Keys: lowercase category, Values: tag in genres.txt
+CATEGORY_TO_TAG = {
+    'single-player': 'Singleplayer',
+    'multi-player': 'Multiplayer',
+    'cross-platform multiplayer': 'Multiplayer',
+    'mmo': 'Massively Multiplayer',
+    'pvp': 'PvP',
+    'online pvp': 'PvP',
+    'lan pvp': 'PvP',
+    'shared/split screen pvp': 'Local Multiplayer',
+    'co-op': 'Co-op',
+    'online co-op': 'Online Co-Op',
+    'lan co-op': 'Local Co-Op',
+    'shared/split screen co-op': 'Local Co-Op',
+    'shared/split screen': 'Split Screen',
+    'full controller support': 'Controller',
+    'vr support': 'VR',
+    'vr supported': 'VR',
+    'vr only': 'VR'
+}
+
+
+def get_app_details_fields(app_id: int) -> Optional[GameFields]:
+    """Return the game fields of the given app id from the app details endpoint.
+    Return None if Steam has no app details for the app id.
+
+    This is tested against a local fake of the endpoints in tests/test_app_details.py.
+    """
+    params = {
+        'appids': app_id,
+        'cc': 'ca',
+        'l': 'english',
+        'filters': 'basic,price_overview,genres,categories,release_date'
+    }
+    response = http_client.get_json(APP_DETAILS_URL, params)
+    app_details = response.get(str(app_id))
+
+    if not app_details or not app_details.get('success'):
+        return None
+
+    params = {
+        'json': 1,
+        'language': 'all',
+        'purchase_type': 'all',
+        'num_per_page': 0
+    }
+    reviews = http_client.get_json(APP_REVIEWS_URL + str(app_id), params)
+    review_summary = reviews.get('query_summary', {}).get('review_score_desc')
+
+    return to_game_fields(app_details['data'], review_summary)
+
+
+def to_game_fields(data: dict, review_summary: Optional[str]) -> GameFields:
+    """Return the game fields given the data of a game from the app details endpoint and the description
+    of its review score, or None if it has no review score.
+
+    The genres are the genres of the game and the tags of its categories in CATEGORY_TO_TAG.
+
+    >>> data = {'name': 'Portal 2', 'is_free': False, 'short_description': 'A puzzle game.',
+    ...         'price_overview': {'final': 1299}, 'genres': [{'description': 'Action'}],
+    ...         'categories': [{'description': 'Online Co-op'}], 'release_date': {'date': 'Apr 18, 2011'}}
+    >>> fields = to_game_fields(data, 'Overwhelmingly Positive')
+    >>> sorted(fields[1])
+    ['Action', 'Online Co-Op']
+    >>> fields[2:]
+    (12.99, True, False, 1.0, 2011)
+    """
+    description = data.get('short_description', '').lower()
+    categories = [category['description'].strip().lower() for category in data.get('categories', [])]
+    genres = {genre['description'].strip() for genre in data.get('genres', [])}
+    genres.update(CATEGORY_TO_TAG[category] for category in categories if category in CATEGORY_TO_TAG)
+
+    # Get game player modes
+    is_multiplayer = 'multiplayer' in description or 'multi-player' in description or \
+                     any('multiplayer' in category or 'multi-player' in category for category in categories)
+
+    # Get game online component
+    has_online_component = 'online' in description or any('online' in category for category in categories)
+
+    # Get game price. Free games and games that are not for sale have no price overview.
+    if data.get('is_free') or 'price_overview' not in data:
+        price = 0
+    else:
+        price = data['price_overview']['final'] / 100
+
+    # Get game rating
+    if review_summary is not None:
+        rating = REVIEW_SUMMARY_TO_RATING.get(review_summary.replace(",", ""), 0.1)
+    else:
+        rating = 0.0
+
+    # Get game release year. Games that are not released yet have no year.
+    release_year = data.get('release_date', {}).get('date', '').strip()[-4:]
+    release_year = int(release_year) if release_year.isdigit() else 0
+
+    return data['name'].strip(), genres, price, has_online_component, is_multiplayer, rating, release_year
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['http_client', 'store_page'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
@@ -0,0 +1,143 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module runs the recommendation pipeline for many users at once, without any windows.
+
+The users are read from a JSONL file of jobs, one JSON object per line:
+
+    {"id": "alice", "profile": "76561199000093113", "k": 5,
+     "answers": {"Genre": ["puzzle"], "Price": 20, "Date": 2015, "Online": true, "Multiplayer": false},
+     "ranking": ["Genre", "Price", "Date", "Online", "Multiplayer"]}
+
+where profile is a 64-bit steam id or a custom profile name, ranking lists the questions from the highest
+ranked to the lowest, and k is optional. The top games of each job are written to a JSONL file of results, in
+the order the jobs finish. A job that fails has an error instead of games, and does not stop the other jobs.
+
+Jobs run concurrently and share the game data cache, the owned games cache and the rate limiter of
+http_client, so a game or reviewer that appears in several jobs is only fetched once.
+
+Run it with: python batch.py jobs.jsonl results.jsonl
+Add --graph graph.npz to extract each user's network from a graph built by global_graph.py instead of crawling.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Andy Zhang, Chris Oh, Daniel Lee, Ahmed Hassini
+"""
+from __future__ import annotations
+import argparse
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Optional
+import scrape_app_ids
+from recommender import resolve_profile_id, get_questions_to_answers, recommend, recommend_from_graph, game_to_json
+from global_graph import GlobalGameGraph
+from owned_games_cache import OwnedGamesCache
+
+# The default number of jobs that run at once, and of requests each job has in flight at once
+MAX_JOBS = 4
+MAX_CONCURRENCY = 16
+
+
+def read_jobs(path: str) -> list[dict[str, Any]]:
+    """Return the jobs in the JSONL file at path, skipping blank lines.
+    A job without an id is given its line number as its id.
+    """
+    jobs = []
+    with open(path, 'r') as file:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip() != '':
+                job = json.loads(line)
+                job.setdefault('id', line_number)
+                jobs.append(job)
+    return jobs
+
+
+def run_job(job: dict[str, Any], max_concurrency: int = MAX_CONCURRENCY,
+            graph: Optional[GlobalGameGraph] = None) -> dict[str, Any]:
+    """Return the result of a job: its id and its top games, or its id and an error message if it failed.
+
+    The user's network is extracted from graph if it is not None, and crawled otherwise.
+    """
+    try:
+        questions_to_answers = get_questions_to_answers(job['answers'], job['ranking'])
+        profile_id = resolve_profile_id(job['profile'])
+        if graph is not None:
+            top_games = recommend_from_graph(graph, profile_id, questions_to_answers, job.get('k', 5))
+        else:
+            # The jobs run at once, so their progress would be printed interleaved
+            top_games = recommend(profile_id, questions_to_answers, job.get('k', 5), max_concurrency, verbose=False)
+    except Exception as error:  # A failed job is reported in its result instead of stopping the batch
+        return {'id': job['id'], 'error': f'{type(error).__name__}: {error}'}
+
+    return {'id': job['id'], 'profile_id': profile_id,
+            'top_games': [game_to_json(game, order) for game, order in top_games]}
+
+
+def run_batch(jobs_path: str, results_path: str, max_jobs: int = MAX_JOBS,
+              max_concurrency: int = MAX_CONCURRENCY, graph_path: Optional[str] = None) -> int:
+    """Run the jobs in the JSONL file at jobs_path, with at most max_jobs jobs at once, and write their results
+    to the JSONL file at results_path as they finish. Return the number of jobs that failed.
+
+    If graph_path is not None, the networks of the users are extracted from the graph saved there.
+
+    Preconditions:
+    - max_jobs >= 1
+    - max_concurrency >= 1
+    """
+    jobs = read_jobs(jobs_path)
+    graph = GlobalGameGraph.load(graph_path) if graph_path is not None else None
+    num_failed = 0
+
+    with open(results_path, 'w') as results_file, ThreadPoolExecutor(max_workers=max_jobs) as executor:
+        futures = [executor.submit(run_job, job, max_concurrency, graph) for job in jobs]
+
+        for future in as_completed(futures):
+            result = future.result()
+            results_file.write(json.dumps(result) + '\n')
+            results_file.flush()
+            if 'error' in result:
+                num_failed += 1
+
+    return num_failed
+
+
+def main() -> None:
+    """Run the batch given by the command line arguments."""
+    parser = argparse.ArgumentParser(description='Compute the recommended games of every job in a JSONL file.')
+    parser.add_argument('jobs', help='the JSONL file of jobs')
+    parser.add_argument('results', help='the JSONL file the results are written to')
+    parser.add_argument('--max-jobs', type=int, default=MAX_JOBS, help='the number of jobs that run at once')
+    parser.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY,
+                        help='the number of requests each job has in flight at once')
+    parser.add_argument('--graph', help='a graph saved by global_graph.py to extract networks from')
+    parser.add_argument('--owned-games-cache', help='a SQLite file to keep the owned games of users in between runs')
+    args = parser.parse_args()
+
+    if args.owned_games_cache is not None:
+        scrape_app_ids.OWNED_GAMES_CACHE = OwnedGamesCache(args.owned_games_cache)
+
+    num_failed = run_batch(args.jobs, args.results, args.max_jobs, args.max_concurrency, args.graph)
+    print(f"Finished with {num_failed} failed job(s).")
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Check this module with: python batch.py --check
+    if sys.argv[1:] == ['--check']:
+        import python_ta
+        import python_ta.contracts
+
+        import doctest
+
+        doctest.testmod()
+
+        python_ta.check_all(config={
+            'extra-imports': ['sys', 'argparse', 'json', 'concurrent.futures', 'scrape_app_ids', 'recommender',
+                              'global_graph', 'owned_games_cache'],
+            'allowed-io': ['read_jobs', 'run_batch', 'main'],
+            'max-line-length': 120
+        })
+    else:
+        main()
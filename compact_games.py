@@ -0,0 +1,227 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+A module that contains a compact representation of a game, for keeping the games of a whole catalog in memory.
+
+A CompactGame has no __dict__, and its genres are stored as a bitmask over the genres in genres.txt instead of
+a set of strings. It has no edges either, so it is meant to be used with SparseRecommendedGamesNetwork,
+which stores the edges of the network itself.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Chris Oh, Ahmed Hassini, Andy Zhang, Daniel Lee
+"""
+from __future__ import annotations
+import os
+import sys
+from typing import Any, Optional
+from games_network import Game
+
+# The file containing every genre, one per line
+GENRES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'genres.txt')
+
+
+class GenreVocabulary:
+    """The genres that can be stored in a genre bitmask, each with its own bit.
+
+    Genres are matched without case, like the genre question of the decision tree.
+
+    Instance Attributes:
+    - genres: The genres in the vocabulary, in the order of their bits
+
+    Representation Invariants:
+    - len(self.genres) == len(self._bits)
+
+    >>> vocabulary = GenreVocabulary(['Indie', 'Action', 'Puzzle'])
+    >>> vocabulary.encode({'Action', 'puzzle'})
+    6
+    >>> sorted(vocabulary.decode(6))
+    ['Action', 'Puzzle']
+    """
+    genres: list[str]
+
+    # Private Instance Attributes
+    #   - _bits: The bit of each genre. Keys: lowercase genre, Values: bit index
+    _bits: dict[str, int]
+
+    def __init__(self, genres: list[str]) -> None:
+        self.genres = []
+        self._bits = {}
+        for genre in genres:
+            if genre.lower() not in self._bits:
+                self._bits[genre.lower()] = len(self.genres)
+                self.genres.append(sys.intern(genre))
+
+    def __len__(self) -> int:
+        """Return the number of genres in the vocabulary."""
+        return len(self.genres)
+
+    def get_bit(self, genre: str) -> Optional[int]:
+        """Return the bit index of genre, or None if it is not in the vocabulary."""
+        return self._bits.get(genre.lower())
+
+    def encode(self, genres: set[str]) -> int:
+        """Return the bitmask of the genres that are in the vocabulary. Other genres are ignored."""
+        bitmask = 0
+        for genre in genres:
+            bit = self._bits.get(genre.lower())
+            if bit is not None:
+                bitmask |= 1 << bit
+        return bitmask
+
+    def decode(self, bitmask: int) -> set[str]:
+        """Return the set of genres whose bits are set in bitmask."""
+        return {self.genres[bit] for bit in range(bitmask.bit_length()) if bitmask >> bit & 1}
+
+
+_genre_vocabulary: Optional[GenreVocabulary] = None
+
+
+def get_genre_vocabulary() -> GenreVocabulary:
+    """Return the vocabulary of the genres in GENRES_FILE, reading the file the first time."""
+    global _genre_vocabulary
+
+    if _genre_vocabulary is None:
+        with open(GENRES_FILE, 'r') as file:
+            _genre_vocabulary = GenreVocabulary([line.strip() for line in file if line.strip() != ''])
+    return _genre_vocabulary
+
+
+class CompactGame:
+    """A video game stored with as little memory as possible.
+
+    It has the same data attributes as Game, except that genres is computed from a bitmask, and it has no
+    tributes or recommended_games. Two games are equal if they have the same app id.
+
+    Instance Attributes:
+    - app_id: The Steam app id of the game
+    - name: Name of the game
+    - genre_bits: The bitmask of the genres of the game that are in the genre vocabulary
+    - extra_genres: The genres of the game that are not in the genre vocabulary, or None if there are none
+    - price: Price of the game
+    - online: Whether there is an online component to the game
+    - multiplayer: Whether there is a multiplayer option
+    - rating: Rating for this game
+    - release_date: Release year of the game
+    - likeability: A score representing the likeability of this game
+
+    Representation Invariants:
+    - self.app_id >= 0
+    - self.name != ''
+    - self.price >= 0
+    - self.rating >= 0
+    - self.release_date >= 0
+    - self.likeability >= 0
+
+    >>> game = CompactGame.from_game(Game(400, 'Portal', {'Puzzle', 'Portals'}, 9.99, False, False, 1.0, 2007))
+    >>> game.genres == {'Puzzle', 'Portals'}
+    True
+    >>> game.extra_genres
+    ('Portals',)
+    >>> game == game.to_game() and game.to_game() == game
+    True
+    """
+    __slots__ = ('app_id', 'name', 'genre_bits', 'extra_genres', 'price', 'online', 'multiplayer', 'rating',
+                 'release_date', 'likeability')
+    app_id: int
+    name: str
+    genre_bits: int
+    extra_genres: Optional[tuple[str, ...]]
+    price: float
+    online: bool
+    multiplayer: bool
+    rating: float
+    release_date: int
+    likeability: float
+
+    def __init__(self, app_id: int, name: str, genre_bits: int, extra_genres: Optional[tuple[str, ...]],
+                 price: float, online: bool, multiplayer: bool, rating: float, release_date: int) -> None:
+        self.app_id = app_id
+        self.name = name
+        self.genre_bits = genre_bits
+        self.extra_genres = extra_genres
+        self.price = price
+        self.online = online
+        self.multiplayer = multiplayer
+        self.rating = rating
+        self.release_date = release_date
+        self.likeability = 0
+
+    @classmethod
+    def from_game(cls, game: Game, vocabulary: Optional[GenreVocabulary] = None) -> CompactGame:
+        """Return the compact version of game, using the genre vocabulary of GENRES_FILE if vocabulary is None."""
+        if vocabulary is None:
+            vocabulary = get_genre_vocabulary()
+
+        extra_genres = tuple(sorted(sys.intern(genre) for genre in game.genres if vocabulary.get_bit(genre) is None))
+        compact_game = cls(game.app_id, game.name, vocabulary.encode(game.genres), extra_genres or None,
+                           game.price, game.online, game.multiplayer, game.rating, game.release_date)
+        compact_game.likeability = game.likeability
+        return compact_game
+
+    @property
+    def genres(self) -> set[str]:
+        """Return the genres of the game, using the genre vocabulary of GENRES_FILE."""
+        genres = get_genre_vocabulary().decode(self.genre_bits)
+        if self.extra_genres is not None:
+            genres.update(self.extra_genres)
+        return genres
+
+    def to_game(self) -> Game:
+        """Return this game as a Game, with no edges."""
+        game = Game(self.app_id, self.name, self.genres, self.price, self.online, self.multiplayer, self.rating,
+                    self.release_date)
+        game.likeability = self.likeability
+        return game
+
+    def __eq__(self, other: Any) -> bool:
+        """Return whether other is a game with the same app id as this game.
+        Return NotImplemented if other is not a game, so that Python tries other's __eq__ instead.
+        """
+        if not isinstance(other, (CompactGame, Game)):
+            return NotImplemented
+        return self.app_id == other.app_id
+
+    def __hash__(self) -> int:
+        """Return the hash of this game, which only depends on its app id."""
+        return hash(self.app_id)
+
+
+def get_game_memory_size(game: Game | CompactGame) -> int:
+    """Return the number of bytes of memory used by game and the objects only it refers to.
+
+    Objects that are shared between games, such as the genre strings of a CompactGame, the games in the
+    edges of a Game and small cached ints, are not counted.
+    """
+    size = sys.getsizeof(game) + sys.getsizeof(game.name)
+
+    if isinstance(game, CompactGame):
+        size += sys.getsizeof(game.genre_bits) + sys.getsizeof(game.price) + sys.getsizeof(game.rating) \
+            + sys.getsizeof(game.likeability)
+        if game.extra_genres is not None:
+            size += sys.getsizeof(game.extra_genres)
+        return size
+
+    size += sys.getsizeof(game.__dict__) + sys.getsizeof(game.genres) + sys.getsizeof(game.price) \
+        + sys.getsizeof(game.rating) + sys.getsizeof(game.likeability) + sys.getsizeof(game.tributes) \
+        + sys.getsizeof(game.recommended_games)
+    size += sum(sys.getsizeof(genre) for genre in game.genres)
+    size += sum(sys.getsizeof(weight) for weight in game.recommended_games.values())
+    return size
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['os', 'sys', 'games_network'],
+        'allowed-io': ['get_genre_vocabulary'],
+        'disable': ['global-statement'],
+        'max-line-length': 120
+    })
@@ -0,0 +1,335 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module measures how many Steam requests a crawl needs to find the games that many reviewers share, when
+the crawl visits the games in the order they were found and when it visits the games expected to find the most
+new games first (games_network.PRIORITIZED_CRAWL).
+
+A crawl is first recorded: every review page, owned games list and store page it requests is saved to a JSON
+file. The recording is then replayed with both orders, without sending any request to Steam, so both orders
+see exactly the same data. A game the replay needs that was not recorded counts as having no data, so the
+recording should be made with a larger crawl than the ones being compared.
+
+The quality of a network is the share of the reference games it contains. The reference games are the
+REFERENCE_SIZE games that appear most often in the top games of the recorded reviewers who also play one of
+the user's games, which are the games a crawl should find for the user.
+
+Record a crawl with: python crawl_benchmark.py record recording.json --seeds 730 570 --num-games 400
+Compare the orders with: python crawl_benchmark.py run recording.json
+Without access to Steam, compare the orders on a generated catalog of games and reviewers with:
+python crawl_benchmark.py run --synthetic
+The whole catalog is replayed, so no request is missing, and the reference games are computed from every
+reviewer of the catalog. A recorded crawl would only have the games and reviewers found in the order it used.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Daniel Lee, Chris Oh, Ahmed Hassini, Andy Zhang
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import itertools
+import json
+import random
+from typing import Any, Callable, Optional
+import games_network
+import scrape_app_ids
+from games_network import Game, RecommendedGamesNetwork
+
+# The number of games most played by the players of the user's games that networks are compared against
+REFERENCE_SIZE = 25
+
+# The sizes of the networks crawled by run_benchmark
+NETWORK_SIZES = (50, 100, 200, 400)
+
+
+class CrawlRecording:
+    """The responses to the requests of a crawl, which can be replayed instead of sending the requests.
+
+    Instance Attributes:
+    - seed_app_ids: The app ids of the games the recorded crawl started from
+    - reviews: The profile ids of the reviewers of each game. Keys: app id
+    - owned_games: The most played app ids of each reviewer, or an empty list if they are hidden.
+                   Keys: profile id
+    - games: The fields of the game of each app id, or None if its store page has no game. Keys: app id
+    - num_requests: The number of requests replayed since the last reset
+    - num_missing: The number of replayed requests that were not recorded since the last reset
+
+    Representation Invariants:
+    - self.num_missing <= self.num_requests
+
+    >>> recording = CrawlRecording([400], {400: [1]}, {1: [400, 620]}, {400: ('Portal', {'Puzzle'}, 9.99, False,
+    ...                                                                        False, 0.9, 2007), 620: None})
+    >>> recording.scrape_app_ids(1, 5), recording.get_game_data(620), recording.get_game_data(730)
+    ([400, 620], None, None)
+    >>> recording.num_requests, recording.num_missing
+    (3, 1)
+    """
+    seed_app_ids: list[int]
+    reviews: dict[int, list[int]]
+    owned_games: dict[int, list[int]]
+    games: dict[int, Optional[tuple]]
+    num_requests: int
+    num_missing: int
+
+    def __init__(self, seed_app_ids: list[int], reviews: dict[int, list[int]], owned_games: dict[int, list[int]],
+                 games: dict[int, Optional[tuple]]) -> None:
+        self.seed_app_ids = seed_app_ids
+        self.reviews = reviews
+        self.owned_games = owned_games
+        self.games = games
+        self.num_requests = 0
+        self.num_missing = 0
+
+    def reset(self) -> None:
+        """Reset the numbers of replayed requests."""
+        self.num_requests = 0
+        self.num_missing = 0
+
+    def scrape_profile_ids(self, app_id: int, n: int) -> list[int]:
+        """Replay scrape_profile_ids.scrape_profile_ids."""
+        return self._replay(self.reviews, app_id, [])[:n]
+
+    def scrape_app_ids(self, profile_id: int, n: int) -> list[int]:
+        """Replay scrape_app_ids.scrape_app_ids."""
+        return self._replay(self.owned_games, profile_id, [])[:n]
+
+    def get_game_data(self, app_id: int) -> Optional[Game]:
+        """Replay games_network.get_game_data."""
+        fields = self._replay(self.games, app_id, None)
+        return Game(app_id, *fields) if fields is not None else None
+
+    def _replay(self, responses: dict, key: int, default: Any) -> Any:
+        """Count a request and return its recorded response, or default if it was not recorded."""
+        self.num_requests += 1
+        if key not in responses:
+            self.num_missing += 1
+            return default
+        return responses[key]
+
+    def get_reference_app_ids(self, size: int = REFERENCE_SIZE) -> set[int]:
+        """Return the app ids of the size games with data, other than the seed games, that appear in the top games
+        of the most reviewers who also have a seed game in their top games.
+        """
+        seed_app_ids = set(self.seed_app_ids)
+        appearances = {}
+        for app_ids in self.owned_games.values():
+            if seed_app_ids.isdisjoint(app_ids):
+                continue
+            for app_id in app_ids:
+                if app_id not in seed_app_ids and self.games.get(app_id) is not None:
+                    appearances[app_id] = appearances.get(app_id, 0) + 1
+        return set(sorted(appearances, key=lambda app_id: (-appearances[app_id], app_id))[:size])
+
+    def save(self, path: str) -> None:
+        """Save the recording to a JSON file at path."""
+        data = {
+            'seed_app_ids': self.seed_app_ids,
+            'reviews': self.reviews,
+            'owned_games': self.owned_games,
+            'games': {app_id: None if fields is None else [fields[0], sorted(fields[1]), *fields[2:]]
+                      for app_id, fields in self.games.items()}
+        }
+        with open(path, 'w') as file:
+            json.dump(data, file)
+
+    @classmethod
+    def load(cls, path: str) -> CrawlRecording:
+        """Return the recording saved at path by save."""
+        with open(path, 'r') as file:
+            data = json.load(file)
+
+        games = {int(app_id): None if fields is None else (fields[0], set(fields[1]), *fields[2:])
+                 for app_id, fields in data['games'].items()}
+        return cls(data['seed_app_ids'], {int(app_id): profile_ids for app_id, profile_ids in data['reviews'].items()},
+                   {int(profile_id): app_ids for profile_id, app_ids in data['owned_games'].items()}, games)
+
+
+@contextlib.contextmanager
+def _crawl_functions(scrape_profile_ids: Callable, scrape_app_ids_: Callable, get_game_data: Callable) -> Any:
+    """Make the crawl of games_network send its requests with the given functions, with the negative caches
+    turned off, and restore everything when the block exits.
+    """
+    saved = (games_network.scrape_profile_ids, games_network.scrape_app_ids, games_network.get_game_data,
+             games_network.INVALID_APP_IDS, scrape_app_ids.EMPTY_PROFILES)
+    games_network.scrape_profile_ids = scrape_profile_ids
+    games_network.scrape_app_ids = scrape_app_ids_
+    games_network.get_game_data = get_game_data
+    games_network.INVALID_APP_IDS = None
+    scrape_app_ids.EMPTY_PROFILES = None
+    try:
+        yield
+    finally:
+        (games_network.scrape_profile_ids, games_network.scrape_app_ids, games_network.get_game_data,
+         games_network.INVALID_APP_IDS, scrape_app_ids.EMPTY_PROFILES) = saved
+
+
+def record_crawl(seed_app_ids: list[int], num_recommendations: int, source: Optional[CrawlRecording] = None) \
+        -> CrawlRecording:
+    """Crawl a network of num_recommendations games from the games with the given app ids, visiting the games in
+    the order they were found, and return the recording of every response.
+
+    The requests are sent to Steam, or replayed from source if it is not None.
+    """
+    recording = CrawlRecording(seed_app_ids, {}, {}, {})
+    if source is not None:
+        scrape_profile_ids, scrape_owned, get_game_data = (
+            source.scrape_profile_ids, source.scrape_app_ids, source.get_game_data)
+    else:
+        scrape_profile_ids, scrape_owned, get_game_data = (
+            games_network.scrape_profile_ids, games_network.scrape_app_ids, games_network.get_game_data)
+
+    def record_game(app_id: int) -> Optional[Game]:
+        """Get and record the data of a game."""
+        game = get_game_data(app_id)
+        recording.games[app_id] = None if game is None else (game.name, game.genres, game.price, game.online,
+                                                             game.multiplayer, game.rating, game.release_date)
+        return game
+
+    def record_reviews(app_id: int, n: int) -> list[int]:
+        """Get and record the reviewers of a game."""
+        recording.reviews[app_id] = scrape_profile_ids(app_id, n)
+        return recording.reviews[app_id]
+
+    def record_owned_games(profile_id: int, n: int) -> list[int]:
+        """Get and record the most played games of a reviewer."""
+        recording.owned_games[profile_id] = scrape_owned(profile_id, n)
+        return recording.owned_games[profile_id]
+
+    old_prioritized = games_network.PRIORITIZED_CRAWL
+    games_network.PRIORITIZED_CRAWL = False
+    seed_games = {app_id: record_game(app_id) for app_id in seed_app_ids}
+    try:
+        with _crawl_functions(record_reviews, record_owned_games, record_game):
+            games_network.create_recommendation_network({app_id: game for app_id, game in seed_games.items()
+                                                         if game is not None}, num_recommendations)
+    finally:
+        games_network.PRIORITIZED_CRAWL = old_prioritized
+    return recording
+
+
+def make_synthetic_catalog(num_games: int = 5000, num_reviewers: int = 50000, num_communities: int = 20,
+                           seed: int = 111) -> CrawlRecording:
+    """Return the responses of every request to a generated catalog of games and reviewers, like Steam.
+
+    Each game belongs to a community, like the players of a genre, and each reviewer mostly plays the games of
+    their community. Within a community and across the catalog, a few games are played by many reviewers.
+    One in twenty games has no data and one in ten reviewers hides their games.
+    """
+    rng = random.Random(seed)
+    app_ids = list(range(10, 10 * num_games + 10, 10))
+    communities = [app_ids[community::num_communities] for community in range(num_communities)]
+
+    games = {}
+    for app_id in app_ids:
+        games[app_id] = None if rng.random() < 0.05 else (
+            f'Game {app_id}', set(rng.sample(['Action', 'Puzzle', 'RPG', 'Strategy', 'Indie'], 2)),
+            rng.choice([0.0, 4.99, 9.99, 19.99, 59.99]), rng.random() < 0.5, rng.random() < 0.5,
+            round(rng.random(), 2), rng.randint(2005, 2023))
+
+    # The cumulative popularity of the games of a community and of the catalog, from the most played game
+    community_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(communities[0]))))
+    catalog_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(num_games)))
+
+    owned_games = {}
+    players = {app_id: [] for app_id in app_ids}
+    for profile_id in range(76561198000000000, 76561198000000000 + num_reviewers):
+        community = rng.choice(communities)
+        candidates = rng.choices(community, cum_weights=community_weights[:len(community)], k=6) + \
+            rng.choices(app_ids, cum_weights=catalog_weights, k=2)
+        top_games = list(dict.fromkeys(candidates))[:5]
+        owned_games[profile_id] = [] if rng.random() < 0.1 else top_games
+        for app_id in top_games:
+            players[app_id].append(profile_id)
+
+    reviews = {app_id: rng.sample(profile_ids, min(5, len(profile_ids))) for app_id, profile_ids in players.items()}
+    seed_app_ids = rng.sample(communities[0][5:50], 6)
+    return CrawlRecording(seed_app_ids, reviews, owned_games, games)
+
+
+def replay_crawl(recording: CrawlRecording, num_recommendations: int, prioritized: bool) \
+        -> tuple[RecommendedGamesNetwork, int, int]:
+    """Replay a crawl of num_recommendations games from the seeds of recording, visiting the games expected to find
+    the most new games first if prioritized is True. Return the network, the number of requests and the number of
+    requests that were not recorded.
+    """
+    old_prioritized = games_network.PRIORITIZED_CRAWL
+    games_network.PRIORITIZED_CRAWL = prioritized
+    seed_games = {app_id: recording.get_game_data(app_id) for app_id in recording.seed_app_ids}
+    recording.reset()
+    try:
+        with _crawl_functions(recording.scrape_profile_ids, recording.scrape_app_ids, recording.get_game_data):
+            network = games_network.create_recommendation_network({app_id: game for app_id, game in seed_games.items()
+                                                                   if game is not None}, num_recommendations,
+                                                                  verbose=False)
+    finally:
+        games_network.PRIORITIZED_CRAWL = old_prioritized
+    return network, recording.num_requests, recording.num_missing
+
+
+def run_benchmark(recording: CrawlRecording, sizes: tuple[int, ...] = NETWORK_SIZES) -> list[dict[str, Any]]:
+    """Return the number of requests and the quality of the network of a crawl of each size in sizes,
+    visiting the games in the order they were found and visiting the games expected to find the most new games
+    first.
+    """
+    reference = recording.get_reference_app_ids()
+    results = []
+    for size in sizes:
+        for prioritized in (False, True):
+            network, num_requests, num_missing = replay_crawl(recording, size, prioritized)
+            found = {game.app_id for game in network.get_games()} & reference
+            results.append({'size': size, 'order': 'priority' if prioritized else 'fifo', 'games': network.num_games,
+                            'requests': num_requests, 'missing': num_missing,
+                            'quality': len(found) / len(reference)})
+    return results
+
+
+def main() -> None:
+    """Record a crawl or run the benchmark, as given by the command line arguments."""
+    parser = argparse.ArgumentParser(description='Compare the number of requests of the two crawl orders.')
+    parser.add_argument('command', choices=['record', 'run'])
+    parser.add_argument('recording', nargs='?', help='the JSON file of the recording')
+    parser.add_argument('--seeds', type=int, nargs='*', default=[], help='the app ids the recorded crawl starts from')
+    parser.add_argument('--num-games', type=int, default=400, help='the number of games of the recorded crawl')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='record or replay the whole generated catalog instead of a crawl of Steam')
+    parser.add_argument('--sizes', type=int, nargs='*', default=list(NETWORK_SIZES),
+                        help='the numbers of games of the compared crawls')
+    args = parser.parse_args()
+    if args.recording is None and not (args.command == 'run' and args.synthetic):
+        parser.error('the recording file is required, except by run --synthetic')
+
+    if args.command == 'record':
+        recording = make_synthetic_catalog() if args.synthetic else record_crawl(args.seeds, args.num_games)
+        recording.save(args.recording)
+        return
+
+    recording = make_synthetic_catalog() if args.synthetic else CrawlRecording.load(args.recording)
+    results = run_benchmark(recording, tuple(args.sizes))
+    print(f"{'size':>6} {'order':>9} {'games':>6} {'requests':>9} {'missing':>8} {'quality':>8}")
+    for result in results:
+        print(f"{result['size']:>6} {result['order']:>9} {result['games']:>6} {result['requests']:>9} "
+              f"{result['missing']:>8} {result['quality']:>8.2f}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Check this module with: python crawl_benchmark.py --check
+    if sys.argv[1:] == ['--check']:
+        import python_ta
+        import python_ta.contracts
+
+        import doctest
+
+        doctest.testmod()
+
+        python_ta.check_all(config={
+            'extra-imports': ['sys', 'argparse', 'contextlib', 'itertools', 'json', 'random', 'games_network',
+                              'scrape_app_ids'],
+            'allowed-io': ['CrawlRecording.save', 'CrawlRecording.load', 'main'],
+            'max-line-length': 120
+        })
+    else:
+        main()
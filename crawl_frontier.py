@@ -0,0 +1,201 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+A module that contains the bookkeeping of a crawl of the recommended games network: the frontier of games whose
+reviewers have not been visited yet, and the counts of the games in the top games of the visited reviewers.
+Both can be turned into plain data, so that a crawl can be saved and resumed by games_network.CrawlState.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Andy Zhang, Daniel Lee, Ahmed Hassini, Chris Oh
+"""
+from __future__ import annotations
+import heapq
+from typing import Any, Iterable, Optional
+
+
+class CoOccurrenceCounter:
+    """Counts the number of times each game appears in the top games of the reviewers visited by a crawl.
+
+    The total number of appearances is kept as games are added, so the weight of a game,
+    its share of all appearances, can be read in O(1) at any time.
+
+    Instance Attributes:
+    - total: The total number of appearances of all games
+
+    Representation Invariants:
+    - self.total == sum(self._appearances.values())
+
+    >>> counter = CoOccurrenceCounter()
+    >>> counter.add(730)
+    1
+    >>> counter.add(730)
+    2
+    >>> counter.add(570)
+    1
+    >>> counter.weight(730)
+    0.6666666666666666
+    """
+    total: int
+
+    # Private Instance Attributes
+    #   - _appearances: The number of appearances of each game. Keys: app id, Values: number of appearances
+    _appearances: dict[int, int]
+
+    def __init__(self, counts: Optional[dict[int, int]] = None) -> None:
+        self._appearances = dict(counts) if counts is not None else {}
+        self.total = sum(self._appearances.values())
+
+    def __contains__(self, app_id: int) -> bool:
+        """Return whether the game with the given app id has appeared."""
+        return app_id in self._appearances
+
+    def add(self, app_id: int) -> int:
+        """Count one more appearance of the game with the given app id and return its number of appearances."""
+        count = self._appearances.get(app_id, 0) + 1
+        self._appearances[app_id] = count
+        self.total += 1
+        return count
+
+    def count(self, app_id: int) -> int:
+        """Return the number of appearances of the game with the given app id."""
+        return self._appearances.get(app_id, 0)
+
+    def weight(self, app_id: int) -> float:
+        """Return the number of appearances of the game with the given app id divided by the total number of
+        appearances, or 0.0 if nothing has appeared yet.
+        """
+        if self.total == 0:
+            return 0.0
+        return self._appearances.get(app_id, 0) / self.total
+
+    def get_counts(self) -> dict[int, int]:
+        """Return a dictionary mapping the app id of each game that has appeared to its number of appearances."""
+        return dict(self._appearances)
+
+    def get_weights(self) -> dict[int, float]:
+        """Return a dictionary mapping the app id of each game that has appeared to its weight."""
+        return {app_id: count / self.total for app_id, count in self._appearances.items()}
+
+
+class CrawlFrontier:
+    """The games whose reviewers have not been visited yet by a crawl, in the order they are visited.
+
+    If prioritized is False, the games are visited in the order they were found, which is a breadth-first crawl.
+    Otherwise the games are still visited by their distance from the user's games, nearest first, and the user's
+    games and the games their reviewers play are visited in the order they were found, since they hold the games
+    most shared with the user's games. The games further away are visited by the number of new games they are
+    expected to bring per request, from the most to the fewest. Every visit costs about the same requests, so
+    this is the number of new games the visit is expected to find. It is estimated by the number of new games in
+    the top games of the reviewer who found the game: the players of a game found by a reviewer whose games were
+    mostly new to the crawl likely play games the crawl has not found either. Games with the same distance and
+    estimate are visited in the order they were found.
+
+    On the synthetic catalog of crawl_benchmark.py, both orders build the same networks up to 200 games, and the
+    prioritized order needs about a fifth fewer requests for 300 to 400 games, for networks of the same quality.
+
+    Instance Attributes:
+    - prioritized: Whether the games more than one recommendation away from the user's games are visited by
+                   their expected number of new games instead of in the order they were found
+
+    Representation Invariants:
+    - all(entry[3] in self._distances for entry in self._heap)
+
+    >>> frontier = CrawlFrontier([400], prioritized=True)
+    >>> frontier.push(620, 1, num_new=1)
+    >>> frontier.push(730, 1, num_new=3)
+    >>> frontier.push(570, 2, num_new=1)
+    >>> frontier.push(440, 2, num_new=4)
+    >>> [frontier.pop() for _ in range(len(frontier))]
+    [400, 620, 730, 440, 570]
+    >>> frontier.get_distance(730)
+    1
+    """
+    prioritized: bool
+
+    # Private Instance Attributes
+    #   - _heap: The entries of the games as (distance, negative expected number of new games, order found, app id).
+    #            The expected number of new games is 0 for the games within one recommendation of the user's games,
+    #            and both it and the distance are 0 if the frontier is not prioritized
+    #   - _distances: The number of recommendations between each game found and the user's games. Keys: app id
+    #   - _num_pushed: The number of entries pushed, which orders the games with the same distance and estimate
+    _heap: list[tuple[int, int, int, int]]
+    _distances: dict[int, int]
+    _num_pushed: int
+
+    def __init__(self, seed_app_ids: Iterable[int] = (), prioritized: bool = True) -> None:
+        self.prioritized = prioritized
+        self._heap = []
+        self._distances = {}
+        self._num_pushed = 0
+
+        for app_id in seed_app_ids:
+            self.push(app_id, 0)
+
+    def __len__(self) -> int:
+        """Return the number of games in the frontier."""
+        return len(self._heap)
+
+    def push(self, app_id: int, distance: int, num_new: int = 0) -> None:
+        """Add a game found at the given distance from the user's games by a reviewer whose top games had
+        num_new games that were new to the crawl.
+        """
+        self._distances[app_id] = distance
+        self._num_pushed += 1
+        if self.prioritized and distance > 1:
+            heapq.heappush(self._heap, (distance, -num_new, self._num_pushed, app_id))
+        elif self.prioritized:
+            heapq.heappush(self._heap, (distance, 0, self._num_pushed, app_id))
+        else:
+            heapq.heappush(self._heap, (0, 0, self._num_pushed, app_id))
+
+    def push_front(self, app_id: int) -> None:
+        """Put a game back so that it is the next game visited, like a game whose visit was interrupted."""
+        self._num_pushed += 1
+        heapq.heappush(self._heap, (-1, 0, -self._num_pushed, app_id))
+
+    def pop(self) -> int:
+        """Remove and return the app id of the next game to visit.
+
+        Preconditions:
+        - len(self) > 0
+        """
+        return heapq.heappop(self._heap)[3]
+
+    def peek(self, n: int) -> list[int]:
+        """Return the app ids of the next n games to visit, in order, without removing them."""
+        return [entry[3] for entry in heapq.nsmallest(n, self._heap)]
+
+    def get_distance(self, app_id: int) -> int:
+        """Return the number of recommendations between a game found by the crawl and the user's games."""
+        return self._distances[app_id]
+
+    def to_data(self) -> dict[str, Any]:
+        """Return the frontier as plain data that can be saved with a crawl state and given to from_data."""
+        return {'prioritized': self.prioritized, 'entries': sorted(self._heap), 'distances': dict(self._distances),
+                'num_pushed': self._num_pushed}
+
+    @classmethod
+    def from_data(cls, data: dict[str, Any]) -> CrawlFrontier:
+        """Return the frontier saved by to_data."""
+        frontier = cls(prioritized=data['prioritized'])
+        frontier._heap = [tuple(entry) for entry in data['entries']]  # A sorted list is a heap
+        frontier._distances = dict(data['distances'])
+        frontier._num_pushed = data['num_pushed']
+        return frontier
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['heapq'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
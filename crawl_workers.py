@@ -0,0 +1,348 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module splits the crawl of create_recommendation_network between several worker processes, which can
+run on several hosts. The workers share a work queue of games and a set of visited reviewers in a SQLite
+database, and claim each game and reviewer before visiting it, so no work is done twice. Every worker writes
+the games and edges it finds to the database, and they are merged into one network at the end.
+
+The workers visit games in about the same breadth-first order as create_recommendation_network, but not
+exactly, since they run at the same time. A worker that stops partway through leaves its claims behind.
+They expire after CLAIM_TIMEOUT seconds, and then another worker redoes that work.
+
+Run a crawl on one host with: python crawl_workers.py crawl.sqlite3 --seeds 730 570 --workers 4
+Workers on other hosts can join it with: python crawl_workers.py crawl.sqlite3 --join --workers 4
+The database file must be on storage that supports SQLite's file locking.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Andy Zhang, Ahmed Hassini, Daniel Lee, Chris Oh
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from typing import Optional
+import http_client
+from games_network import Game, RecommendedGamesNetwork, get_game_data, fetch_reviewer_ids, fetch_reviewer_app_ids, \
+    is_invalid_app_id
+from crawl_frontier import CoOccurrenceCounter
+from rate_limiter import RateLimiter
+
+# The number of seconds after which the claim of a worker that has not finished its work expires
+CLAIM_TIMEOUT = 300.0
+
+# The number of seconds a worker waits for more games when every game in the queue is claimed
+POLL_INTERVAL = 0.1
+
+# The way worker processes are started. 'spawn' starts them without copying the open connections of
+# the parent process.
+START_METHOD = 'spawn'
+
+
+class CrawlQueue:
+    """A work queue of games and a set of visited reviewers for a crawl, shared through a SQLite database.
+
+    Each game has a status: 'pending' if its reviewers still have to be visited, 'claimed' if a worker is
+    visiting them, 'done' once they were visited, and 'invalid' if the game has no data.
+
+    Instance Attributes:
+    - path: The path of the SQLite database file
+    - worker_id: The name of the worker using the queue, saved with its claims
+
+    >>> queue = CrawlQueue(':memory:', 'doctest')
+    >>> queue.add_seed_games([Game(400, 'Portal', {'Puzzle'}, 9.99, False, False, 1.0, 2007)])
+    >>> queue.claim_game()
+    400
+    >>> queue.claim_game() is None
+    True
+    >>> queue.claim_profile(76561199000093113), queue.claim_profile(76561199000093113)
+    (True, False)
+    """
+    path: str
+    worker_id: str
+
+    # Private Instance Attributes
+    #   - _connection: The connection to the database
+    _connection: sqlite3.Connection
+
+    def __init__(self, path: str, worker_id: str) -> None:
+        self.path = path
+        self.worker_id = worker_id
+        self._connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(
+            'CREATE TABLE IF NOT EXISTS games ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, app_id INTEGER UNIQUE NOT NULL, status TEXT, worker_id TEXT, '
+            'claimed_at REAL, name TEXT, genres TEXT, price REAL, online INTEGER, multiplayer INTEGER, rating REAL, '
+            'release_date INTEGER);'
+            'CREATE INDEX IF NOT EXISTS games_status ON games (status, seq);'
+            'CREATE TABLE IF NOT EXISTS profiles ('
+            'profile_id INTEGER PRIMARY KEY, worker_id TEXT, claimed_at REAL, done INTEGER);'
+            'CREATE TABLE IF NOT EXISTS edges ('
+            'init_app_id INTEGER, recommended_app_id INTEGER, UNIQUE (init_app_id, recommended_app_id));'
+            'CREATE TABLE IF NOT EXISTS appearances ('
+            'profile_id INTEGER, app_id INTEGER, PRIMARY KEY (profile_id, app_id));')
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self._connection.close()
+
+    def add_seed_games(self, games: list[Game]) -> None:
+        """Add the games the crawl starts from to the queue, unless they are already in it."""
+        with self._connection:
+            for game in games:
+                self._insert_game(app_id=game.app_id, game=game)
+
+    def claim_game(self) -> Optional[int]:
+        """Claim the game that was found first among the games that are not claimed and return its app id,
+        or return None if there is no such game. Expired claims are released first.
+        """
+        now = time.time()
+        with self._connection:
+            self._connection.execute('BEGIN IMMEDIATE')
+            self._connection.execute("UPDATE games SET status = 'pending' WHERE status = 'claimed' AND claimed_at < ?",
+                                     (now - CLAIM_TIMEOUT,))
+            row = self._connection.execute(
+                "UPDATE games SET status = 'claimed', worker_id = ?, claimed_at = ? WHERE app_id = "
+                "(SELECT app_id FROM games WHERE status = 'pending' ORDER BY seq LIMIT 1) RETURNING app_id",
+                (self.worker_id, now)).fetchone()
+        return row[0] if row is not None else None
+
+    def finish_game(self, app_id: int) -> None:
+        """Mark the reviewers of the game with the given app id as visited."""
+        with self._connection:
+            self._connection.execute("UPDATE games SET status = 'done' WHERE app_id = ?", (app_id,))
+
+    def claim_profile(self, profile_id: int) -> bool:
+        """Claim the reviewer with the given profile id and return True, or return False if another worker has
+        already visited the reviewer or holds a claim on it that has not expired.
+        """
+        now = time.time()
+        with self._connection:
+            cursor = self._connection.execute(
+                'INSERT INTO profiles (profile_id, worker_id, claimed_at, done) VALUES (?, ?, ?, 0) '
+                'ON CONFLICT (profile_id) DO UPDATE SET worker_id = excluded.worker_id, '
+                'claimed_at = excluded.claimed_at WHERE profiles.done = 0 AND profiles.claimed_at < ?',
+                (profile_id, self.worker_id, now, now - CLAIM_TIMEOUT))
+        return cursor.rowcount == 1
+
+    def get_unknown_app_ids(self, app_ids: list[int]) -> list[int]:
+        """Return the app ids that are not in the queue yet, in order."""
+        known = {row[0] for row in self._connection.execute(
+            f"SELECT app_id FROM games WHERE app_id IN ({', '.join('?' * len(app_ids))})", app_ids)}
+        return [app_id for app_id in app_ids if app_id not in known]
+
+    def add_reviewer_games(self, curr_app_id: int, profile_id: int, app_ids: list[int],
+                           fetched_games: dict[int, Optional[Game]]) -> None:
+        """Add the top games of a reviewer of the game with curr_app_id, like _add_reviewer_games of
+        games_network, and mark the reviewer as visited.
+
+        fetched_games maps the app ids that were not in the queue to their game, or None if they have no data.
+        The app ids that are not in the queue or in fetched_games, like the games whose requests failed, are left
+        out, so that they are fetched again when another reviewer has them.
+        Doing this again for the same reviewer changes nothing.
+        """
+        with self._connection:
+            self._connection.execute('BEGIN IMMEDIATE')
+            for app_id, game in fetched_games.items():
+                self._insert_game(app_id, game)
+
+            valid = {row[0] for row in self._connection.execute(
+                f"SELECT app_id FROM games WHERE status != 'invalid' AND app_id IN ({', '.join('?' * len(app_ids))})",
+                app_ids)}
+            for app_id in app_ids:
+                if app_id in valid:
+                    self._connection.execute('INSERT OR IGNORE INTO edges VALUES (?, ?)', (curr_app_id, app_id))
+                    self._connection.execute('INSERT OR IGNORE INTO appearances VALUES (?, ?)', (profile_id, app_id))
+
+            self._connection.execute('UPDATE profiles SET done = 1 WHERE profile_id = ?', (profile_id,))
+
+    def num_games(self) -> int:
+        """Return the number of games with data found by the crawl."""
+        return self._connection.execute("SELECT COUNT(*) FROM games WHERE status != 'invalid'").fetchone()[0]
+
+    def has_claimed_games(self) -> bool:
+        """Return whether a worker is visiting the reviewers of a game."""
+        return self._connection.execute("SELECT 1 FROM games WHERE status = 'claimed' LIMIT 1").fetchone() is not None
+
+    def to_network(self, network: Optional[RecommendedGamesNetwork] = None) -> RecommendedGamesNetwork:
+        """Return the network of the games and edges found by the crawl, in the order they were found, with the
+        weights of the edges normalized and the likeability of the games updated.
+
+        The games are added to network, which is a new RecommendedGamesNetwork if it is None.
+        """
+        if network is None:
+            network = RecommendedGamesNetwork()
+
+        games = {}
+        for row in self._connection.execute(
+                "SELECT app_id, name, genres, price, online, multiplayer, rating, release_date FROM games "
+                "WHERE status != 'invalid' ORDER BY seq"):
+            games[row[0]] = Game(row[0], row[1], set(json.loads(row[2])), row[3], bool(row[4]), bool(row[5]),
+                                 row[6], row[7])
+            network.add_game(games[row[0]])
+
+        for init_app_id, recommended_app_id in self._connection.execute('SELECT * FROM edges ORDER BY rowid'):
+            network.add_recommendation(games[init_app_id], games[recommended_app_id])
+
+        counts = dict(self._connection.execute('SELECT app_id, COUNT(*) FROM appearances GROUP BY app_id'))
+        network.update_edge_weights_by_target(CoOccurrenceCounter(counts).get_weights())
+        network.update_games_likeability()
+        return network
+
+    def _insert_game(self, app_id: int, game: Optional[Game]) -> None:
+        """Add a game to the queue as pending, or as invalid if game is None, unless it is already there.
+        SQLite numbers the games in seq in the order they are added.
+        """
+        if game is None:
+            self._connection.execute("INSERT OR IGNORE INTO games (app_id, status) VALUES (?, 'invalid')", (app_id,))
+        else:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO games (app_id, status, name, genres, price, online, multiplayer, rating, "
+                "release_date) VALUES (?, 'pending', ?, ?, ?, ?, ?, ?, ?)",
+                (app_id, game.name, json.dumps(sorted(game.genres)), game.price, game.online, game.multiplayer,
+                 game.rating, game.release_date))
+
+
+def run_worker(path: str, num_recommendations: int, worker_id: Optional[str] = None,
+               max_rate: Optional[float] = None) -> None:
+    """Visit the reviewers of the games in the queue at path until the crawl has num_recommendations games,
+    or there are no more games to visit.
+
+    If max_rate is not None, the worker sends at most max_rate requests per second to each host, so that
+    several workers together stay under the rate Steam allows.
+    """
+    if worker_id is None:
+        worker_id = f'{socket.gethostname()}-{os.getpid()}'
+    if max_rate is not None:
+        http_client.RATE_LIMITER = RateLimiter(min(max_rate, http_client.RATE_LIMITER.initial_rate),
+                                               min(max_rate, http_client.RATE_LIMITER.min_rate), max_rate)
+
+    queue = CrawlQueue(path, worker_id)
+    try:
+        while queue.num_games() < num_recommendations:
+            curr_app_id = queue.claim_game()
+            if curr_app_id is None:
+                if not queue.has_claimed_games():
+                    break
+                # Other workers may still find games to visit
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            # Games and reviewers whose requests fail are skipped, like in create_recommendation_network
+            for profile_id in fetch_reviewer_ids(curr_app_id):
+                if queue.num_games() < num_recommendations and queue.claim_profile(profile_id):
+                    app_ids = fetch_reviewer_app_ids(profile_id)
+                    fetched_games = fetch_games(queue.get_unknown_app_ids(app_ids))
+                    queue.add_reviewer_games(curr_app_id, profile_id, app_ids, fetched_games)
+
+            queue.finish_game(curr_app_id)
+    finally:
+        queue.close()
+
+
+def fetch_games(app_ids: list[int]) -> dict[int, Optional[Game]]:
+    """Return a dictionary mapping each app id to its game, or to None if it has no game.
+
+    Unlike games_network.fetch_game_data, an app id whose request failed is left out instead of being mapped to
+    None, since None is stored in the queue for good as a game with no data.
+    """
+    fetched_games = {}
+    for app_id in app_ids:
+        if is_invalid_app_id(app_id):
+            fetched_games[app_id] = None
+            continue
+        try:
+            fetched_games[app_id] = get_game_data(app_id)
+        except http_client.SteamRequestError:
+            pass
+    return fetched_games
+
+
+def run_workers(path: str, num_recommendations: int, num_workers: int) -> None:
+    """Run num_workers worker processes on the queue at path until they stop, splitting the request rate of
+    http_client.RATE_LIMITER between them.
+
+    Preconditions:
+    - num_workers >= 1
+    """
+    context = multiprocessing.get_context(START_METHOD)
+    max_rate = http_client.RATE_LIMITER.max_rate / num_workers
+    workers = [context.Process(target=run_worker, args=(path, num_recommendations, None, max_rate))
+               for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def run_crawl_workers(path: str, user_app_ids_to_games: dict[int, Game], num_recommendations: int = 50,
+                      num_workers: int = 4, network: Optional[RecommendedGamesNetwork] = None) \
+        -> RecommendedGamesNetwork:
+    """Crawl a network from the given games like create_recommendation_network, with num_workers worker
+    processes sharing the queue at path, and return the merged network.
+
+    The workers split the request rate of http_client.RATE_LIMITER between them. Since each worker adds the
+    top games of a whole reviewer at once, the network can have a few more than num_recommendations games.
+    If the queue at path already has games, for example from a crawl that was stopped, the crawl continues
+    from it.
+
+    Preconditions:
+    - num_workers >= 1
+    """
+    queue = CrawlQueue(path, 'main')
+    queue.add_seed_games(list(user_app_ids_to_games.values()))
+    run_workers(path, num_recommendations, num_workers)
+
+    try:
+        return queue.to_network(network)
+    finally:
+        queue.close()
+
+
+def main() -> None:
+    """Run workers or join a crawl, as given by the command line arguments."""
+    parser = argparse.ArgumentParser(description='Crawl a recommendation network with several worker processes.')
+    parser.add_argument('queue', help='the SQLite file of the shared work queue')
+    parser.add_argument('--seeds', type=int, nargs='*', default=[], help='the app ids the crawl starts from')
+    parser.add_argument('--num-games', type=int, default=50, help='the number of games in the network')
+    parser.add_argument('--workers', type=int, default=4, help='the number of worker processes on this host')
+    parser.add_argument('--join', action='store_true', help='only run workers for a crawl started elsewhere')
+    args = parser.parse_args()
+
+    if args.join:
+        run_workers(args.queue, args.num_games, args.workers)
+        return
+
+    seed_games = {app_id: get_game_data(app_id) for app_id in args.seeds}
+    network = run_crawl_workers(args.queue, {app_id: game for app_id, game in seed_games.items() if game is not None},
+                                args.num_games, args.workers)
+    print(f"Crawled {network.num_games} games.")
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Check this module with: python crawl_workers.py --check
+    if sys.argv[1:] == ['--check']:
+        import python_ta
+        import python_ta.contracts
+
+        import doctest
+
+        doctest.testmod()
+
+        python_ta.check_all(config={
+            'extra-imports': ['sys', 'argparse', 'json', 'multiprocessing', 'os', 'socket', 'sqlite3', 'time',
+                              'http_client', 'games_network', 'crawl_frontier', 'rate_limiter'],
+            'allowed-io': ['main'],
+            'max-line-length': 120
+        })
+    else:
+        main()
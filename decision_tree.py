@@ -16,8 +16,8 @@ from queue import Queue
 import math
 import time
 from tkinter import *
-import random
 from games_network import *
+from tree_evaluation import GameColumns, get_answers, get_leaf_indices, group_games_by_leaf, rank_top_games
 
 # This is a list of tuples where the first element is the question and the second element is the user's answer
 QUESTIONS_TO_ANSWERS = []
@@ -45,6 +45,12 @@ class DecisionTree:
         - false_branch: If the answer is negative
         - question_num: Represents the index of QUESTIONS
         - games: Represents the games in this node
+
+    The user's games are left out of the root by their app ids, so their data does not have to be fetched.
+
+    display_decision_tree puts the games into the leaves with tree_evaluation, which answers every question for
+    all the games at once. This class moves the games down the tree node by node, and is kept as the reference
+    that tree_evaluation is tested against in tests/test_tree_evaluation.py.
     """
 
     true_branch: Optional[DecisionTree]
@@ -52,10 +58,10 @@ class DecisionTree:
     question_num: int
     games: set[Game]
 
-    def __init__(self, games: set[Game], user_games: Optional[set[Game]] = None, question_num: int = 0) -> None:
+    def __init__(self, games: set[Game], user_app_ids: Optional[set[int]] = None, question_num: int = 0) -> None:
         self.question_num = question_num
-        if user_games is not None:
-            self.games = games - user_games
+        if user_app_ids is not None:
+            self.games = {game for game in games if game.app_id not in user_app_ids}
         else:
             self.games = set()
         self.true_branch = None
@@ -79,6 +85,46 @@ class DecisionTree:
                 queue.put_nowait(subtree.true_branch)
                 queue.put_nowait(subtree.false_branch)
 
+    def get_order_of_games(self) -> list[set[Game]]:
+        """Generate the decision tree, move the games of this tree down to its leaves by answering
+        QUESTIONS_TO_ANSWERS in each node, and return the games in each leaf, from least similar to most
+        similar to the user's preferences.
+
+        Preconditions:
+            - self.question_num == 0
+            - len(QUESTIONS_TO_ANSWERS) == 5
+        """
+        self.generate_preset_decision_tree()
+
+        queue = Queue()
+        queue.put_nowait(self)
+        order_of_games = []
+
+        while not queue.empty():
+            subtree = queue.get_nowait()
+            question = QUESTIONS_TO_ANSWERS[subtree.question_num][0]
+
+            if question == "Genre":
+                subtree.filter_by_genre()
+            elif question == "Price":
+                subtree.filter_by_price()
+            elif question == "Date":
+                subtree.filter_by_date()
+            elif question == "Online":
+                subtree.filter_by_online()
+            else:
+                subtree.filter_by_multiplayer()
+
+            # Since the false branch is added first, the leaves are in order from least to most similar
+            if (subtree.question_num + 1) < 5:
+                queue.put_nowait(subtree.false_branch)
+                queue.put_nowait(subtree.true_branch)
+            else:
+                order_of_games.append(subtree.false_branch.games)
+                order_of_games.append(subtree.true_branch.games)
+
+        return order_of_games
+
     def filter_by_genre(self) -> tuple[int, int]:
         """Filters the games to the true_branch if it matches the user's genre preference,
         otherwise moves it to the false_branch
@@ -727,82 +773,29 @@ def _display_stats_for_question(question: str, positive_per: float,
     window.mainloop()
 
 
-def display_decision_tree(games: set[Game], user_games: set[Game]) -> list[tuple[Game, int]]:
-    """Displays a pop-up window with the decision tree
+def display_decision_tree(games: set[Game], user_app_ids: set[int]) -> list[tuple[Game, int]]:
+    """Displays a pop-up window with the results of each question of the decision tree
 
-    Note we do not need a visited set since this is a binary tree
+    The games are put into the leaves of the decision tree by the columnar evaluation in tree_evaluation,
+    which answers each question for every game at once and gives the same leaves as DecisionTree.
+    The games with an app id in user_app_ids, the games the user owns, are left out.
 
     Returns the top five games and the window
     """
-    decision_tree = DecisionTree(games, user_games)
-
-    # Creates the decision tree
-    decision_tree.generate_preset_decision_tree()
-
-    queue = Queue()
-    queue.put_nowait(decision_tree)
-
-    order_of_games = []
-
-    display_counter = 1
-    total_games = len(decision_tree.games)
-
-    # The stats per question this will be reset each question
-    num_positive_games_per_q, num_negative_game_per_q = 0, 0
-
-    while not queue.empty():
-        subtree = queue.get_nowait()
-        question = QUESTIONS_TO_ANSWERS[subtree.question_num][0]
-
-        # When we are filtering for a new questions show the results to the window of the last question
-        if subtree.question_num == display_counter:
-            percentage_of_positives = num_positive_games_per_q / total_games
-            percentage_of_negatives = num_negative_game_per_q / total_games
-            last_question = QUESTIONS_TO_ANSWERS[display_counter - 1][0]
-            _display_stats_for_question(last_question, percentage_of_positives, percentage_of_negatives, False)
-
-            num_positive_games_per_q, num_negative_game_per_q = 0, 0
-            display_counter += 1
-
-        # Filter games comparing their attributes to the answer given by the user
-        if question == "Genre":
-            results = subtree.filter_by_genre()
-            num_positive_games_per_q += results[0]
-            num_negative_game_per_q += results[1]
-        elif question == "Price":
-            results = subtree.filter_by_price()
-            num_positive_games_per_q += results[0]
-            num_negative_game_per_q += results[1]
-        elif question == "Date":
-            results = subtree.filter_by_date()
-            num_positive_games_per_q += results[0]
-            num_negative_game_per_q += results[1]
-        elif question == "Online":
-            results = subtree.filter_by_online()
-            num_positive_games_per_q += results[0]
-            num_negative_game_per_q += results[1]
-        else:
-            results = subtree.filter_by_multiplayer()
-            num_positive_games_per_q += results[0]
-            num_negative_game_per_q += results[1]
-
-        # If the next subtrees have a question to ask
-        if (subtree.question_num + 1) < 5:
-            queue.put_nowait(subtree.false_branch)
-            queue.put_nowait(subtree.true_branch)
-        else:
-            # The end result of the games when they have filtered into the last subtree
-            # Notice that since we are adding the false branch first this will give us
-            # the order from least similar to most similar
+    columns = GameColumns.from_games([game for game in games if game.app_id not in user_app_ids])
+    answers = get_answers(columns, QUESTIONS_TO_ANSWERS)
+    total_games = len(columns)
 
-            order_of_games.append(subtree.false_branch.games)
-            order_of_games.append(subtree.true_branch.games)
+    # Show the results of each question, the last window leads to the results
+    for question_num in range(0, 5):
+        num_positive_games = int(answers[question_num].sum())
+        percentage_of_positives = num_positive_games / total_games
+        percentage_of_negatives = (total_games - num_positive_games) / total_games
+        question = QUESTIONS_TO_ANSWERS[question_num][0]
+        _display_stats_for_question(question, percentage_of_positives, percentage_of_negatives, question_num == 4)
 
-    # Transition here to get results destroy header label here display the last results as well here
-    percentage_of_positives = num_positive_games_per_q / total_games
-    percentage_of_negatives = num_negative_game_per_q / total_games
-    last_question = QUESTIONS_TO_ANSWERS[4][0]
-    _display_stats_for_question(last_question, percentage_of_positives, percentage_of_negatives, True)
+    # The games in each leaf, from least similar to most similar
+    order_of_games = group_games_by_leaf(columns, get_leaf_indices(answers))
 
     # Get the results
     top_five = _get_results(order_of_games)
@@ -810,74 +803,16 @@ def display_decision_tree(games: set[Game], user_games: set[Game]) -> list[tuple
     return top_five
 
 
-def _get_results(order_of_games: list[set[Game]]) -> list[tuple[Game, int]]:
-    """Based on the ordering of the games get the top three games combining likeability score and
+def _get_results(order_of_games: list[set[Game]], k: int = 5) -> list[tuple[Game, int]]:
+    """Based on the ordering of the games get the top k games combining likeability score and
     the ordering done by the decision tree.
 
-    If there is a tie we take the game higher up in the order
-    To break another tie take the game with the higher likeability score
-    Otherwise keep the game that was already in the top 3
-
-    returns the top five games
-    """
-    # The pop method for set removes and return random elements this is why I made a copy, so it does not mutate
-    top_five = []
-    copy_order_of_games = order_of_games.copy()
-
-    for _ in range(0, 5):
-        starting = random.choice(copy_order_of_games)
-        while len(starting) == 0:
-            starting = random.choice(order_of_games)
-
-        top_five.append((starting.pop(), -32))
-
-    for order in range(0, len(order_of_games)):
-        for game in order_of_games[order]:
-            _compare_top_five(top_five, game, order + 1)
-
-    return top_five
+    The games are ranked by tree_evaluation.rank_top_games, which breaks ties the same way every time
+    and does not mutate order_of_games.
 
-
-def _compare_top_five(top_five: list[tuple[Game, int]], game: Game, order: int) -> None:
-    """Compare the game with the top_five if it has a higher score it will mutate top_five
-
-    The higher the index in top_three the higher the game score
-
-    The first element of the tuple is the game and the second element is the order of the game
-    The higher the order the more similar the game is to the user's preferences
+    returns the top k games, from the lowest score to the highest
     """
-
-    for i in range(0, 5):
-        if _compare_games((game, order), top_five[i]):
-            if i == 0:
-                top_five[0] = (game, order)
-            else:
-                top_five[i - 1], top_five[i] = top_five[i], top_five[i - 1]
-        else:
-            break
-
-
-def _compare_games(game1: tuple[Game, int], game2: tuple[Game, int]) -> bool:
-    """Given two game and its order return true if game 1 should be higher up
-
-    Note max order is 64
-
-    To compute the user preference score it will be on a scale of 0 - 5 where the order determined its scaling
-
-    Break ties as mentioned in _get_results
-    """
-
-    game1_score = game1[0].likeability + (game1[1] / 32) * 5
-    game2_score = game2[0].likeability + (game2[1] / 32) * 5
-
-    if game1_score > game2_score:
-        return True
-    elif game1_score == game2_score and game1[1] > game2[1]:
-        return True
-    elif game1_score == game2_score and game1[1] == game2[1] and game1[0].likeability > game2[0].likeability:
-        return True
-    else:
-        return False
+    return rank_top_games(order_of_games, k)[::-1]
 
 
 def displaying_results(top_games: list[tuple[Game, int]]) -> None:
@@ -973,7 +908,7 @@ if __name__ == '__main__':
 
     doctest.testmod()
     python_ta.check_all(config={
-        'extra-imports': ['typing', 'queue', 'math', 'time', 'tkinter', 'games_network', 'random'],
+        'extra-imports': ['typing', 'queue', 'math', 'time', 'tkinter', 'games_network', 'tree_evaluation'],
         'allowed-io': [],
         'disable': ['wildcard-import', 'too-many-arguments', 'unnecessary-lambda', 'too-many-locals',
                     'too-many-statements', 'forbidden-IO-function', 'consider-using-with', 'possibly-undefined'],
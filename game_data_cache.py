@@ -0,0 +1,67 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains a persistent cache for the game data scraped from Steam store pages.
+The data is stored in a SQLite database so that it can be shared between runs of the program, and the most
+recently used games are also kept in memory.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Daniel Lee, Andy Zhang, Chris Oh, Ahmed Hassini
+"""
+from __future__ import annotations
+import json
+from typing import Optional
+from store_page import GameFields
+from timed_cache import TimedCache
+
+
+class GameDataCache(TimedCache):
+    """A cache of scraped game data keyed by app id, with a memory tier and an optional SQLite tier.
+    games_network.get_game_data puts the name of the backend the data came from in front of the app id,
+    like 'html:730'.
+
+    Each entry expires ttl seconds after it was scraped. If more than max_stored entries are in the database,
+    the least recently used entries are evicted from it, every TimedCache.EVICTION_INTERVAL puts. See TimedCache
+    for the meaning of the other arguments.
+
+    >>> cache = GameDataCache(':memory:')
+    >>> cache.put(730, ('Counter-Strike 2', {'FPS'}, 14.99, True, True, 0.9, 2012))
+    >>> cache.get(730)
+    ('Counter-Strike 2', {'FPS'}, 14.99, True, True, 0.9, 2012)
+    >>> cache.get(570) is None
+    True
+    >>> (cache.hits, cache.misses)
+    (1, 1)
+    """
+    TABLE = 'game_fields'
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 7 * 24 * 60 * 60, max_entries: int = 10000,
+                 max_stored: Optional[int] = 100000) -> None:
+        super().__init__(path, ttl, max_entries, max_stored)
+
+    def _encode(self, value: GameFields) -> str:
+        """Return the fields of a game as a JSON list, with its genres sorted."""
+        name, genres, price, online, multiplayer, rating, release_date = value
+        return json.dumps([name, sorted(genres), price, online, multiplayer, rating, release_date])
+
+    def _decode(self, text: str) -> GameFields:
+        """Return the fields of a game stored as text by _encode."""
+        name, genres, price, online, multiplayer, rating, release_date = json.loads(text)
+        return name, set(genres), price, bool(online), bool(multiplayer), rating, release_date
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['json', 'store_page', 'timed_cache'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
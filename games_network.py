@@ -11,18 +11,71 @@ This file is Copyright (c) 2023 Ahmed Hassini, Chris Oh, Andy Zhang, Daniel Lee
 """
 
 from __future__ import annotations
-from queue import Queue
-from typing import Optional
-from bs4 import BeautifulSoup
-import requests
+import asyncio
+import atexit
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Optional
+import http_client
 from scrape_profile_ids import scrape_profile_ids
-from scrape_app_ids import scrape_app_ids, get_json_response
+from scrape_app_ids import scrape_app_ids, scrape_owned_app_ids, is_empty_profile
+from game_data_cache import GameDataCache
+from negative_cache import NegativeCache
+from store_page import GameFields, parse_store_page, parse_store_page_stream, save_store_page
+from app_details import get_app_details_fields
+from crawl_frontier import CoOccurrenceCounter, CrawlFrontier
+
+# The cache checked by get_game_data before scraping a store page. Its database is next to this module, so that
+# the same cache is used wherever the program is run from. It is only created once the cache is first used.
+GAME_DATA_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'game_data_cache.sqlite3')
+GAME_DATA_CACHE = GameDataCache(GAME_DATA_CACHE_FILE)
+
+# The app ids whose store pages have no game, like DLC, soundtracks and region-locked pages, which are not
+# scraped again until they expire. Set it to None to always scrape the page.
+INVALID_APP_IDS: Optional[NegativeCache] = NegativeCache(ttl=24 * 60 * 60)
+
+# The address of the store pages, followed by the app id of a game.
+# It can be changed to point to a local fake of Steam.
+STORE_PAGE_URL = 'https://store.steampowered.com/app/'
+
+# Whether store pages are parsed while they are downloaded, closing the connection once every field is found,
+# and the number of bytes read from the connection at a time
+STREAM_STORE_PAGES = True
+STORE_PAGE_CHUNK_SIZE = 16 * 1024
+
+# The directory every scraped store page is saved to, to measure the parsers on with
+# store_page.benchmark_store_page_parsers, or None to not save the pages.
+# The pages are downloaded whole, and not streamed, while it is set.
+STORE_PAGES_DIR: Optional[str] = None
+
+# The key in METADATA_BACKENDS of the backend get_game_data fetches game data with
+METADATA_BACKEND = 'html'
+
+# The number of games whose reviewers are visited between two saves of a checkpointed crawl
+CHECKPOINT_INTERVAL = 5
+
+# Whether the crawl visits the games expected to find the most new games first, among the games more than one
+# recommendation away from the user's games, instead of in the order they were found. See crawl_frontier.CrawlFrontier.
+# Both orders can be compared with crawl_benchmark.py.
+PRIORITIZED_CRAWL = True
+
+# The number of processes store pages are parsed in.
+# If it is 0, pages are parsed in the thread that fetched them.
+PARSE_WORKERS = 0
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
 
 
 class Game:
     """This object represents a video game and the relevant data associated with it.
 
+    Two games are equal if they have the same app id, so a game can be looked up in sets and dictionaries
+    with any Game object of the same app id.
+
     Instance Attributes:
+    - app_id: The Steam app id of the game
     - name: Name of the game
     - genres: Genres of the game
     - price: Price of the game
@@ -37,12 +90,14 @@ class Game:
                             of reviewers who play this game that recommended the other game.
 
     Representation Invariants:
+    - self.app_id >= 0
     - self.name != ''
     - self.price >= 0
     - self.rating >= 0
     - self.release_date >= 0
     - self.likeability >= 0
     """
+    app_id: int
     name: str
     genres: set[str]
     price: float
@@ -54,9 +109,10 @@ class Game:
     likeability: float
     recommended_games: dict[Game, float]
 
-    def __init__(self, name: str, genres: set[str], price: float, online: bool,
+    def __init__(self, app_id: int, name: str, genres: set[str], price: float, online: bool,
                  multiplayer: bool, rating: float, release_date: int) -> None:
         # PythonTA says max number of parameters is 5. Maybe ignore this one.
+        self.app_id = app_id
         self.name = name
         self.genres = genres
         self.price = price
@@ -68,6 +124,19 @@ class Game:
         self.likeability = 0
         self.recommended_games = {}
 
+    def __eq__(self, other: Any) -> bool:
+        """Return whether other is a game with the same app id as this game.
+        Return NotImplemented if other is not a Game, so that Python tries other's __eq__ instead, which lets
+        a CompactGame equal the Game with the same app id from either side.
+        """
+        if not isinstance(other, Game):
+            return NotImplemented
+        return self.app_id == other.app_id
+
+    def __hash__(self) -> int:
+        """Return the hash of this game, which only depends on its app id."""
+        return hash(self.app_id)
+
     def update_game_likeability(self, max_tributes: int) -> None:
         """Updates game instance attribute likeability.
 
@@ -98,9 +167,13 @@ class RecommendedGamesNetwork:
     """A directed graph where each vertex represents a game object and each directed edge represents a
         recommendation.
 
+    The tributes of each game and the sum of the weights of the edges pointing to it are kept up to date as
+    edges are added and updated, so the likeability of a game can be read at any time with get_likeability.
+
     Representation Invariants:
     - self.num_games >= 0
     - self.max_tributes >= 0
+    - all(len(set(game.tributes)) == len(game.tributes) for game in self._games.values())
     """
     # Public Instance Attributes
     #   - num_games: The number of games in the network.
@@ -108,26 +181,30 @@ class RecommendedGamesNetwork:
     #
     # Private Instance Attributes
     #   - _games: A collection of the games contained in this graph.
-    #                    Keys: Game name, Values: Game object
+    #                    Keys: Game app id, Values: Game object
+    #   - _in_weights: The sum of the weights of the edges pointing to each game.
+    #                    Keys: Game app id, Values: sum of the weights
     num_games: int
-    _games: dict[str, Game]
+    _games: dict[int, Game]
     max_tributes: int
+    _in_weights: dict[int, float]
 
     def __init__(self) -> None:
         self.num_games = 0
         self._games = {}
         self.max_tributes = 0
+        self._in_weights = {}
 
-    def add_game_by_info(self, name: str, genre: set[str], price: float, rating: float, online: bool,
+    def add_game_by_info(self, app_id: int, name: str, genre: set[str], price: float, rating: float, online: bool,
                          multiplayer: bool, release_date: int) -> None:
-        """Add a game with the given name, score, and rating in the network.
+        """Add a game with the given app id, name, score, and rating in the network.
 
         The new game is not adjacent to any other existing games.
 
         Preconditions:
-        - name not in self._games
+        - app_id not in self._games
         """
-        self._games[name] = Game(name, genre, price, online, multiplayer, rating, release_date)
+        self._games[app_id] = Game(app_id, name, genre, price, online, multiplayer, rating, release_date)
         self.num_games += 1
 
     def add_game(self, game: Game) -> None:
@@ -136,9 +213,9 @@ class RecommendedGamesNetwork:
         The new game is not adjacent to any other existing games.
 
         Preconditions:
-        - name not in self._games
+        - game.app_id not in self._games
         """
-        self._games[game.name] = game
+        self._games[game.app_id] = game
         self.num_games += 1
 
     def add_recommendation(self, init_game: Game, recommended_game: Game, weight: float = 0.0) -> None:
@@ -149,35 +226,46 @@ class RecommendedGamesNetwork:
         The weight value represents the strength of a recommendation from init_game to recommended_game.
 
         Note that the tribute attribute of recommended_game gets updates.
+        If the edge already exists, only its weight is updated.
 
         If any of the games are not in the network, then add them to the network.
+        Otherwise the edge is added between the Game objects already in the network with the same app ids.
         """
         #  Adding games to the network if they are not already in it
-        if init_game.name not in self._games:
+        if init_game.app_id not in self._games:
             self.add_game(init_game)
-        if recommended_game not in self._games:
+        if recommended_game.app_id not in self._games:
             self.add_game(recommended_game)
 
-        #  Adding a one way edge
-        init_game.recommended_games[recommended_game] = weight
+        init_game = self._games[init_game.app_id]
+        recommended_game = self._games[recommended_game.app_id]
 
-        #  Updating tributes
-        recommended_game.tributes.append(init_game)
+        #  Updating the incoming weight of recommended game
+        old_weight = init_game.recommended_games.get(recommended_game, 0.0)
+        self._in_weights[recommended_game.app_id] = \
+            self._in_weights.get(recommended_game.app_id, 0.0) - old_weight + weight
 
-        #  Updating tributes attribute for recommended game
-        self.max_tributes = max(self.max_tributes, len(recommended_game.tributes))
+        if recommended_game not in init_game.recommended_games:
+            #  Updating tributes
+            recommended_game.tributes.append(init_game)
 
-    def get_recommendations(self, game: str) -> set[Game]:
-        """Return the set of games recommended by game.
+            #  Updating tributes attribute for recommended game
+            self.max_tributes = max(self.max_tributes, len(recommended_game.tributes))
 
-        Note that the objects are returned, not the game names.
+        #  Adding a one way edge
+        init_game.recommended_games[recommended_game] = weight
+
+    def get_recommendations(self, app_id: int) -> set[Game]:
+        """Return the set of games recommended by the game with the given app id.
+
+        Note that the objects are returned, not the app ids.
 
         Raise a ValueError if the game is not in the network.
         """
-        if game not in self._games:
-            raise ValueError("Game name not found in network.")
+        if app_id not in self._games:
+            raise ValueError("Game app id not found in network.")
         else:
-            return set(self._games[game].recommended_games.keys())
+            return set(self._games[app_id].recommended_games.keys())
 
     def get_games_to_likeability(self) -> dict[Game, float]:
         """Returns a dictionary where the keys are the games in the network
@@ -190,8 +278,16 @@ class RecommendedGamesNetwork:
 
         return set(self._games.values())
 
-    def update_edge_weight(self, init_game: str, recommended_game: str, new_weight: float) -> None:
-        """Update the weight of the edge between init_game and recommended_game to new_weight.
+    def get_edges(self) -> list[tuple[int, int, float]]:
+        """Return the app id of the init game, the app id of the recommended game and the weight of every edge
+        in the network.
+        """
+        return [(game.app_id, recommended_game.app_id, weight) for game in self._games.values()
+                for recommended_game, weight in game.recommended_games.items()]
+
+    def update_edge_weight(self, init_game: int, recommended_game: int, new_weight: float) -> None:
+        """Update the weight of the edge between the games with app ids init_game and recommended_game
+        to new_weight.
 
         If either game is not in the network then raise a ValueError
         If init_game does not recommend recommended_game raise a ValueError
@@ -199,12 +295,43 @@ class RecommendedGamesNetwork:
         if init_game in self._games and recommended_game in self._games:
             if self._games[recommended_game] in self._games[init_game].recommended_games:
                 updated_game = self._games[recommended_game]
+                old_weight = self._games[init_game].recommended_games[updated_game]
                 self._games[init_game].recommended_games[updated_game] = new_weight
+                self._in_weights[recommended_game] += new_weight - old_weight
             else:
                 raise ValueError("init_game does not have an edge directed to recommended_game")
         else:
             raise ValueError("One of the games do not exist in this network.")
 
+    def update_edge_weights_by_target(self, target_weights: dict[int, float]) -> None:
+        """Set the weight of every edge to the weight in target_weights of the app id of the game it points to.
+        Edges pointing to games that are not in target_weights get a weight of 0.
+        """
+        for game in self._games.values():
+            for recommended_game in game.recommended_games:
+                game.recommended_games[recommended_game] = target_weights.get(recommended_game.app_id, 0.0)
+
+        for game in self._games.values():
+            self._in_weights[game.app_id] = len(game.tributes) * target_weights.get(game.app_id, 0.0)
+
+    def get_likeability(self, app_id: int) -> float:
+        """Return the likeability of the game with the given app id, computed from the current edges in O(1).
+
+        This is the same score update_games_likeability stores in the likeability attribute of the game.
+
+        Raise a ValueError if the game is not in the network.
+        """
+        if app_id not in self._games:
+            raise ValueError("Game app id not found in network.")
+
+        game = self._games[app_id]
+        num_tributes = len(game.tributes)
+
+        if num_tributes == 0:
+            return game.rating
+
+        return self._in_weights[app_id] / num_tributes + num_tributes / self.max_tributes + game.rating
+
     def update_games_likeability(self) -> None:
         """Updates each games instance attribute likeability.
 
@@ -215,175 +342,547 @@ class RecommendedGamesNetwork:
             - ratings
             - tributes weight
         """
-        for game in self._games.values():
-            game.update_game_likeability(self.max_tributes)
+        for app_id, game in self._games.items():
+            game.likeability = self.get_likeability(app_id)
+
+
+class CrawlState:
+    """The state of a crawl by create_recommendation_network, which can be saved to a file and resumed.
+
+    The state is only saved between two reviewers, when the network, the frontier, the visited reviewers and
+    the appearances agree with each other.
 
+    Instance Attributes:
+    - network: The network of the games found so far
+    - frontier: The games whose reviewers have not been visited yet
+    - visited_profile_ids: The profile ids of the reviewers whose games were added to the network
+    - app_id_to_game: Every game found so far, in the order it was found. Keys: app id, Values: Game object
+    - appearances: The appearances of the games in the top games of the visited reviewers
+    - num_recommendations: The number of games the crawl stops at
 
-def create_recommendation_network(user_app_ids_to_games: dict[int, Game],
-                                  num_recommendations: int = 50) -> RecommendedGamesNetwork:
+    Representation Invariants:
+    - all(app_id in self.app_id_to_game for app_id in self.frontier.peek(len(self.frontier)))
+    - self.network.num_games == len(self.app_id_to_game)
+    """
+    network: RecommendedGamesNetwork
+    frontier: CrawlFrontier
+    visited_profile_ids: set[int]
+    app_id_to_game: dict[int, Game]
+    appearances: CoOccurrenceCounter
+    num_recommendations: int
+
+    def __init__(self, user_app_ids_to_games: dict[int, Game], num_recommendations: int,
+                 network: Optional[RecommendedGamesNetwork] = None) -> None:
+        self.network = network if network is not None else RecommendedGamesNetwork()
+        self.frontier = CrawlFrontier(user_app_ids_to_games, PRIORITIZED_CRAWL)  # Adding starting games to the frontier
+        self.visited_profile_ids = set()
+        self.app_id_to_game = user_app_ids_to_games.copy()
+        self.appearances = CoOccurrenceCounter()
+        self.num_recommendations = num_recommendations
+
+        for game in user_app_ids_to_games.values():
+            self.network.add_game(game)  # Adding starting games to network
+
+    def is_done(self) -> bool:
+        """Return whether the crawl has enough games, or has no more games to visit."""
+        return len(self.frontier) == 0 or self.network.num_games >= self.num_recommendations
+
+    def save(self, path: str) -> None:
+        """Save the state to path, replacing the file at path only once the new state is completely written.
+
+        The games and edges are saved as plain data, and the type of the network is only saved by name, so that
+        load is given an empty network of the same type.
+        """
+        state = {
+            'network_type': type(self.network).__name__,
+            'games': [(game.app_id, game.name, game.genres, game.price, game.online, game.multiplayer,
+                       game.rating, game.release_date) for game in self.app_id_to_game.values()],
+            'edges': self.network.get_edges(),
+            'frontier': self.frontier.to_data(),
+            'visited_profile_ids': list(self.visited_profile_ids),
+            'appearances': self.appearances.get_counts(),
+            'num_recommendations': self.num_recommendations
+        }
+        temporary_path = path + '.tmp'
+        with open(temporary_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str, network: Optional[RecommendedGamesNetwork] = None) -> CrawlState:
+        """Return the state saved at path by save, with its games and edges added to network, which is a new
+        RecommendedGamesNetwork if it is None.
+
+        Raise ValueError if network is not of the type of network the state was saved with, like a
+        SparseRecommendedGamesNetwork.
+
+        Preconditions:
+        - network is None or network.num_games == 0
+        """
+        with open(path, 'rb') as file:
+            state = pickle.load(file)
+
+        if network is None:
+            network = RecommendedGamesNetwork()
+        if type(network).__name__ != state['network_type']:
+            raise ValueError(f"The crawl at {path} was saved with a {state['network_type']}, "
+                             f"not a {type(network).__name__}")
+
+        # The games are added to the network in the order they were found, like during the crawl
+        app_id_to_game = {fields[0]: Game(*fields) for fields in state['games']}
+        crawl_state = cls(app_id_to_game, state['num_recommendations'], network)
+        for init_app_id, recommended_app_id, weight in state['edges']:
+            network.add_recommendation(app_id_to_game[init_app_id], app_id_to_game[recommended_app_id], weight)
+
+        crawl_state.frontier = CrawlFrontier.from_data(state['frontier'])
+        crawl_state.visited_profile_ids = set(state['visited_profile_ids'])
+        crawl_state.appearances = CoOccurrenceCounter(state['appearances'])
+        return crawl_state
+
+
+def create_recommendation_network(user_app_ids_to_games: dict[int, Game], num_recommendations: int = 50,
+                                  max_concurrency: int = 1,
+                                  network: Optional[RecommendedGamesNetwork] = None,
+                                  checkpoint_path: Optional[str] = None,
+                                  checkpoint_interval: int = CHECKPOINT_INTERVAL,
+                                  verbose: bool = True) -> RecommendedGamesNetwork:
     """Takes in the user's top games from their profile
     then using the reviews on each game it will add recommended games to the network,
     returning a complete recommended game network
+
+    If max_concurrency is greater than 1, the crawl is done by create_recommendation_network_async with
+    at most max_concurrency requests in flight at once. The resulting network is the same.
+
+    The games are added to network, which is a new RecommendedGamesNetwork if it is None.
+    Pass an empty SparseRecommendedGamesNetwork to crawl into the sparse graph backend instead.
+
+    If checkpoint_path is not None, the state of the crawl is saved there after the reviewers of every
+    checkpoint_interval games are visited, and when the crawl stops with an error. A crawl that was stopped
+    can be continued with resume_recommendation_network.
+
+    The completeness of the crawl is printed as it goes if verbose is True.
+
+    Preconditions:
+    - max_concurrency >= 1
+    - network is None or network.num_games == 0
+    - checkpoint_interval >= 1
     """
-    network = RecommendedGamesNetwork()
+    state = CrawlState(user_app_ids_to_games, num_recommendations, network)
+    return crawl_recommendation_network(state, max_concurrency, checkpoint_path, checkpoint_interval, verbose)
 
-    visited_profile_ids = set()
-    q = Queue()  # Queue of app ids
-    app_id_to_game = user_app_ids_to_games.copy()
 
-    for app_id in user_app_ids_to_games:
-        q.put_nowait(app_id)  # Adding starting games to queue
-        network.add_game(user_app_ids_to_games[app_id])  # Adding starting games to network
+def resume_recommendation_network(checkpoint_path: str, max_concurrency: int = 1,
+                                  network: Optional[RecommendedGamesNetwork] = None,
+                                  checkpoint_interval: int = CHECKPOINT_INTERVAL,
+                                  verbose: bool = True) -> RecommendedGamesNetwork:
+    """Continue the crawl saved at checkpoint_path and return its network, which is the same network the crawl
+    would have returned if it had not been stopped. The crawl keeps saving its state to checkpoint_path.
 
-    #  Keep looping till we added num_recommendations in the network
-    #  Exit if the queue is empty (Occurs when not enough reviews on games were found)
-    app_ids_to_appearances = {}
-    while not q.empty() and network.num_games < num_recommendations:
-        curr_app_id = q.get_nowait()
-        profile_ids = scrape_profile_ids(curr_app_id, 5)
-        print(f"Completeness: {round((network.num_games / num_recommendations) * 100, 1)}%")
-
-        for profile_id in profile_ids:
-            if profile_id not in visited_profile_ids and network.num_games < num_recommendations:
-                app_ids = scrape_app_ids(profile_id, 5)
-                visited_profile_ids.add(profile_id)
-                for app_id in app_ids:
-                    if app_id not in app_ids_to_appearances:
-                        q.put_nowait(app_id)
-                        get_game = get_game_data(app_id)
-                        if get_game is None:
-                            continue
-                        app_id_to_game[app_id] = get_game_data(app_id)
-                        app_ids_to_appearances[app_id] = 1
-                    else:
-                        app_ids_to_appearances[app_id] += 1
-
-                    total_game_appearances = sum([app_ids_to_appearances[key] for key in app_ids_to_appearances])
-                    network.add_recommendation(app_id_to_game[curr_app_id],
-                                               app_id_to_game[app_id],
-                                               app_ids_to_appearances[app_id] / total_game_appearances)
-
-    network.update_games_likeability()
+    The games are added to network, which must be an empty network of the type the crawl was started with,
+    like create_recommendation_network. The completeness of the crawl is printed as it goes if verbose is True.
+
+    Preconditions:
+    - max_concurrency >= 1
+    - network is None or network.num_games == 0
+    - checkpoint_interval >= 1
+    """
+    state = CrawlState.load(checkpoint_path, network)
+    return crawl_recommendation_network(state, max_concurrency, checkpoint_path, checkpoint_interval, verbose)
+
+
+def crawl_recommendation_network(state: CrawlState, max_concurrency: int = 1, checkpoint_path: Optional[str] = None,
+                                 checkpoint_interval: int = CHECKPOINT_INTERVAL,
+                                 verbose: bool = True) -> RecommendedGamesNetwork:
+    """Continue the crawl with the given state until it is done, then normalize the weights of the edges and
+    update the likeability of the games. Return the network of the crawl.
+
+    See create_recommendation_network for the meaning of the other arguments.
+    """
+    if max_concurrency > 1:
+        asyncio.run(_crawl_async(state, max_concurrency, checkpoint_path, checkpoint_interval, verbose))
+    else:
+        _crawl(state, checkpoint_path, checkpoint_interval, verbose)
+
+    _normalize_edge_weights(state.network, state.appearances)
+    state.network.update_games_likeability()
+    if verbose:
+        print("Completeness: 100%")
+
+    return state.network
+
+
+async def create_recommendation_network_async(user_app_ids_to_games: dict[int, Game],
+                                              num_recommendations: int = 50,
+                                              max_concurrency: int = 16,
+                                              network: Optional[RecommendedGamesNetwork] = None) \
+        -> RecommendedGamesNetwork:
+    """Asynchronous version of create_recommendation_network.
+
+    The crawl visits games and reviewers in the same order as create_recommendation_network, so the
+    returned network is the same. The difference is that review pages, owned games lists and store pages
+    are fetched ahead of time, with at most max_concurrency of these requests in flight at once.
+
+    Preconditions:
+    - max_concurrency >= 1
+    - network is None or network.num_games == 0
+    """
+    state = CrawlState(user_app_ids_to_games, num_recommendations, network)
+    await _crawl_async(state, max_concurrency)
+
+    _normalize_edge_weights(state.network, state.appearances)
+    state.network.update_games_likeability()
     print("Completeness: 100%")
 
-    return network
+    return state.network
+
+
+def _crawl(state: CrawlState, checkpoint_path: Optional[str] = None,
+           checkpoint_interval: int = CHECKPOINT_INTERVAL, verbose: bool = True) -> None:
+    """Helper function for crawl_recommendation_network.
+    Visit the reviewers of the games in the frontier of state, one request at a time, until the crawl is done.
+    """
+    network = state.network
+    num_visited_games = 0
+
+    #  Keep looping till we added num_recommendations in the network
+    #  Exit if the frontier is empty (Occurs when not enough reviews on games were found)
+    while not state.is_done():
+        curr_app_id = state.frontier.pop()
+        try:
+            profile_ids = fetch_reviewer_ids(curr_app_id)
+            if verbose:
+                print(f"Completeness: {round((network.num_games / state.num_recommendations) * 100, 1)}%")
+
+            for profile_id in profile_ids:
+                if profile_id not in state.visited_profile_ids and network.num_games < state.num_recommendations:
+                    app_ids = fetch_reviewer_app_ids(profile_id)
+                    fetched_games = {app_id: fetch_game_data(app_id)
+                                     for app_id in app_ids if app_id not in state.app_id_to_game}
+                    state.visited_profile_ids.add(profile_id)
+                    _add_reviewer_games(network, curr_app_id, app_ids, fetched_games, state.app_id_to_game,
+                                        state.appearances, state.frontier)
+        except BaseException:
+            _save_interrupted_crawl(state, curr_app_id, checkpoint_path)
+            raise
+
+        num_visited_games += 1
+        if checkpoint_path is not None and num_visited_games % checkpoint_interval == 0:
+            state.save(checkpoint_path)
+
+    if checkpoint_path is not None:
+        state.save(checkpoint_path)
+
+
+async def _crawl_async(state: CrawlState, max_concurrency: int, checkpoint_path: Optional[str] = None,
+                       checkpoint_interval: int = CHECKPOINT_INTERVAL, verbose: bool = True) -> None:
+    """Helper function for crawl_recommendation_network and create_recommendation_network_async.
+    Visit the reviewers of the games in the frontier of state in the same order as _crawl until the crawl is done,
+    with at most max_concurrency requests in flight at once.
+    """
+    network = state.network
+    frontier = state.frontier
+    app_id_to_game = state.app_id_to_game
+    num_visited_games = 0
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    # Requests that have been started, keyed by the app id or profile id they are for
+    review_requests = {}
+    owned_games_requests = {}
+    game_requests = {}
+
+    def request_games(app_ids: list[int]) -> None:
+        """Start fetching the store page of each app id that has not been seen by the crawl yet,
+        unless it was recently found to have no game.
+        """
+        for app_id in app_ids:
+            if app_id not in app_id_to_game and app_id not in game_requests and not is_invalid_app_id(app_id):
+                game_requests[app_id] = loop.run_in_executor(executor, fetch_game_data, app_id)
+
+    try:
+        while not state.is_done():
+            curr_app_id = frontier.pop()
+            try:
+                # Start fetching the reviews of the games that are next in the frontier
+                for app_id in [curr_app_id] + frontier.peek(max_concurrency):
+                    if app_id not in review_requests:
+                        review_requests[app_id] = loop.run_in_executor(executor, fetch_reviewer_ids, app_id)
+
+                profile_ids = await review_requests.pop(curr_app_id)
+                if verbose:
+                    print(f"Completeness: {round((network.num_games / state.num_recommendations) * 100, 1)}%")
+
+                for profile_id in profile_ids:
+                    if profile_id not in state.visited_profile_ids and profile_id not in owned_games_requests \
+                            and not is_empty_profile(profile_id):
+                        owned_games_requests[profile_id] = loop.run_in_executor(executor, fetch_reviewer_app_ids,
+                                                                                profile_id)
+
+                for profile_id in profile_ids:
+                    if profile_id not in state.visited_profile_ids and network.num_games < state.num_recommendations:
+                        request = owned_games_requests.pop(profile_id, None)
+                        app_ids = await request if request is not None else []
+
+                        # Start fetching every game of the reviewers whose owned games have already arrived
+                        request_games(app_ids)
+                        for request in owned_games_requests.values():
+                            if request.done() and request.exception() is None:
+                                request_games(request.result())
+
+                        fetched_games = {}
+                        for app_id in app_ids:
+                            if app_id not in app_id_to_game:
+                                request = game_requests.pop(app_id, None)
+                                fetched_games[app_id] = await request if request is not None else None
+
+                        state.visited_profile_ids.add(profile_id)
+                        _add_reviewer_games(network, curr_app_id, app_ids, fetched_games, app_id_to_game,
+                                            state.appearances, frontier)
+            except BaseException:
+                _save_interrupted_crawl(state, curr_app_id, checkpoint_path)
+                raise
+
+            num_visited_games += 1
+            if checkpoint_path is not None and num_visited_games % checkpoint_interval == 0:
+                state.save(checkpoint_path)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if checkpoint_path is not None:
+        state.save(checkpoint_path)
+
+
+def fetch_reviewer_ids(app_id: int) -> list[int]:
+    """Return the profile ids of the first 5 reviewers of the game with the given app id.
+    Return an empty list if its reviews could not be fetched from Steam, so that the crawl skips the game.
+    """
+    try:
+        return scrape_profile_ids(app_id, 5)
+    except http_client.SteamRequestError:
+        return []
+
+
+def fetch_reviewer_app_ids(profile_id: int) -> list[int]:
+    """Return the app ids of the 5 most played games of the reviewer with the given profile id.
+
+    Return an empty list, so that the crawl skips the reviewer, if the reviewer was recently found to have no
+    public games, or if their games could not be fetched from Steam.
+    """
+    if is_empty_profile(profile_id):
+        return []
+    try:
+        return scrape_app_ids(profile_id, 5)
+    except http_client.SteamRequestError:
+        return []
+
+
+def fetch_game_data(app_id: int) -> Optional[Game]:
+    """Return the game data of the given app id, like get_game_data.
+
+    Return None, so that the crawl leaves the game out, if the app id was recently found to have no game, or if
+    its data could not be fetched from Steam. Unlike a page with no game, a failed request is not remembered in
+    INVALID_APP_IDS, since it may succeed the next time.
+    """
+    if is_invalid_app_id(app_id):
+        return None
+    try:
+        return get_game_data(app_id)
+    except http_client.SteamRequestError:
+        return None
+
+
+def _save_interrupted_crawl(state: CrawlState, curr_app_id: int, checkpoint_path: Optional[str]) -> None:
+    """Helper function for _crawl and _crawl_async.
+    Save the state of a crawl that stopped while visiting the reviewers of the game with curr_app_id,
+    putting the game back at the front of the frontier so that its remaining reviewers are visited on resume.
+    """
+    if checkpoint_path is not None:
+        state.frontier.push_front(curr_app_id)
+        state.save(checkpoint_path)
+
+
+def _add_reviewer_games(network: RecommendedGamesNetwork, curr_app_id: int, app_ids: list[int],
+                        fetched_games: dict[int, Optional[Game]], app_id_to_game: dict[int, Game],
+                        appearances: CoOccurrenceCounter, frontier: CrawlFrontier) -> None:
+    """Helper function for create_recommendation_network and create_recommendation_network_async.
+    Add an edge from the game with curr_app_id to each game in app_ids, the top games of one reviewer.
+
+    fetched_games maps each app id in app_ids that is not in app_id_to_game yet to its scraped game
+    (None if the store page could not be scraped). app_id_to_game, appearances and frontier are mutated:
+    the new games are added to frontier, one recommendation further from the user's games than the game with
+    curr_app_id.
+
+    The edges are added with a weight of 0. Their weights are set from appearances once the crawl is done,
+    by _normalize_edge_weights.
+    """
+    num_new = sum(1 for app_id in app_ids if app_id not in app_id_to_game and fetched_games[app_id] is not None)
+    for app_id in app_ids:
+        if app_id not in app_id_to_game:
+            game = fetched_games[app_id]
+            if game is None:
+                continue
+            app_id_to_game[app_id] = game
+            frontier.push(app_id, frontier.get_distance(curr_app_id) + 1, num_new)
+
+        appearances.add(app_id)
+        network.add_recommendation(app_id_to_game[curr_app_id], app_id_to_game[app_id])
+
+
+def _normalize_edge_weights(network: RecommendedGamesNetwork, appearances: CoOccurrenceCounter) -> None:
+    """Helper function for create_recommendation_network and create_recommendation_network_async.
+    Set the weight of every edge in network to the weight of the game it points to in appearances.
+
+    The weights are set once, when the crawl is done, instead of being read from appearances each time an edge
+    is used. Edge weights are read straight from the recommended_games of each Game, by the likeability of the
+    games, by compact_games and by sparse_network, and a weight depends on the total number of appearances,
+    which changes with every reviewer. This pass is linear in the number of edges, so the crawl stays linear.
+    """
+    network.update_edge_weights_by_target(appearances.get_weights())
 
 
 def get_game_data(app_id: int) -> Optional[Game]:
-    """Scrape game data from the Steam store given an app id.
+    """Return the game data of the given app id.
+
+    The data is read from GAME_DATA_CACHE if it has a fresh entry for the app id from the backend chosen by
+    METADATA_BACKEND. Otherwise it is fetched with that backend and stored in GAME_DATA_CACHE. The entries of
+    each backend are kept apart, since the backends describe genres with different words. Set GAME_DATA_CACHE
+    to None to always fetch the data. Return None without a request if the app id is in INVALID_APP_IDS, and
+    add the app id to it if its page has no game.
+
+    Preconditions:
+    - app_id corresponds to an existing game on the Steam platform.
+    - METADATA_BACKEND in METADATA_BACKENDS
+    """
+    cache_key = f'{METADATA_BACKEND}:{app_id}'
+    if GAME_DATA_CACHE is not None:
+        cached_fields = GAME_DATA_CACHE.get(cache_key)
+        if cached_fields is not None:
+            return Game(app_id, *cached_fields)
+
+    if is_invalid_app_id(app_id):
+        return None
+
+    game_fields = METADATA_BACKENDS[METADATA_BACKEND](app_id)
+
+    if game_fields is None:
+        if INVALID_APP_IDS is not None:
+            INVALID_APP_IDS.add(app_id)
+        return None
+
+    if GAME_DATA_CACHE is not None:
+        GAME_DATA_CACHE.put(cache_key, game_fields)
+
+    return Game(app_id, *game_fields)
+
+
+def is_invalid_app_id(app_id: int) -> bool:
+    """Return whether the store page of the given app id was recently found to have no game,
+    according to INVALID_APP_IDS.
+    """
+    return INVALID_APP_IDS is not None and app_id in INVALID_APP_IDS
+
+
+def scrape_store_page_fields(app_id: int) -> Optional[GameFields]:
+    """Scrape the game fields from the Steam store page of the given app id.
+    Return None if the page does not have a game name.
 
     Preconditions:
     - app_id corresponds to an existing game on the Steam platform.
 
-    >>> game1 = get_game_data(1677740)
+    >>> game1 = Game(1677740, *scrape_store_page_fields(1677740))
     >>> game1.name
     'Stumble Guys'
     >>> game1.rating
     0.9
 
-    >>> game2 = get_game_data(1023940)
+    >>> game2 = Game(1023940, *scrape_store_page_fields(1023940))
     >>> game2.multiplayer
     False
     >>> game2.price
     135.99
     """
-    url = f"https://store.steampowered.com/app/{app_id}/"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, "html.parser")
+    if PARSE_WORKERS > 0:
+        # The page is fetched in this thread and parsed in a worker process, so that parsing the pages
+        # fetched by a concurrent crawl is spread across cores
+        return get_parse_pool().submit(parse_store_page, fetch_store_page(app_id)).result()
+
+    if STREAM_STORE_PAGES and STORE_PAGES_DIR is None:
+        # Stop downloading the page once every field has been parsed
+        response = http_client.get(f"{STORE_PAGE_URL}{app_id}/", stream=True)
+        try:
+            return parse_store_page_stream(http_client.iter_content(response, STORE_PAGE_CHUNK_SIZE))
+        finally:
+            response.close()
+    else:
+        return parse_store_page(fetch_store_page(app_id))
 
-    # Get game name
-    try:
-        name = soup.select_one("div.apphub_AppName").text.strip()
-    except AttributeError:
-        return None
 
-    # Get game description
-    description = soup.select_one('div', {'class': 'game_description_snippet'}).text.strip()
-
-    # Get game genres
-    genres = {genre.text.strip() for genre in soup.select("a.app_tag")}
-
-    # Get game player modes
-    is_multiplayer = 'multiplayer' in description.lower() or 'multi-player' in description.lower() or \
-                     any('multiplayer' in tag.text.lower() for tag in soup.select('a.app_tag')) or \
-                     any('multi-player' in tag.text.lower() for tag in soup.select('a.app_tag'))
-
-    # Get game online component
-    has_online_component = 'online' in description.lower() or 'online' in genres or \
-                           any('online' in tag.text.lower() for tag in soup.select('a.app_tag'))
-
-    # Get game price
-    price_section = soup.select_one("div.game_purchase_price")
-    if price_section:
-        price = price_section.text.strip()
-        # Strip any dollar signs and currency symbols
-        price = ''.join(filter(str.isdigit, price))
-        if price:
-            price = float(price) / 100
-        else:
-            price = 0
-    # If there is no price section, the game is free
-    else:
-        price = 0
-
-    # Get game rating
-    review_summary = soup.select_one("div.user_reviews_summary_row")
-    rating = 0.0
-    if review_summary:
-        overall_review = review_summary.select_one("span.game_review_summary").text.strip().replace(",", "")
-        if overall_review == 'Overwhelmingly Positive':
-            rating = 1.0
-        elif overall_review == 'Very Positive':
-            rating = 0.90
-        elif overall_review == 'Positive':
-            rating = 0.80
-        elif overall_review == 'Mostly Positive':
-            rating = 0.7
-        elif overall_review == 'Mixed':
-            rating = 0.5
-        elif overall_review == 'Mostly Negative':
-            rating = 0.4
-        elif overall_review == 'Negative':
-            rating = 0.3
-        elif overall_review == 'Very Negative':
-            rating = 0.2
-        else:
-            rating = 0.1
+def fetch_store_page(app_id: int) -> bytes:
+    """Return the content of the Steam store page of the given app id.
+    The page is also saved to STORE_PAGES_DIR if it is not None.
+    """
+    content = http_client.get(f"{STORE_PAGE_URL}{app_id}/").content
+    if STORE_PAGES_DIR is not None:
+        save_store_page(content, app_id, STORE_PAGES_DIR)
+    return content
 
-    # Get game release year
-    release_date_section = soup.select_one("div.date")
-    if release_date_section:
-        release_year = release_date_section.text.strip()[-4:]
-    else:
-        release_year = ""
 
-    return Game(name, genres, price, has_online_component, is_multiplayer, rating, int(release_year))
+def get_parse_pool() -> ProcessPoolExecutor:
+    """Return the pool of PARSE_WORKERS processes that store pages are parsed in, creating it if needed.
+    The pool is shut down when the program exits, unless shutdown_parse_pool is called before.
+
+    Preconditions:
+    - PARSE_WORKERS > 0
+    """
+    global _parse_pool
+
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+            atexit.register(shutdown_parse_pool)
+        return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    """Shut down the pool of processes that store pages are parsed in, if it was created."""
+    global _parse_pool
+
+    with _parse_pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown()
+            _parse_pool = None
+            atexit.unregister(shutdown_parse_pool)
+
+
+# The backends that get_game_data can fetch game fields with.
+# 'html' scrapes the store page and 'json' uses the app details endpoint.
+METADATA_BACKENDS = {
+    'html': scrape_store_page_fields,
+    'json': get_app_details_fields
+}
 
 
 def scrape_app_ids_all(profile_id: int) -> set | list:
-    """Returns a set of the user's n most played games (in minutes).
+    """Returns a set of the games the user owns, with the data of each game.
     Return an empty list if the user has hidden game details.
-    If the user has less than n games, return all the games they have.
+
+    This fetches the data of every game the user owns, which takes a long time for large libraries.
+    Use scrape_app_ids.scrape_owned_app_ids to only get their app ids, for example to leave them out of the
+    recommendations.
 
     Preconditions:
         - len(profile_id) == 17
-        - n > 0
 
     >>> app_ids = scrape_app_ids_all(76561199000093113)
     len(app_ids) == 42
     """
-    params = {
-        'key': '4957E3F30616447A483A7DBA9F26172E',
-        'steamid': str(profile_id),
-        'format': 'json'
-    }
-    json_response = get_json_response(params)
-
-    if not json_response:
-        return []
+    app_ids = scrape_owned_app_ids(profile_id)
 
-    games = json_response['games']
-    app_ids = [game['appid'] for game in games]
+    if not app_ids:
+        return []
 
     return {get_game_data(appid) for appid in app_ids}
 
@@ -397,9 +896,11 @@ if __name__ == '__main__':
     doctest.testmod()
 
     python_ta.check_all(config={
-        'extra-imports': ['queue', 'bs4', 'requests', 'scrape_profile_ids', 'scrape_app_ids'],
+        'extra-imports': ['asyncio', 'atexit', 'os', 'pickle', 'threading', 'concurrent.futures', 'http_client',
+                          'scrape_profile_ids', 'scrape_app_ids', 'game_data_cache', 'store_page', 'app_details',
+                          'negative_cache', 'crawl_frontier'],
         'allowed-io': [],
-        'disable': ['too-many-instance-attributes', 'too-many-arguments', 'too-many-locals', 'too-many-branches',
-                    'forbidden-IO-function', 'too-many-nested-blocks'],
+        'disable': ['global-statement', 'too-many-instance-attributes', 'too-many-arguments', 'too-many-locals',
+                    'too-many-branches', 'forbidden-IO-function', 'too-many-nested-blocks'],
         'max-line-length': 120
     })
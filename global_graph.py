@@ -0,0 +1,306 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains a recommendation graph over many games that is built once, offline, and saved to a
+compressed NumPy file. Instead of crawling a network from a user's most played games, the games within
+a few recommendations of them are extracted from the graph, so a user only costs a lookup.
+
+The games are stored as columns and the edges in CSR form, as in SparseRecommendedGamesNetwork. Since the
+crawl gives every edge pointing to a game the same weight, the weights are stored once per game.
+
+Build a graph with: python global_graph.py seeds.txt graph.npz --num-games 5000 --checkpoint crawl.pkl
+where seeds.txt has one app id per line. If the build is stopped, running the same command again continues
+the crawl from the checkpoint.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Ahmed Hassini, Daniel Lee, Andy Zhang, Chris Oh
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+from typing import Optional
+import numpy as np
+from games_network import Game, RecommendedGamesNetwork, create_recommendation_network, get_game_data, \
+    resume_recommendation_network
+from compact_games import CompactGame, get_genre_vocabulary
+from sparse_network import SparseRecommendedGamesNetwork
+from tree_evaluation import WORD_SIZE
+
+# The number of recommendations followed from the user's games, and the most games extracted for a user
+NUM_HOPS = 2
+MAX_USER_GAMES = 50
+
+
+class GlobalGameGraph:
+    """A read-only recommendation graph, stored as arrays indexed by the position of each game.
+
+    Instance Attributes:
+    - app_ids: The app id of each game
+    - names: The name of each game
+    - prices: The price of each game
+    - ratings: The rating of each game
+    - release_dates: The release year of each game
+    - online: Whether each game has an online component
+    - multiplayer: Whether each game has a multiplayer option
+    - genre_words: The genre bitmasks, where genre_words[w, i] is word w of the bitmask of the game at index i
+    - extra_genres: The genres of each game that are not in the genre vocabulary, as a JSON list
+    - weights: The weight of the edges pointing to each game
+    - index_pointer: The edges of the game at index i are at index_pointer[i]:index_pointer[i + 1] of targets
+    - targets: The index of the game each edge points to
+
+    Representation Invariants:
+    - len(self.index_pointer) == len(self.app_ids) + 1
+    - all arrays of games have the same length as self.app_ids
+    """
+    app_ids: np.ndarray
+    names: np.ndarray
+    prices: np.ndarray
+    ratings: np.ndarray
+    release_dates: np.ndarray
+    online: np.ndarray
+    multiplayer: np.ndarray
+    genre_words: np.ndarray
+    extra_genres: np.ndarray
+    weights: np.ndarray
+    index_pointer: np.ndarray
+    targets: np.ndarray
+
+    # Private Instance Attributes
+    #   - _index: The index of each game. Keys: app id, Values: index of the game
+    _index: dict[int, int]
+
+    # The names of the arrays, as stored in a file
+    ARRAYS = ('app_ids', 'names', 'prices', 'ratings', 'release_dates', 'online', 'multiplayer', 'genre_words',
+              'extra_genres', 'weights', 'index_pointer', 'targets')
+
+    def __init__(self, arrays: dict[str, np.ndarray]) -> None:
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self._index = {app_id: index for index, app_id in enumerate(self.app_ids.tolist())}
+
+    @classmethod
+    def from_network(cls, network: RecommendedGamesNetwork) -> GlobalGameGraph:
+        """Return the graph of the games and edges of network.
+
+        >>> network = RecommendedGamesNetwork()
+        >>> portal = Game(400, 'Portal', {'Puzzle'}, 9.99, False, False, 1.0, 2007)
+        >>> portal_2 = Game(620, 'Portal 2', {'Puzzle'}, 12.99, True, True, 1.0, 2011)
+        >>> network.add_recommendation(portal, portal_2, 0.5)
+        >>> graph = GlobalGameGraph.from_network(network)
+        >>> [game.name for game in graph.get_recommendations(400)]
+        ['Portal 2']
+        """
+        vocabulary = get_genre_vocabulary()
+        games = sorted(network.get_games(), key=lambda g: g.app_id)
+        index = {game.app_id: i for i, game in enumerate(games)}
+
+        num_words = -(-len(vocabulary) // WORD_SIZE)
+        genre_words = np.zeros((num_words, len(games)), dtype=np.uint64)
+        extra_genres = []
+        for i, game in enumerate(games):
+            compact_game = CompactGame.from_game(game, vocabulary)
+            for word in range(num_words):
+                genre_words[word, i] = (compact_game.genre_bits >> (WORD_SIZE * word)) & ((1 << WORD_SIZE) - 1)
+            extra_genres.append(json.dumps(list(compact_game.extra_genres or ())))
+
+        edges = sorted((index[init_app_id], index[recommended_app_id], weight)
+                       for init_app_id, recommended_app_id, weight in network.get_edges())
+        sources = np.array([edge[0] for edge in edges], dtype=np.int64)
+        targets = np.array([edge[1] for edge in edges], dtype=np.int64)
+
+        # Every edge pointing to a game has the same weight, so the mean is that weight
+        in_degrees = np.bincount(targets, minlength=len(games))
+        in_weights = np.bincount(targets, weights=np.array([edge[2] for edge in edges], dtype=float),
+                                 minlength=len(games))
+        weights = np.divide(in_weights, in_degrees, out=np.zeros(len(games)), where=in_degrees > 0)
+
+        index_pointer = np.zeros(len(games) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(games)), out=index_pointer[1:])
+
+        return cls({
+            'app_ids': np.array([game.app_id for game in games], dtype=np.int64),
+            'names': np.array([game.name for game in games], dtype=str),
+            'prices': np.array([game.price for game in games], dtype=float),
+            'ratings': np.array([game.rating for game in games], dtype=float),
+            'release_dates': np.array([game.release_date for game in games], dtype=np.int64),
+            'online': np.array([game.online for game in games], dtype=bool),
+            'multiplayer': np.array([game.multiplayer for game in games], dtype=bool),
+            'genre_words': genre_words,
+            'extra_genres': np.array(extra_genres, dtype=str),
+            'weights': weights,
+            'index_pointer': index_pointer,
+            'targets': targets.astype(np.int32)
+        })
+
+    @classmethod
+    def load(cls, path: str) -> GlobalGameGraph:
+        """Return the graph saved at path by save."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in cls.ARRAYS})
+
+    def save(self, path: str) -> None:
+        """Save the graph to path as a compressed NumPy file."""
+        np.savez_compressed(path, **{name: getattr(self, name) for name in self.ARRAYS})
+
+    def __len__(self) -> int:
+        """Return the number of games in the graph."""
+        return len(self.app_ids)
+
+    def __contains__(self, app_id: int) -> bool:
+        """Return whether the game with the given app id is in the graph."""
+        return app_id in self._index
+
+    def get_game(self, app_id: int) -> Game:
+        """Return a new Game object with the data of the game with the given app id.
+
+        Raise a ValueError if the game is not in the graph.
+        """
+        if app_id not in self._index:
+            raise ValueError("Game app id not found in graph.")
+
+        index = self._index[app_id]
+        bitmask = 0
+        for word in reversed(self.genre_words.T[index].tolist()):
+            bitmask = (bitmask << WORD_SIZE) | word
+        genres = get_genre_vocabulary().decode(bitmask) | set(json.loads(str(self.extra_genres[index])))
+
+        return Game(app_id, str(self.names[index]), genres, float(self.prices[index]), bool(self.online[index]),
+                    bool(self.multiplayer[index]), float(self.ratings[index]), int(self.release_dates[index]))
+
+    def get_recommendations(self, app_id: int) -> list[Game]:
+        """Return new Game objects of the games recommended by the game with the given app id.
+
+        Raise a ValueError if the game is not in the graph.
+        """
+        if app_id not in self._index:
+            raise ValueError("Game app id not found in graph.")
+
+        index = self._index[app_id]
+        targets = self.targets[self.index_pointer[index]:self.index_pointer[index + 1]]
+        return [self.get_game(app_id) for app_id in self.app_ids[targets].tolist()]
+
+    def get_neighborhood(self, app_ids: list[int], num_hops: int = NUM_HOPS,
+                         max_games: Optional[int] = None) -> np.ndarray:
+        """Return the indices of the games that are at most num_hops recommendations away from the games with
+        the given app ids, in the order a breadth-first search from them reaches them.
+
+        app_ids that are not in the graph are ignored. If max_games is not None, the search stops once it has
+        reached max_games games.
+        """
+        frontier = np.array([self._index[app_id] for app_id in dict.fromkeys(app_ids) if app_id in self._index],
+                            dtype=np.int64)
+        reached = np.zeros(len(self), dtype=bool)
+        reached[frontier] = True
+        order = [frontier]
+
+        for _ in range(num_hops):
+            if len(frontier) == 0 or (max_games is not None and sum(map(len, order)) >= max_games):
+                break
+
+            neighbours = np.concatenate([self.targets[self.index_pointer[i]:self.index_pointer[i + 1]]
+                                         for i in frontier.tolist()] + [np.zeros(0, dtype=self.targets.dtype)])
+            # Keep the first time each new game is reached
+            neighbours, first = np.unique(neighbours, return_index=True)
+            neighbours = neighbours[np.argsort(first)]
+            frontier = neighbours[~reached[neighbours]].astype(np.int64)
+            reached[frontier] = True
+            order.append(frontier)
+
+        neighbourhood = np.concatenate(order)
+        return neighbourhood if max_games is None else neighbourhood[:max_games]
+
+    def extract_network(self, app_ids: list[int], num_hops: int = NUM_HOPS,
+                        max_games: Optional[int] = MAX_USER_GAMES) -> RecommendedGamesNetwork:
+        """Return a network of the games in the neighborhood of the games with the given app ids (see
+        get_neighborhood) and the edges between them, with the likeability of each game updated.
+
+        The weights are scaled so the weights of the games in the network add up to 1, as if the network had
+        been crawled on its own.
+        """
+        indices = self.get_neighborhood(app_ids, num_hops, max_games)
+        in_network = np.zeros(len(self), dtype=bool)
+        in_network[indices] = True
+
+        network = RecommendedGamesNetwork()
+        games = {}
+        for app_id in self.app_ids[indices].tolist():
+            games[app_id] = self.get_game(app_id)
+            network.add_game(games[app_id])
+
+        for index in indices.tolist():
+            targets = self.targets[self.index_pointer[index]:self.index_pointer[index + 1]]
+            for target in targets[in_network[targets]].tolist():
+                network.add_recommendation(games[int(self.app_ids[index])], games[int(self.app_ids[target])])
+
+        total_weight = float(self.weights[indices].sum())
+        if total_weight > 0:
+            network.update_edge_weights_by_target(
+                dict(zip(self.app_ids[indices].tolist(), (self.weights[indices] / total_weight).tolist())))
+        network.update_games_likeability()
+        return network
+
+
+def build_global_graph(seed_app_ids: list[int], num_games: int, max_concurrency: int = 16,
+                       checkpoint_path: Optional[str] = None) -> GlobalGameGraph:
+    """Return a graph of num_games games, crawled from the games with the given app ids.
+
+    If checkpoint_path is not None, the crawl is checkpointed there, and continued from there if the file exists.
+
+    Preconditions:
+    - num_games >= len(seed_app_ids)
+    """
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        return GlobalGameGraph.from_network(resume_recommendation_network(checkpoint_path, max_concurrency))
+
+    seed_games = {}
+    for app_id in seed_app_ids:
+        game = get_game_data(app_id)
+        if game is not None:
+            seed_games[app_id] = game
+
+    network = create_recommendation_network(seed_games, num_games, max_concurrency, SparseRecommendedGamesNetwork(),
+                                            checkpoint_path)
+    return GlobalGameGraph.from_network(network)
+
+
+def main() -> None:
+    """Build a graph with the seeds and size given by the command line arguments and save it."""
+    parser = argparse.ArgumentParser(description='Build a global recommendation graph from a file of app ids.')
+    parser.add_argument('seeds', help='a file with the app id of a seed game on each line')
+    parser.add_argument('graph', help='the file the graph is saved to')
+    parser.add_argument('--num-games', type=int, default=5000, help='the number of games in the graph')
+    parser.add_argument('--max-concurrency', type=int, default=16, help='the number of requests in flight at once')
+    parser.add_argument('--checkpoint', help='the file the crawl is checkpointed to and resumed from')
+    args = parser.parse_args()
+
+    with open(args.seeds, 'r') as file:
+        seed_app_ids = [int(line) for line in file if line.strip() != '']
+
+    graph = build_global_graph(seed_app_ids, args.num_games, args.max_concurrency, args.checkpoint)
+    graph.save(args.graph)
+    print(f"Saved a graph of {len(graph)} games and {len(graph.targets)} edges to {args.graph}")
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Check this module with: python global_graph.py --check
+    if sys.argv[1:] == ['--check']:
+        import python_ta
+        import python_ta.contracts
+
+        import doctest
+
+        doctest.testmod()
+
+        python_ta.check_all(config={
+            'extra-imports': ['sys', 'argparse', 'json', 'os', 'numpy', 'games_network', 'compact_games',
+                              'sparse_network', 'tree_evaluation'],
+            'allowed-io': ['main'],
+            'max-line-length': 120
+        })
+    else:
+        main()
@@ -0,0 +1,206 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the HTTP client shared by every request we make to Steam.
+All requests go through one session, so connections to each host are pooled and kept alive
+between requests instead of opening a new TCP/TLS connection for every request.
+All requests also go through one rate limiter, so we do not get blocked by Steam.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Andy Zhang, Daniel Lee, Ahmed Hassini, Chris Oh
+"""
+from __future__ import annotations
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterator, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from rate_limiter import RateLimiter, THROTTLE_STATUSES
+
+# The number of seconds to wait for a connection and for each read from the server
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 20.0
+
+# The number of times a failed request is retried, and the backoff factor between retries.
+# The n-th retry waits BACKOFF_FACTOR * 2 ** (n - 1) seconds.
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+# The number of hosts with a connection pool, and the number of connections kept alive per host
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+
+# The status codes that are retried
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# The rate limiter every request waits for
+RATE_LIMITER = RateLimiter()
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class SteamRequestError(requests.HTTPError):
+    """Raised when a request to Steam does not succeed, even after retrying it, or its response cannot be read."""
+
+
+def get(url: str, params: Optional[dict] = None, stream: bool = False) -> requests.Response:
+    """Send a GET request to url with the given query params using the shared session and return the response.
+
+    Every request waits for RATE_LIMITER first. Throttled (429/503) and server error responses are retried
+    up to MAX_RETRIES times, and throttled responses slow down the rate of requests to their host.
+    Raise a SteamRequestError if the final response does not have a successful status code, or if the request
+    could not be sent, like when the connection fails or times out after the session's retries.
+
+    If stream is True, the body is not downloaded until it is read from the response.
+    The caller must then close the response so that the connection goes back to the pool.
+    """
+    host = urlsplit(url).hostname
+    session = get_session()
+
+    response = _send(session, host, url, params, stream)
+    attempt = 0
+    while response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+        response.close()
+        # Throttled responses pause the host in RATE_LIMITER, so only back off here for other server errors
+        if response.status_code not in THROTTLE_STATUSES:
+            time.sleep(BACKOFF_FACTOR * 2 ** attempt)
+        attempt += 1
+        response = _send(session, host, url, params, stream)
+
+    if not response.ok:
+        response.close()
+        raise SteamRequestError(f'{response.status_code} response from {response.url}', response=response)
+
+    return response
+
+
+def get_json(url: str, params: Optional[dict] = None) -> Any:
+    """Send a GET request to url with the given query params like get and return its JSON body.
+
+    Raise a SteamRequestError if the request does not succeed, or if its body is not JSON, like an error page
+    served with a successful status code.
+    """
+    response = get(url, params)
+    try:
+        return response.json()
+    except ValueError as error:
+        raise SteamRequestError(f'{response.status_code} response from {response.url} is not JSON',
+                                response=response) from error
+
+
+def iter_content(response: requests.Response, chunk_size: int) -> Iterator[bytes]:
+    """Yield the body of a response returned by get with stream=True, chunk_size bytes at a time.
+    Raise a SteamRequestError if the connection fails or times out while the body is read.
+    """
+    try:
+        yield from response.iter_content(chunk_size)
+    except requests.RequestException as error:
+        raise SteamRequestError(f'Reading the response from {response.url} failed: {error}',
+                                response=response) from error
+
+
+def _send(session: requests.Session, host: str, url: str, params: Optional[dict], stream: bool) -> requests.Response:
+    """Helper function for get.
+    Wait for RATE_LIMITER, send one GET request with session and record its response in RATE_LIMITER.
+    """
+    RATE_LIMITER.acquire(host)
+    try:
+        response = session.get(url, params=params, stream=stream, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    except requests.RequestException as error:
+        # The session has already retried connection errors, so the request has failed
+        raise SteamRequestError(f'Request to {url} failed: {error}') from error
+    RATE_LIMITER.record_response(host, response.status_code, _parse_retry_after(response))
+    return response
+
+
+def get_session() -> requests.Session:
+    """Return the shared session, creating it if it does not exist yet."""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+        return _session
+
+
+def configure(**settings: Any) -> None:
+    """Change the settings of the HTTP client and recreate the shared session with them.
+
+    The settings are the keyword arguments connect_timeout, read_timeout, max_retries, backoff_factor,
+    pool_connections and pool_maxsize.
+
+    >>> configure(read_timeout=30.0, max_retries=5)
+    >>> get_session().adapters['https://'].max_retries.total
+    5
+    >>> configure(read_timeout=20.0, max_retries=3)
+    """
+    global _session
+
+    for setting, value in settings.items():
+        if setting.upper() not in {'CONNECT_TIMEOUT', 'READ_TIMEOUT', 'MAX_RETRIES', 'BACKOFF_FACTOR',
+                                   'POOL_CONNECTIONS', 'POOL_MAXSIZE'}:
+            raise ValueError(f'Unknown HTTP client setting: {setting}')
+        globals()[setting.upper()] = value
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _parse_retry_after(response: requests.Response) -> Optional[float]:
+    """Return the number of seconds asked for by the Retry-After header of response,
+    or None if it does not have a valid one.
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is None:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _create_session() -> requests.Session:
+    """Return a new session with connection pooling, keep-alive, gzip and retries with backoff on connection
+    errors. Retries based on the status code are done by get, so that RATE_LIMITER sees every response.
+    """
+    retry = Retry(total=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR, status_forcelist=(),
+                  allowed_methods=frozenset({'GET'}), respect_retry_after_header=False, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+    return session
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['threading', 'time', 'datetime', 'email.utils', 'urllib.parse', 'requests',
+                          'requests.adapters', 'urllib3.util.retry', 'rate_limiter'],
+        'allowed-io': [],
+        'disable': ['global-statement'],
+        'max-line-length': 120
+    })
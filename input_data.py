@@ -12,7 +12,7 @@ This file is Copyright (c) 2023 Daniel Lee, Andy Zhang, Chris Oh, Ahmed Hassini
 from __future__ import annotations
 from tkinter import *
 from tkinter import messagebox
-import requests
+from scrape_app_ids import convert_to_64bit
 
 
 def run_tkinter(profile_id: list) -> None:
@@ -80,25 +80,6 @@ def store_data(profile_id: list, input_pf: Entry, r: IntVar, root: Tk) -> None:
     root.destroy()
 
 
-def convert_to_64bit(profile_id: str) -> int:
-    """Helper function for scrape_app_ids().
-    Given a custom SteamID, this function returns the 64-bit representation of the SteamID.
-
-    Preconditions:
-        - profile_id is a custom SteamID
-
-    >>> convert_to_64bit('star_19642')
-    76561199000093113
-    """
-    url = 'http://api.steampowered.com/ISteamUser/ResolveVanityURL/v0001/'
-    params = {
-        'key': '4957E3F30616447A483A7DBA9F26172E',
-        'vanityurl': profile_id
-    }
-    response = requests.get(url, params).json()
-    return int(response['response']['steamid'])
-
-
 if __name__ == '__main__':
     import python_ta
     import python_ta.contracts
@@ -108,7 +89,7 @@ if __name__ == '__main__':
     doctest.testmod()
 
     python_ta.check_all(config={
-        'extra-imports': ['tkinter', 'requests'],
+        'extra-imports': ['tkinter', 'scrape_app_ids'],
         'allowed-io': [],
         'disable': ['wildcard-import'],
         'max-line-length': 120
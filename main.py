@@ -8,7 +8,7 @@ This file is Copyright (c) 2023 Chris Oh, Ahmed Hassini, Andy Zhang, Daniel Lee
 """
 
 from input_data import run_tkinter
-from scrape_app_ids import scrape_app_ids
+from scrape_app_ids import scrape_app_ids, scrape_owned_app_ids
 from decision_tree import *
 
 
@@ -21,12 +21,12 @@ if __name__ == '__main__':
 
     app_id_to_game = {app_id: get_game_data(app_id) for app_id in game_app_ids_user}
 
-    # This function will take some time (up to 2 minutes).
-    network = create_recommendation_network(app_id_to_game)
+    # This function will take some time, the crawl keeps up to 16 requests in flight at once.
+    network = create_recommendation_network(app_id_to_game, max_concurrency=16)
 
     displaying_questions()
 
-    top_games = display_decision_tree(network.get_games(), scrape_app_ids_all(profile_id[0]))
+    top_games = display_decision_tree(network.get_games(), scrape_owned_app_ids(profile_id[0]))
 
     # This may also take a few seconds.
     displaying_results(top_games)
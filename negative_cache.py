@@ -0,0 +1,72 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains a cache of the lookups to Steam that found nothing, like the owned games of profiles
+with hidden game details or no games and the store pages of app ids that are not games, so that they are not
+requested again by every crawl that meets them.
+
+A miss is remembered for a shorter time than the data kept by the other caches, since a profile can be made
+public or buy a game and a store page can be fixed.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Chris Oh, Daniel Lee, Andy Zhang, Ahmed Hassini
+"""
+from __future__ import annotations
+from typing import Optional
+from timed_cache import TimedCache
+
+
+class NegativeCache(TimedCache):
+    """A set of keys whose lookups found nothing, with a memory tier and an optional SQLite tier.
+
+    Each key expires ttl seconds after it was added. See TimedCache for the meaning of the other arguments.
+    Only the keys are stored, so the value of every entry is True.
+
+    >>> cache = NegativeCache()
+    >>> cache.add(76561197960287930)
+    >>> 76561197960287930 in cache
+    True
+    >>> '76561197960287930' in cache
+    True
+    >>> 76561199000093113 in cache
+    False
+    >>> (cache.hits, cache.misses)
+    (2, 1)
+    """
+    TABLE = 'negative_results'
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 6 * 60 * 60, max_entries: int = 100000) -> None:
+        super().__init__(path, ttl, max_entries)
+
+    def __contains__(self, key: int | str) -> bool:
+        """Return whether the lookup of key found nothing within the last ttl seconds."""
+        return self.get(key) is not None
+
+    def add(self, key: int | str) -> None:
+        """Remember that the lookup of key found nothing."""
+        self.put(key, True)
+
+    def _encode(self, value: bool) -> str:
+        """Return the empty string, since only the keys are stored."""
+        return ''
+
+    def _decode(self, text: str) -> bool:
+        """Return True, the value of every key."""
+        return True
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['timed_cache'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
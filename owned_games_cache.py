@@ -0,0 +1,60 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains a cache for the owned games of Steam users, keyed by steam id, so that each user's
+GetOwnedGames response is only requested once while it is fresh. Only the app ids of the games and the
+playtimes of the most played games are kept, in the form returned by scrape_app_ids.get_owned_games, so an entry
+stays small even for a library of tens of thousands of games.
+
+The cache keeps the most recently used responses in memory. It can also store every response in a SQLite
+database, so that the responses are shared between runs of the program and between processes.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Ahmed Hassini, Chris Oh, Daniel Lee, Andy Zhang
+"""
+from __future__ import annotations
+import json
+from typing import Optional
+from timed_cache import TimedCache
+
+
+class OwnedGamesCache(TimedCache):
+    """A cache of the owned games of users keyed by steam id, with a memory tier and an optional SQLite tier.
+
+    Each entry expires ttl seconds after it was fetched. See TimedCache for the meaning of the other arguments.
+
+    >>> cache = OwnedGamesCache(max_entries=1)
+    >>> cache.put('76561199000093113', {'app_ids': [400, 620], 'top_games': [[400, 60], [620, 5]]})
+    >>> cache.get('76561199000093113')
+    {'app_ids': [400, 620], 'top_games': [[400, 60], [620, 5]]}
+    >>> cache.put('76561197960287930', {'app_ids': [730], 'top_games': [[730, 0]]})
+    >>> cache.get('76561199000093113') is None
+    True
+    >>> (cache.hits, cache.misses)
+    (1, 1)
+    """
+    TABLE = 'owned_games'
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 24 * 60 * 60, max_entries: int = 10000) -> None:
+        super().__init__(path, ttl, max_entries)
+
+    def _encode(self, value: dict) -> str:
+        """Return owned games as compact JSON, since a user can own thousands of games."""
+        return json.dumps(value, separators=(',', ':'))
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['json', 'timed_cache'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
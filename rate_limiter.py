@@ -0,0 +1,225 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains an adaptive per-host rate limiter for the requests we make to Steam.
+Each host gets a token bucket whose rate goes up slowly while requests succeed and is cut in half
+whenever Steam throttles us, so we run close to the highest request rate Steam lets us sustain.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Chris Oh, Ahmed Hassini, Andy Zhang, Daniel Lee
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# The status codes Steam uses to tell us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """A token bucket that allows on average rate requests per second, with bursts of up to capacity requests.
+
+    The rate adapts to the responses recorded with record_response: every successful response increases it
+    by increase_step (up to max_rate) and every throttled response halves it (down to min_rate) and pauses
+    the bucket, either for the time asked by the server or for an exponentially growing backoff.
+
+    Instance Attributes:
+    - rate: The current number of requests allowed per second
+    - min_rate: The lowest rate the bucket slows down to
+    - max_rate: The highest rate the bucket speeds up to
+    - capacity: The maximum number of requests that can be sent in a burst
+    - increase_step: The amount the rate goes up by after each successful response
+    - num_throttled: The number of throttled responses recorded
+
+    Representation Invariants:
+    - 0 < self.min_rate <= self.rate <= self.max_rate
+    - self.capacity >= 1
+    - self.increase_step >= 0
+    - self.num_throttled >= 0
+    """
+    rate: float
+    min_rate: float
+    max_rate: float
+    capacity: float
+    increase_step: float
+    num_throttled: int
+
+    # Private Instance Attributes
+    #   - _tokens: The number of tokens in the bucket. It is negative when requests are waiting for tokens.
+    #   - _last_refill: The time the bucket was last refilled
+    #   - _paused_until: The time before which no request may be sent
+    #   - _consecutive_throttles: The number of throttled responses since the last successful one
+    #   - _completed: The times of the responses recorded in the last THROUGHPUT_WINDOW seconds
+    #   - _lock: A lock so that the bucket can be shared by the threads of a concurrent crawl
+    _tokens: float
+    _last_refill: float
+    _paused_until: float
+    _consecutive_throttles: int
+    _completed: deque[float]
+    _lock: threading.Lock
+
+    # The number of seconds over which the throughput is measured
+    THROUGHPUT_WINDOW = 10.0
+
+    # The pause after the first throttled response without a Retry-After header.
+    # The pause doubles for each consecutive throttled response, and no pause is longer than MAX_PAUSE,
+    # even one asked for by a Retry-After header.
+    BASE_PAUSE = 1.0
+    MAX_PAUSE = 60.0
+
+    def __init__(self, rate: float, min_rate: float = 0.2, max_rate: float = 20.0, capacity: float = 5.0,
+                 increase_step: float = 0.05) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.capacity = capacity
+        self.increase_step = increase_step
+        self.num_throttled = 0
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_throttles = 0
+        self._completed = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Wait until a request may be sent and take a token for it.
+        Return the number of seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now > self._last_refill:
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+
+            # Reserve a token now, so that waiting threads are served in the order they arrived.
+            # No tokens are added while the bucket is paused, so the k-th waiter waits for the pause to end
+            # and then for k more tokens.
+            self._tokens -= 1
+            wait = max(self._paused_until - now, 0.0)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_response(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        """Adapt the rate of this bucket to a response with the given status code.
+
+        retry_after is the number of seconds given by the response's Retry-After header, if it had one.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._completed.append(now)
+
+            if status_code in THROTTLE_STATUSES:
+                self.num_throttled += 1
+                self._consecutive_throttles += 1
+                self.rate = max(self.min_rate, self.rate / 2)
+
+                if retry_after is None:
+                    retry_after = self.BASE_PAUSE * 2 ** (self._consecutive_throttles - 1)
+                # A large Retry-After would stall every request to the host, so it is capped like the backoff
+                retry_after = min(self.MAX_PAUSE, retry_after)
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+                # Drop any burst that built up, so requests resume at the new rate
+                self._tokens = min(self._tokens, 0.0)
+                self._last_refill = max(now, self._paused_until)
+            elif status_code < 400:
+                self._consecutive_throttles = 0
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def throughput(self) -> float:
+        """Return the number of responses per second recorded over the last THROUGHPUT_WINDOW seconds."""
+        with self._lock:
+            cutoff = time.monotonic() - self.THROUGHPUT_WINDOW
+            while len(self._completed) > 0 and self._completed[0] < cutoff:
+                self._completed.popleft()
+            return len(self._completed) / self.THROUGHPUT_WINDOW
+
+
+class RateLimiter:
+    """A collection of token buckets, one for each host we send requests to.
+
+    Instance Attributes:
+    - initial_rate: The rate of the bucket of a host we have not sent requests to yet
+    - min_rate: The lowest rate of every bucket
+    - max_rate: The highest rate of every bucket
+
+    Representation Invariants:
+    - 0 < self.min_rate <= self.initial_rate <= self.max_rate
+
+    >>> limiter = RateLimiter(initial_rate=4.0)
+    >>> limiter.record_response('store.steampowered.com', 429, retry_after=0.0)
+    >>> limiter.get_bucket('store.steampowered.com').rate
+    2.0
+    """
+    initial_rate: float
+    min_rate: float
+    max_rate: float
+
+    # Private Instance Attributes
+    #   - _buckets: The token bucket of each host. Keys: host name, Values: its token bucket
+    #   - _lock: A lock for creating buckets from several threads
+    _buckets: dict[str, TokenBucket]
+    _lock: threading.Lock
+
+    def __init__(self, initial_rate: float = 5.0, min_rate: float = 0.2, max_rate: float = 20.0) -> None:
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get_bucket(self, host: str) -> TokenBucket:
+        """Return the token bucket of host, creating it if it does not exist yet."""
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.initial_rate, self.min_rate, self.max_rate)
+            return self._buckets[host]
+
+    def acquire(self, host: str) -> float:
+        """Wait until a request may be sent to host. Return the number of seconds waited."""
+        return self.get_bucket(host).acquire()
+
+    def record_response(self, host: str, status_code: int, retry_after: Optional[float] = None) -> None:
+        """Adapt the rate of host to a response with the given status code and Retry-After seconds."""
+        self.get_bucket(host).record_response(status_code, retry_after)
+
+    def throughput(self, host: Optional[str] = None) -> float:
+        """Return the current number of responses per second from host, or from all hosts if host is None."""
+        if host is not None:
+            return self.get_bucket(host).throughput()
+
+        with self._lock:
+            buckets = list(self._buckets.values())
+        return sum(bucket.throughput() for bucket in buckets)
+
+    def get_stats(self) -> dict[str, tuple[float, float, int]]:
+        """Return a dictionary mapping each host to its current rate, throughput and number of throttled
+        responses.
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: (bucket.rate, bucket.throughput(), bucket.num_throttled) for host, bucket in buckets.items()}
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['threading', 'time', 'collections'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
@@ -0,0 +1,142 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the recommendation pipeline of main.py without any windows, so that recommendations
+can be computed for users that are not sitting in front of the program.
+
+The user's answers and ranking of the questions are given as arguments instead of through displaying_questions,
+and the decision tree is evaluated with tree_evaluation instead of display_decision_tree.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Chris Oh, Daniel Lee, Ahmed Hassini, Andy Zhang
+"""
+from __future__ import annotations
+from typing import Any
+from games_network import Game, create_recommendation_network, get_game_data
+from scrape_app_ids import scrape_app_ids, scrape_owned_app_ids, convert_to_64bit
+from tree_evaluation import GameColumns, get_order_of_games, rank_top_games, get_game_score
+from global_graph import GlobalGameGraph, NUM_HOPS
+
+# The questions of the decision tree, in the order displaying_questions asks them
+QUESTIONS = ("Genre", "Price", "Date", "Online", "Multiplayer")
+
+# The number of the user's most played games the crawl starts from, like main.py
+NUM_SEED_GAMES = 6
+
+
+def resolve_profile_id(profile: int | str) -> int:
+    """Return the 64-bit steam id of profile, which is either a 64-bit steam id or a custom (vanity) profile name.
+
+    >>> resolve_profile_id('76561199000093113')
+    76561199000093113
+    """
+    if isinstance(profile, int) or (len(profile) == 17 and profile.isnumeric()):
+        return int(profile)
+    return convert_to_64bit(profile)
+
+
+def get_questions_to_answers(answers: dict[str, Any], ranking: list[str]) -> list[tuple[str, Any]]:
+    """Return the answers to the questions in the form of decision_tree.QUESTIONS_TO_ANSWERS, given the answer
+    to each question and the questions from the highest ranked to the lowest.
+
+    Genres can be given in any case and as a list, like in a JSON file.
+
+    Raise a ValueError if ranking is not an order of QUESTIONS, or a question has no answer.
+
+    >>> get_questions_to_answers({'Genre': ['Puzzle'], 'Price': 10, 'Date': 2011, 'Online': True,
+    ...                           'Multiplayer': False}, ['Price', 'Genre', 'Date', 'Online', 'Multiplayer'])
+    [('Price', 10), ('Genre', {'puzzle'}), ('Date', 2011), ('Online', True), ('Multiplayer', False)]
+    """
+    if sorted(ranking) != sorted(QUESTIONS):
+        raise ValueError(f"The ranking must contain each of {', '.join(QUESTIONS)} once.")
+
+    questions_to_answers = []
+    for question in ranking:
+        if question not in answers:
+            raise ValueError(f"There is no answer to the {question} question.")
+
+        if question == "Genre":
+            questions_to_answers.append((question, {genre.lower() for genre in answers[question]}))
+        else:
+            questions_to_answers.append((question, answers[question]))
+
+    return questions_to_answers
+
+
+def recommend(profile_id: int, questions_to_answers: list[tuple[str, Any]], k: int = 5,
+              max_concurrency: int = 16, verbose: bool = True) -> list[tuple[Game, int]]:
+    """Return the top k recommended games of the user with the given steam id and their order, from the
+    highest score to the lowest, given the user's answers to the questions.
+
+    This runs the same steps as main.py: crawl a network from the user's most played games, leave out the
+    games the user already owns, put the rest in the leaves of the decision tree and rank them.
+    The completeness of the crawl is printed as it goes if verbose is True.
+    """
+    network = create_recommendation_network(get_seed_games(profile_id), max_concurrency=max_concurrency,
+                                            verbose=verbose)
+    columns = GameColumns.from_games(list(network.get_games()))
+    return rank_games(columns, scrape_owned_app_ids(profile_id), questions_to_answers, k)
+
+
+def recommend_from_graph(graph: GlobalGameGraph, profile_id: int, questions_to_answers: list[tuple[str, Any]],
+                         k: int = 5, num_hops: int = NUM_HOPS) -> list[tuple[Game, int]]:
+    """Return the top k recommended games of the user with the given steam id and their order, like recommend,
+    but with a network extracted from graph instead of crawled from Steam.
+
+    The network is made of the games at most num_hops recommendations away from the user's most played games.
+    """
+    network = graph.extract_network(scrape_app_ids(profile_id, NUM_SEED_GAMES), num_hops)
+    columns = GameColumns.from_games(list(network.get_games()))
+    return rank_games(columns, scrape_owned_app_ids(profile_id), questions_to_answers, k)
+
+
+def get_seed_games(profile_id: int) -> dict[int, Game]:
+    """Return the most played games of the user with the given steam id that the crawl starts from,
+    mapped from their app ids, in order of playtime.
+    """
+    app_id_to_game = {}
+    for app_id in scrape_app_ids(profile_id, NUM_SEED_GAMES):
+        game = get_game_data(app_id)
+        if game is not None:
+            app_id_to_game[app_id] = game
+    return app_id_to_game
+
+
+def rank_games(columns: GameColumns, user_app_ids: set[int], questions_to_answers: list[tuple[str, Any]],
+               k: int = 5) -> list[tuple[Game, int]]:
+    """Return the top k games of columns whose app ids are not in user_app_ids and their order, from the highest
+    score to the lowest, given the user's answers to the questions.
+    """
+    return rank_top_games(get_order_of_games(columns, questions_to_answers, user_app_ids), k)
+
+
+def game_to_json(game: Game, order: int) -> dict[str, Any]:
+    """Return the data of a recommended game and its order as a dictionary that can be written as JSON."""
+    return {
+        'app_id': game.app_id,
+        'name': game.name,
+        'price': game.price,
+        'release_date': game.release_date,
+        'online': game.online,
+        'multiplayer': game.multiplayer,
+        'likeability': game.likeability,
+        'order': order,
+        'score': get_game_score(game, order)
+    }
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['games_network', 'scrape_app_ids', 'tree_evaluation', 'global_graph'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
@@ -4,17 +4,55 @@ Module Description
 ===============================
 This module contains necessary code to scrape the app ids given a user's profile id.
 
+The GetOwnedGames response of a collector can list tens of thousands of games. It is parsed while it is
+downloaded, one game at a time, and only the app ids of the games and the playtimes of the most played games
+are kept, which is also the form in which the owned games are cached.
+
 Copyright and Usage Information
 ===============================
 This file is Copyright (c) 2023 Andy Zhang, Daniel Lee, Ahmed Hassini, Chris Oh
 """
 
-import requests
+import codecs
+import heapq
+import json
+import re
+from typing import Iterable, Iterator, Optional
+import http_client
+from owned_games_cache import OwnedGamesCache
+from negative_cache import NegativeCache
+
+# The endpoints used for the owned games of a user and the steam id of a custom profile name.
+# They can be changed to point to a local fake of Steam.
+OWNED_GAMES_URL = 'http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/'
+RESOLVE_VANITY_URL = 'http://api.steampowered.com/ISteamUser/ResolveVanityURL/v0001/'
+
+# The cache checked by get_owned_games before requesting the owned games of a user, shared by the functions below
+# and games_network.scrape_app_ids_all. Give it a path to keep the responses between runs, or set it to None
+# to always send the request.
+OWNED_GAMES_CACHE: Optional[OwnedGamesCache] = OwnedGamesCache()
+
+# The steam ids with no owned games in their GetOwnedGames response, which are not requested again until they
+# expire. These are the users who hide their game details and the users who own no games, which Steam does not
+# always tell apart. Set it to None to always send the request.
+EMPTY_PROFILES: Optional[NegativeCache] = NegativeCache()
+
+# The number of most played games kept in OWNED_GAMES_CACHE for each user, along with the app ids of all their
+# games. A user's games are requested again if more of their most played games are needed.
+NUM_CACHED_TOP_GAMES = 20
+
+# Whether GetOwnedGames responses are parsed while they are downloaded, and the number of bytes read from the
+# connection at a time
+STREAM_OWNED_GAMES = True
+OWNED_GAMES_CHUNK_SIZE = 16 * 1024
+
+# The whitespace and commas between the games of the games array
+_SEPARATORS = re.compile(r'[\s,]*')
 
 
 def scrape_app_ids(profile_id: int, n: int) -> list[int]:
     """Returns a list of the user's n most played games (in minutes).
-    Return an empty list if the user has hidden game details.
+    Return an empty list if the user has hidden game details or owns no games.
     If the user has less than n games, return all the games they have.
 
     Preconditions:
@@ -31,32 +69,198 @@ def scrape_app_ids(profile_id: int, n: int) -> list[int]:
         'steamid': str(profile_id),
         'format': 'json'
     }
-    json_response = get_json_response(params)
+    owned_games = get_owned_games(params, n)
 
-    if not json_response:
+    if not owned_games:
         return []
 
-    games = json_response['games']
-    games_by_playtime = sorted(games, key=lambda g: g['playtime_forever'], reverse=True)
+    return [app_id for app_id, _ in owned_games['top_games'][:n]]
+
+
+def scrape_owned_app_ids(profile_id: int) -> set[int]:
+    """Returns the set of app ids of every game the user owns, from a single GetOwnedGames response.
+    Return an empty set if the user has hidden game details.
+
+    Unlike games_network.scrape_app_ids_all, this does not fetch the data of each game, so it is the
+    fast way to leave the user's games out of the recommendations.
+
+    Preconditions:
+        - len(profile_id) == 17
+
+    >>> 252950 in scrape_owned_app_ids(76561199000093113)
+    True
+    """
+    params = {
+        'key': '4957E3F30616447A483A7DBA9F26172E',
+        'steamid': str(profile_id),
+        'format': 'json'
+    }
+    owned_games = get_owned_games(params)
+
+    if not owned_games:
+        return set()
+
+    return set(owned_games['app_ids'])
+
+
+def get_owned_games(params: dict, n: int = NUM_CACHED_TOP_GAMES) -> dict[str, list]:
+    """Helper function for scrape_app_ids() and scrape_owned_app_ids().
+    Returns the owned games of the user given params in the compact form kept by OWNED_GAMES_CACHE:
+    'app_ids' is the app ids of every game they own, in the order of the response, and 'top_games' is
+    [app id, playtime] for at least their n most played games, or every game if they own fewer,
+    from the most played to the least.
+    Returns an empty dictionary if the user has hidden game details or owns no games.
+
+    Preconditions:
+        - 'key' in params
+        - 'steamid' in params and len(params['steamid']) == 17
+        - params['format'] == 'json'
+        - n > 0
+    """
+    if is_empty_profile(params['steamid']):
+        return {}
+
+    if OWNED_GAMES_CACHE is not None:
+        cached_games = OWNED_GAMES_CACHE.get(params['steamid'])
+        # A cached entry is used unless it has fewer than the n most played games of a larger library
+        if cached_games is not None and (n <= len(cached_games['top_games'])
+                                         or len(cached_games['top_games']) == len(cached_games['app_ids'])):
+            return cached_games
 
-    if len(games_by_playtime) < n:
-        return [game['appid'] for game in games_by_playtime]
+    if STREAM_OWNED_GAMES:
+        games = stream_owned_games(params)
     else:
-        return [games_by_playtime[i]['appid'] for i in range(n)]
+        json_response = http_client.get_json(OWNED_GAMES_URL, params)['response']
+        games = ((game['appid'], game.get('playtime_forever', 0)) for game in json_response.get('games', []))
+    owned_games = summarize_owned_games(games, max(n, NUM_CACHED_TOP_GAMES))
+
+    if not owned_games:
+        if EMPTY_PROFILES is not None:
+            EMPTY_PROFILES.add(params['steamid'])
+    elif OWNED_GAMES_CACHE is not None:
+        OWNED_GAMES_CACHE.put(params['steamid'], owned_games)
+    return owned_games
+
+
+def summarize_owned_games(games: Iterable[tuple[int, int]], n: int) -> dict[str, list]:
+    """Return the owned games with the given app ids and playtimes in the form returned by get_owned_games,
+    keeping the n most played games. Only the n most played games seen so far are kept while games is read.
+
+    Games with the same playtime stay in the order of games, like with a stable sort.
+
+    >>> summarize_owned_games([(400, 60), (620, 5), (730, 60), (570, 90)], 2)
+    {'app_ids': [400, 620, 730, 570], 'top_games': [[570, 90], [400, 60]]}
+    >>> summarize_owned_games([], 2)
+    {}
+    """
+    app_ids = []
+
+    def record_app_ids() -> Iterator[tuple[int, int]]:
+        """Yield each game of games, recording its app id."""
+        for game in games:
+            app_ids.append(game[0])
+            yield game
 
+    top_games = heapq.nlargest(n, record_app_ids(), key=lambda game: game[1])
+    if not app_ids:
+        return {}
+    return {'app_ids': app_ids, 'top_games': [[app_id, playtime] for app_id, playtime in top_games]}
 
-def get_json_response(params: dict) -> requests.models.Response.json:
+
+def is_empty_profile(profile_id: int | str) -> bool:
+    """Return whether the user with the given steam id was recently found to have no owned games, because they
+    hide their game details or own no games, according to EMPTY_PROFILES.
+    """
+    return EMPTY_PROFILES is not None and profile_id in EMPTY_PROFILES
+
+
+def stream_owned_games(params: dict) -> Iterator[tuple[int, int]]:
     """Helper function for scrape_app_ids().
-    Returns the JSON response of the games list page given params.
+    Yields the app id and playtime (in minutes) of each game in the games list page given params,
+    while the page is downloaded. Yields nothing if the user has hidden game details.
 
     Preconditions:
         - 'key' in params
         - 'steamid' in params and len(params['steamid']) == 17
         - params['format'] == 'json'
     """
-    url = 'http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/'
-    response = requests.get(url, params)
-    return response.json()['response']
+    response = http_client.get(OWNED_GAMES_URL, params, stream=True)
+    try:
+        yield from parse_owned_games_stream(http_client.iter_content(response, OWNED_GAMES_CHUNK_SIZE))
+    finally:
+        response.close()
+
+
+def parse_owned_games_stream(chunks: Iterable[bytes]) -> Iterator[tuple[int, int]]:
+    """Yields the app id and playtime of each game in the GetOwnedGames response made of the given chunks,
+    as soon as the chunks containing the game have been read.
+
+    Only one game is decoded at a time, so the whole response is never held in memory.
+
+    >>> chunks = [b'{"response": {"game_count": 2, "games": [{"appid": 400, "playtime_for',
+    ...           b'ever": 60}, {"appid": 620, "playtime_forever": 5', b'}]}}']
+    >>> list(parse_owned_games_stream(chunks))
+    [(400, 60), (620, 5)]
+    >>> list(parse_owned_games_stream([b'{"response": {}}']))
+    []
+    """
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    json_decoder = json.JSONDecoder()
+    buffer = ''
+    in_games = False
+
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+
+        if not in_games:
+            # Skip to the start of the games array
+            start = buffer.find('"games"')
+            bracket = buffer.find('[', start) if start != -1 else -1
+            if bracket == -1:
+                continue
+            buffer = buffer[bracket + 1:]
+            in_games = True
+
+        position = _SEPARATORS.match(buffer).end()
+        end = buffer.rfind('}') + 1
+        try:
+            # Decode every complete game in the buffer at once, which is much faster than one at a time
+            games = json.loads('[' + buffer[position:end] + ']') if end > position else []
+            position = end
+        except json.JSONDecodeError:
+            # The buffer ends the games array, so decode the games one at a time up to its end
+            games = []
+            while not buffer.startswith(']', position):
+                try:
+                    game, position = json_decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    break
+                games.append(game)
+                position = _SEPARATORS.match(buffer, position).end()
+
+        for game in games:
+            yield game['appid'], game.get('playtime_forever', 0)
+        if buffer.startswith(']', position):
+            return
+        buffer = buffer[position:]
+
+
+def convert_to_64bit(profile_id: str) -> int:
+    """Helper function for scrape_app_ids().
+    Given a custom SteamID, this function returns the 64-bit representation of the SteamID.
+
+    Preconditions:
+        - profile_id is a custom SteamID
+
+    >>> convert_to_64bit('star_19642')
+    76561199000093113
+    """
+    params = {
+        'key': '4957E3F30616447A483A7DBA9F26172E',
+        'vanityurl': profile_id
+    }
+    response = http_client.get_json(RESOLVE_VANITY_URL, params)
+    return int(response['response']['steamid'])
 
 
 if __name__ == '__main__':
@@ -68,7 +272,8 @@ if __name__ == '__main__':
     doctest.testmod()
 
     python_ta.check_all(config={
-        'extra-imports': ['requests'],
+        'extra-imports': ['codecs', 'heapq', 'json', 're', 'typing', 'http_client', 'owned_games_cache',
+                          'negative_cache'],
         'allowed-io': [],
         'max-line-length': 120
     })
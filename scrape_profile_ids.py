@@ -10,6 +10,11 @@ Copyright and Usage Information
 This file is Copyright (c) 2023 Andy Zhang, Daniel Lee, Ahmed Hassini, Chris Oh
 """
 import requests
+import http_client
+
+# The endpoint used for the reviews of a game, followed by its app id.
+# It can be changed to point to a local fake of Steam.
+REVIEWS_URL = 'https://store.steampowered.com/appreviews/'
 
 
 def scrape_profile_ids(app_id: int, n: int) -> list[int]:
@@ -51,10 +56,7 @@ def get_json_response(app_id: int, params: dict) -> requests.models.Response.jso
     Preconditions:
         - app_id corresponds to a game on Steam
     """
-    url = 'https://store.steampowered.com/appreviews/'
-    response = requests.get(url + str(app_id), params)
-
-    return response.json()
+    return http_client.get_json(REVIEWS_URL + str(app_id), params)
 
 
 if __name__ == '__main__':
@@ -66,7 +68,7 @@ if __name__ == '__main__':
     doctest.testmod()
 
     python_ta.check_all(config={
-        'extra-imports': ['requests'],  # the names (strs) of imported modules
+        'extra-imports': ['requests', 'http_client'],  # the names (strs) of imported modules
         'allowed-io': [],  # the names (strs) of functions that call print/open/input
         'max-line-length': 120
     })
@@ -0,0 +1,325 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module runs the recommendation pipeline as a local HTTP service that answers JSON requests, so that
+the crawled networks and the caches stay in memory between users instead of being rebuilt by every run of
+main.py.
+
+The service has two endpoints:
+    - GET /health returns the number of resident networks and the hit rates of the caches.
+    - POST /recommend takes a job in the format of batch.py, without an id, and returns the profile id and
+      the top games of the user. It answers an invalid job with 400, a failed request to Steam with 502 and
+      any other error with 500.
+
+The network crawled from a user's most played games is kept, along with its columns for the decision tree,
+in a least recently used cache. A request from a user whose most played games were already crawled, which
+includes every repeated request, only has to look up the user's owned games and evaluate the decision tree.
+
+If the service is given a graph built by global_graph.py, networks are extracted from it instead of crawled.
+
+Run it with: python service.py --port 8111 [--graph graph.npz]
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Daniel Lee, Ahmed Hassini, Chris Oh, Andy Zhang
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+import http_client
+import games_network
+import scrape_app_ids
+from games_network import RecommendedGamesNetwork, create_recommendation_network, get_game_data
+from recommender import resolve_profile_id, get_questions_to_answers, rank_games, game_to_json, NUM_SEED_GAMES
+from tree_evaluation import GameColumns
+from global_graph import GlobalGameGraph, NUM_HOPS
+from owned_games_cache import OwnedGamesCache
+
+# The default address of the service, the number of networks it keeps and the number of requests each
+# crawl has in flight at once
+HOST = '127.0.0.1'
+PORT = 8111
+MAX_NETWORKS = 64
+MAX_CONCURRENCY = 16
+
+
+def parse_job(body: bytes) -> tuple[int | str, list[tuple[str, Any]], int]:
+    """Return the profile, the answers to the questions and the number of games k of the job in the JSON body of
+    a request, in the format of batch.py.
+
+    Raise a ValueError, KeyError or TypeError if the body is not a valid job.
+
+    >>> profile, questions_to_answers, k = parse_job(b'{"profile": "76561199000093113", "answers": {"Genre": '
+    ...     b'["Puzzle"], "Price": 10, "Date": 2011, "Online": true, "Multiplayer": false}, "ranking": ["Price", '
+    ...     b'"Genre", "Date", "Online", "Multiplayer"]}')
+    >>> profile, questions_to_answers[:2], k
+    ('76561199000093113', [('Price', 10), ('Genre', {'puzzle'})], 5)
+    >>> parse_job(b'{"profile": "76561199000093113"}')
+    Traceback (most recent call last):
+    ...
+    KeyError: 'answers'
+    """
+    job = json.loads(body)
+    if not isinstance(job, dict):
+        raise TypeError('The job must be a JSON object.')
+
+    questions_to_answers = get_questions_to_answers(job['answers'], job['ranking'])
+    profile = job['profile']
+    if not isinstance(profile, (int, str)):
+        raise TypeError('The profile must be a steam id or a custom profile name.')
+    k = job.get('k', 5)
+    if not isinstance(k, int) or k < 1:
+        raise ValueError('k must be a positive integer.')
+
+    return profile, questions_to_answers, k
+
+
+class RecommendationService:
+    """The state of the recommendation service that is kept between requests.
+
+    Instance Attributes:
+    - max_networks: The most networks kept in memory
+    - max_concurrency: The number of requests each crawl has in flight at once
+    - graph: The graph networks are extracted from, or None if networks are crawled
+    - num_hops: The number of recommendations followed from the user's games when extracting a network
+
+    Representation Invariants:
+    - self.max_networks >= 1
+    - self.max_concurrency >= 1
+    - len(self._networks) <= self.max_networks
+    """
+    max_networks: int
+    max_concurrency: int
+    graph: Optional[GlobalGameGraph]
+    num_hops: int
+
+    # Private Instance Attributes
+    #   - _networks: The crawled networks and their columns, from the least recently used to the most.
+    #                Keys: the app ids of the games the crawl started from, in order
+    #   - _crawl_locks: A lock for each network being crawled, so that a network is only crawled once when
+    #                   several users need it at the same time. Keys: the same as _networks
+    #   - _steam_ids: The steam ids of the custom profile names that were resolved. Keys: profile name
+    #   - _lock: A lock for the dictionaries above
+    _networks: OrderedDict[tuple[int, ...], tuple[RecommendedGamesNetwork, GameColumns]]
+    _crawl_locks: dict[tuple[int, ...], threading.Lock]
+    _steam_ids: dict[str, int]
+    _lock: threading.Lock
+
+    def __init__(self, max_networks: int = MAX_NETWORKS, max_concurrency: int = MAX_CONCURRENCY,
+                 graph: Optional[GlobalGameGraph] = None, num_hops: int = NUM_HOPS) -> None:
+        self.max_networks = max_networks
+        self.max_concurrency = max_concurrency
+        self.graph = graph
+        self.num_hops = num_hops
+        self._networks = OrderedDict()
+        self._crawl_locks = {}
+        self._steam_ids = {}
+        self._lock = threading.Lock()
+
+    def recommend(self, profile: int | str, questions_to_answers: list[tuple[str, Any]], k: int = 5) \
+            -> dict[str, Any]:
+        """Return the profile id and top k games of a user in the format of batch.py, given their profile and
+        their answers as returned by parse_job.
+        """
+        profile_id = self.resolve_profile_id(profile)
+
+        _, columns = self.get_network(scrape_app_ids.scrape_app_ids(profile_id, NUM_SEED_GAMES))
+        user_app_ids = scrape_app_ids.scrape_owned_app_ids(profile_id)
+        top_games = rank_games(columns, user_app_ids, questions_to_answers, k)
+
+        return {'profile_id': profile_id, 'top_games': [game_to_json(game, order) for game, order in top_games]}
+
+    def resolve_profile_id(self, profile: int | str) -> int:
+        """Return the 64-bit steam id of profile, resolving each custom profile name only once."""
+        if isinstance(profile, int) or (len(profile) == 17 and profile.isnumeric()):
+            return int(profile)
+
+        with self._lock:
+            if profile in self._steam_ids:
+                return self._steam_ids[profile]
+
+        steam_id = resolve_profile_id(profile)
+        with self._lock:
+            self._steam_ids[profile] = steam_id
+        return steam_id
+
+    def get_network(self, seed_app_ids: list[int]) -> tuple[RecommendedGamesNetwork, GameColumns]:
+        """Return the network of the games with the given app ids and its columns, crawling or extracting it
+        if it is not in memory.
+        """
+        key = tuple(seed_app_ids)
+
+        with self._lock:
+            if key in self._networks:
+                self._networks.move_to_end(key)
+                return self._networks[key]
+            crawl_lock = self._crawl_locks.setdefault(key, threading.Lock())
+
+        with crawl_lock:
+            # Another request may have crawled the network while this one was waiting
+            with self._lock:
+                if key in self._networks:
+                    self._networks.move_to_end(key)
+                    return self._networks[key]
+
+            if self.graph is not None:
+                network = self.graph.extract_network(seed_app_ids, self.num_hops)
+            else:
+                seed_games = {app_id: get_game_data(app_id) for app_id in seed_app_ids}
+                network = create_recommendation_network({app_id: game for app_id, game in seed_games.items()
+                                                         if game is not None}, max_concurrency=self.max_concurrency,
+                                                        verbose=False)
+            entry = (network, GameColumns.from_games(list(network.get_games())))
+
+            with self._lock:
+                self._networks[key] = entry
+                self._crawl_locks.pop(key, None)
+                while len(self._networks) > self.max_networks:
+                    self._networks.popitem(last=False)
+            return entry
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return the number of networks in memory, the hit rates of the game data and owned games caches and
+        the current rate of requests to each Steam host.
+        """
+        with self._lock:
+            num_networks = len(self._networks)
+
+        cache = games_network.GAME_DATA_CACHE
+        owned_games_cache = scrape_app_ids.OWNED_GAMES_CACHE
+        return {
+            'networks': num_networks,
+            'owned_games': len(owned_games_cache) if owned_games_cache is not None else None,
+            'owned_games_hit_rate': owned_games_cache.hit_rate() if owned_games_cache is not None else None,
+            'game_data_hit_rate': cache.hit_rate() if cache is not None else None,
+            'hosts': {host: {'rate': rate, 'throughput': throughput, 'throttled': throttled}
+                      for host, (rate, throughput, throttled) in http_client.RATE_LIMITER.get_stats().items()}
+        }
+
+
+class RecommendationRequestHandler(BaseHTTPRequestHandler):
+    """A handler for the requests to the recommendation service.
+
+    The service is read from the server, which must be created by create_server.
+    """
+    server: RecommendationServer
+
+    def do_GET(self) -> None:
+        """Answer a GET request."""
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', **self.server.service.get_stats()})
+        else:
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self) -> None:
+        """Answer a POST request."""
+        if self.path != '/recommend':
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+            return
+
+        # Only an invalid job is the client's error. Errors of the pipeline are answered as errors of the service.
+        try:
+            profile, questions_to_answers, k = parse_job(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        except (ValueError, KeyError, TypeError) as error:
+            self._send_json(400, {'error': f'{type(error).__name__}: {error}'})
+            return
+
+        try:
+            result = self.server.service.recommend(profile, questions_to_answers, k)
+        except http_client.SteamRequestError as error:
+            self._send_json(502, {'error': f'Steam request failed: {error}'})
+        except Exception as error:  # Answer unexpected errors too, so that the client is not left hanging
+            traceback.print_exc(file=sys.stderr)
+            self._send_json(500, {'error': f'Internal error: {type(error).__name__}: {error}'})
+        else:
+            self._send_json(200, result)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Do not log each request, since a busy service would flood the output."""
+
+    def _send_json(self, status: int, body: dict[str, Any]) -> None:
+        """Send a response with the given status and JSON body."""
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class RecommendationServer(ThreadingHTTPServer):
+    """An HTTP server that answers each request in its own thread, using a shared recommendation service.
+
+    Instance Attributes:
+    - service: The state shared by every request
+    """
+    service: RecommendationService
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: RecommendationService) -> None:
+        super().__init__(address, RecommendationRequestHandler)
+        self.service = service
+
+
+def create_server(host: str = HOST, port: int = PORT, service: RecommendationService | None = None) \
+        -> RecommendationServer:
+    """Return a recommendation server listening on host and port, with a new service if service is None.
+    Use port 0 to listen on any free port.
+    """
+    if service is None:
+        service = RecommendationService()
+    return RecommendationServer((host, port), service)
+
+
+def main() -> None:
+    """Run the service with the address given by the command line arguments until it is interrupted."""
+    parser = argparse.ArgumentParser(description='Serve recommended games over HTTP.')
+    parser.add_argument('--host', default=HOST, help='the address to listen on')
+    parser.add_argument('--port', type=int, default=PORT, help='the port to listen on')
+    parser.add_argument('--max-networks', type=int, default=MAX_NETWORKS, help='the most networks kept in memory')
+    parser.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY,
+                        help='the number of requests each crawl has in flight at once')
+    parser.add_argument('--graph', help='a graph saved by global_graph.py to extract networks from')
+    parser.add_argument('--owned-games-cache', help='a SQLite file to keep the owned games of users in between runs')
+    args = parser.parse_args()
+
+    if args.owned_games_cache is not None:
+        scrape_app_ids.OWNED_GAMES_CACHE = OwnedGamesCache(args.owned_games_cache)
+    graph = GlobalGameGraph.load(args.graph) if args.graph is not None else None
+    service = RecommendationService(args.max_networks, args.max_concurrency, graph)
+    server = create_server(args.host, args.port, service)
+    print(f"Serving recommendations on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    # Check this module with: python service.py --check
+    if sys.argv[1:] == ['--check']:
+        import python_ta
+        import python_ta.contracts
+
+        import doctest
+
+        doctest.testmod()
+
+        python_ta.check_all(config={
+            'extra-imports': ['sys', 'argparse', 'json', 'threading', 'traceback', 'collections', 'http.server',
+                              'http_client', 'games_network', 'scrape_app_ids', 'recommender', 'tree_evaluation',
+                              'global_graph', 'owned_games_cache'],
+            'allowed-io': ['main'],
+            'max-line-length': 120
+        })
+    else:
+        main()
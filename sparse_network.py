@@ -0,0 +1,238 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+A module that contains a recommended games network that stores its edges in sparse matrix (COO/CSR) form,
+indexed by integers, instead of in a dictionary on each game. Likeability and the other per-game scores are
+computed for every game at once with NumPy, so large networks can be scored quickly.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Ahmed Hassini, Chris Oh, Andy Zhang, Daniel Lee
+"""
+from __future__ import annotations
+from typing import Optional
+import numpy as np
+from games_network import Game, RecommendedGamesNetwork
+
+
+class SparseRecommendedGamesNetwork(RecommendedGamesNetwork):
+    """A directed graph where each vertex represents a game object and each directed edge represents a
+    recommendation, with the same public methods as RecommendedGamesNetwork.
+
+    Each game is given an index, in the order games are added. The edges are stored as three parallel arrays
+    of source indices, target indices and weights (a COO matrix). The Game objects are not given
+    recommended_games or tributes, so only the network knows the edges.
+
+    Representation Invariants:
+    - self.num_games == len(self._games)
+    - self.max_tributes >= 0
+    - len(self._sources) == len(self._targets) == len(self._weights)
+
+    >>> network = SparseRecommendedGamesNetwork()
+    >>> portal = Game(400, 'Portal', {'Puzzle'}, 9.99, False, False, 1.0, 2007)
+    >>> portal_2 = Game(620, 'Portal 2', {'Puzzle'}, 12.99, True, True, 1.0, 2011)
+    >>> network.add_recommendation(portal, portal_2, 0.5)
+    >>> network.update_games_likeability()
+    >>> network.get_games_to_likeability()[portal_2]
+    2.5
+    """
+    # Public Instance Attributes
+    #   - num_games: The number of games in the network.
+    #   - max_tributes: The max number of tributes in the network.
+    #
+    # Private Instance Attributes
+    #   - _games: The games contained in this graph. Keys: Game app id, Values: Game object
+    #   - _index: The index of each game. Keys: Game app id, Values: index of the game
+    #   - _app_ids: The app id of the game at each index
+    #   - _ratings: The rating of the game at each index
+    #   - _sources: The index of the source game of each edge
+    #   - _targets: The index of the target game of each edge
+    #   - _weights: The weight of each edge
+    #   - _edge_index: The position of each edge in the edge arrays. Keys: (source index, target index)
+    #   - _csr: The edges sorted by source, as the (index pointer, target indices) of a CSR matrix,
+    #           or None if the edges changed since it was last built
+    num_games: int
+    max_tributes: int
+    _games: dict[int, Game]
+    _index: dict[int, int]
+    _app_ids: list[int]
+    _ratings: list[float]
+    _sources: list[int]
+    _targets: list[int]
+    _weights: list[float]
+    _edge_index: dict[tuple[int, int], int]
+    _csr: Optional[tuple[np.ndarray, np.ndarray]]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._index = {}
+        self._app_ids = []
+        self._ratings = []
+        self._sources = []
+        self._targets = []
+        self._weights = []
+        self._edge_index = {}
+        self._csr = None
+
+    def add_game_by_info(self, app_id: int, name: str, genre: set[str], price: float, rating: float, online: bool,
+                         multiplayer: bool, release_date: int) -> None:
+        """Add a game with the given app id, name, score, and rating in the network.
+
+        The new game is not adjacent to any other existing games.
+
+        Preconditions:
+        - app_id not in self._games
+        """
+        self.add_game(Game(app_id, name, genre, price, online, multiplayer, rating, release_date))
+
+    def add_game(self, game: Game) -> None:
+        """Add a game to the network.
+
+        The new game is not adjacent to any other existing games.
+
+        Preconditions:
+        - game.app_id not in self._games
+        """
+        self._games[game.app_id] = game
+        self._index[game.app_id] = len(self._app_ids)
+        self._app_ids.append(game.app_id)
+        self._ratings.append(game.rating)
+        self.num_games += 1
+        self._csr = None
+
+    def add_recommendation(self, init_game: Game, recommended_game: Game, weight: float = 0.0) -> None:
+        """Add an edge from the init_game to the recommended_game in this graph with the given weight.
+        If the edge already exists, its weight is replaced.
+
+        If any of the games are not in the network, then add them to the network.
+        """
+        if init_game.app_id not in self._games:
+            self.add_game(init_game)
+        if recommended_game.app_id not in self._games:
+            self.add_game(recommended_game)
+
+        edge = (self._index[init_game.app_id], self._index[recommended_game.app_id])
+        if edge in self._edge_index:
+            self._weights[self._edge_index[edge]] = weight
+        else:
+            self._edge_index[edge] = len(self._sources)
+            self._sources.append(edge[0])
+            self._targets.append(edge[1])
+            self._weights.append(weight)
+            self._csr = None
+
+    def get_recommendations(self, app_id: int) -> set[Game]:
+        """Return the set of games recommended by the game with the given app id.
+
+        Note that the objects are returned, not the app ids.
+
+        Raise a ValueError if the game is not in the network.
+        """
+        if app_id not in self._games:
+            raise ValueError("Game app id not found in network.")
+
+        index_pointer, targets = self._get_csr()
+        index = self._index[app_id]
+        return {self._games[self._app_ids[target]] for target in targets[index_pointer[index]:index_pointer[index + 1]]}
+
+    def get_edges(self) -> list[tuple[int, int, float]]:
+        """Return the app id of the init game, the app id of the recommended game and the weight of every edge
+        in the network, in the order the edges were added.
+        """
+        return [(self._app_ids[source], self._app_ids[target], weight)
+                for source, target, weight in zip(self._sources, self._targets, self._weights)]
+
+    def update_edge_weight(self, init_game: int, recommended_game: int, new_weight: float) -> None:
+        """Update the weight of the edge between the games with app ids init_game and recommended_game
+        to new_weight.
+
+        If either game is not in the network then raise a ValueError
+        If init_game does not recommend recommended_game raise a ValueError
+        """
+        if init_game not in self._games or recommended_game not in self._games:
+            raise ValueError("One of the games do not exist in this network.")
+
+        edge = (self._index[init_game], self._index[recommended_game])
+        if edge not in self._edge_index:
+            raise ValueError("init_game does not have an edge directed to recommended_game")
+
+        self._weights[self._edge_index[edge]] = new_weight
+
+    def update_edge_weights_by_target(self, target_weights: dict[int, float]) -> None:
+        """Set the weight of every edge to the weight in target_weights of the app id of the game it points to.
+        Edges pointing to games that are not in target_weights get a weight of 0.
+        """
+        weights_by_index = np.array([target_weights.get(app_id, 0.0) for app_id in self._app_ids], dtype=float)
+        self._weights = weights_by_index[np.array(self._targets, dtype=np.int64)].tolist()
+
+    def get_likeability(self, app_id: int) -> float:
+        """Return the likeability of the game with the given app id.
+
+        Unlike RecommendedGamesNetwork.get_likeability, this scores every game, so use compute_scores to
+        read the likeability of many games.
+
+        Raise a ValueError if the game is not in the network.
+        """
+        if app_id not in self._games:
+            raise ValueError("Game app id not found in network.")
+
+        return float(self.compute_scores()[2][self._index[app_id]])
+
+    def compute_scores(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return the in-degree (number of tributes), mean weight of the incoming edges and likeability of every
+        game, as arrays indexed in the order the games were added.
+
+        Games with no tributes have a mean incoming weight of 0.
+        """
+        targets = np.array(self._targets, dtype=np.int64)
+        in_degrees = np.bincount(targets, minlength=self.num_games)
+        in_weights = np.bincount(targets, weights=np.array(self._weights, dtype=float), minlength=self.num_games)
+
+        mean_in_weights = np.divide(in_weights, in_degrees, out=np.zeros(self.num_games), where=in_degrees > 0)
+        max_tributes = int(in_degrees.max()) if self.num_games > 0 else 0
+        tribute_scores = in_degrees / max_tributes if max_tributes > 0 else np.zeros(self.num_games)
+
+        likeabilities = mean_in_weights + tribute_scores + np.array(self._ratings, dtype=float)
+        return in_degrees, mean_in_weights, likeabilities
+
+    def update_games_likeability(self) -> None:
+        """Updates each games instance attribute likeability, and max_tributes.
+
+        Likeability score will be between 0 and 3, inclusive, where 3 indicates the highest likeability for a game.
+
+        Likeability is scored based on:
+            - tributes
+            - ratings
+            - tributes weight
+        """
+        in_degrees, _, likeabilities = self.compute_scores()
+        self.max_tributes = int(in_degrees.max()) if self.num_games > 0 else 0
+
+        for app_id, likeability in zip(self._app_ids, likeabilities.tolist()):
+            self._games[app_id].likeability = likeability
+
+    def _get_csr(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the index pointer and target indices of the edges in CSR form, building them if needed."""
+        if self._csr is None:
+            sources = np.array(self._sources, dtype=np.int64)
+            order = np.argsort(sources, kind='stable')
+            index_pointer = np.zeros(self.num_games + 1, dtype=np.int64)
+            np.cumsum(np.bincount(sources, minlength=self.num_games), out=index_pointer[1:])
+            self._csr = (index_pointer, np.array(self._targets, dtype=np.int64)[order])
+        return self._csr
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['numpy', 'games_network'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
@@ -0,0 +1,425 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains a fast parser for Steam store pages.
+Instead of building a tree of the whole page, the parser reads the page once, from start to end,
+and only keeps the text of the elements that get_game_data needs.
+The page can also be parsed as it is downloaded, stopping as soon as every element has been found.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Ahmed Hassini, Chris Oh, Andy Zhang, Daniel Lee
+"""
+from __future__ import annotations
+import codecs
+import os
+import time
+from html.parser import HTMLParser
+from typing import Iterable, Optional
+
+# The fields of a game, in the same order as the parameters of Game.__init__:
+# (name, genres, price, online, multiplayer, rating, release_date)
+GameFields = tuple[str, set[str], float, bool, bool, float, int]
+
+# The rating of each overall review summary. Any other summary has a rating of 0.1.
+REVIEW_SUMMARY_TO_RATING = {
+    'Overwhelmingly Positive': 1.0,
+    'Very Positive': 0.90,
+    'Positive': 0.80,
+    'Mostly Positive': 0.7,
+    'Mixed': 0.5,
+    'Mostly Negative': 0.4,
+    'Negative': 0.3,
+    'Very Negative': 0.2
+}
+
+# Elements that never have an end tag
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'meta', 'param',
+                 'source', 'track', 'wbr'}
+
+# Elements whose text is not part of the text of the elements containing them
+RAW_TEXT_ELEMENTS = {'script', 'style', 'template'}
+
+# The words searched for in the description of a game
+DESCRIPTION_KEYWORDS = ('online', 'multiplayer', 'multi-player')
+
+
+class StorePageParser(HTMLParser):
+    """A parser that extracts the text of the elements of a store page used for the game data.
+
+    The page can be fed in chunks with feed, as it is downloaded.
+
+    Instance Attributes:
+    - name: The text of the first div.apphub_AppName, or None if it has not been found
+    - description: The text of the first div of the page, or None if it has not ended yet
+    - tags: The text of each a.app_tag
+    - price: The text of the first div.game_purchase_price, or None if it has not been found
+    - review_summary: The text of the first span.game_review_summary in the first div.user_reviews_summary_row,
+                      or None if it has not been found
+    - has_review_row: Whether a div.user_reviews_summary_row has been found
+    - date: The text of the first div.date, or None if it has not been found
+    - tags_complete: Whether the div.glance_tags containing the a.app_tag elements has ended
+    - description_keywords: The words of DESCRIPTION_KEYWORDS found in the description so far
+
+    >>> parser = StorePageParser()
+    >>> parser.feed('<div><div class="apphub_AppName">Portal</div><a class="app_tag"> Puzzle </a></div>')
+    >>> parser.name, parser.tags
+    ('Portal', [' Puzzle '])
+    """
+    name: Optional[str]
+    description: Optional[str]
+    tags: list[str]
+    price: Optional[str]
+    review_summary: Optional[str]
+    has_review_row: bool
+    date: Optional[str]
+    tags_complete: bool
+    description_keywords: set[str]
+
+    # Private Instance Attributes
+    #   - _open_elements: The names of the elements that have started but not ended yet, outermost first
+    #   - _captures: The elements whose text is being collected. Each capture is a list of the index of the
+    #                element in _open_elements, the attribute the text is for and the pieces of text so far.
+    #   - _review_row_index: The index in _open_elements of the first div.user_reviews_summary_row,
+    #                        or -1 if it is not open
+    #   - _num_raw_text_elements: The number of elements in _open_elements that are in RAW_TEXT_ELEMENTS
+    #   - _description_started: Whether the first div of the page has been found
+    #   - _description_tail: The end of the lowercase description so far, so that keywords split
+    #                        between two pieces of text are found
+    #   - _tag_block_index: The index in _open_elements of the first div.glance_tags, or -1 if it is not open
+    _open_elements: list[str]
+    _captures: list[list]
+    _review_row_index: int
+    _num_raw_text_elements: int
+    _description_started: bool
+    _description_tail: str
+    _tag_block_index: int
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.name = None
+        self.description = None
+        self.tags = []
+        self.price = None
+        self.review_summary = None
+        self.has_review_row = False
+        self.date = None
+        self.tags_complete = False
+        self.description_keywords = set()
+        self._open_elements = []
+        self._captures = []
+        self._review_row_index = -1
+        self._num_raw_text_elements = 0
+        self._description_started = False
+        self._description_tail = ''
+        self._tag_block_index = -1
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        """Start collecting the text of the element if it is one of the elements we need."""
+        if tag in VOID_ELEMENTS:
+            return
+
+        self._open_elements.append(tag)
+        if tag in RAW_TEXT_ELEMENTS:
+            self._num_raw_text_elements += 1
+
+        if tag not in ('div', 'a', 'span'):
+            return
+
+        classes = set()
+        for attr, value in attrs:
+            if attr == 'class' and value is not None:
+                classes.update(value.split())
+
+        if tag == 'div':
+            if not self._description_started:
+                self._description_started = True
+                self._start_capture('description')
+            if 'apphub_AppName' in classes and not self._is_captured('name'):
+                self._start_capture('name')
+            if 'game_purchase_price' in classes and not self._is_captured('price'):
+                self._start_capture('price')
+            if 'date' in classes and not self._is_captured('date'):
+                self._start_capture('date')
+            if 'glance_tags' in classes and not self.tags_complete and self._tag_block_index < 0:
+                self._tag_block_index = len(self._open_elements) - 1
+            if 'user_reviews_summary_row' in classes and not self.has_review_row:
+                self.has_review_row = True
+                self._review_row_index = len(self._open_elements) - 1
+        elif tag == 'a':
+            if 'app_tag' in classes:
+                self._start_capture('tags')
+        elif 'game_review_summary' in classes and self._review_row_index >= 0 \
+                and not self._is_captured('review_summary'):
+            self._start_capture('review_summary')
+
+    def handle_endtag(self, tag: str) -> None:
+        """End the most recent open element with this tag and every element inside it.
+        End tags that do not match an open element are ignored.
+        """
+        for index in range(len(self._open_elements) - 1, -1, -1):
+            if self._open_elements[index] == tag:
+                self._close_elements(index)
+                return
+
+    def handle_data(self, data: str) -> None:
+        """Add data to the text of every element being collected.
+
+        Once every keyword that decides the online and multiplayer fields has been found in the description,
+        the rest of the description is not kept.
+        """
+        if self._num_raw_text_elements > 0:
+            return
+
+        for capture in self._captures:
+            if capture[1] == 'description':
+                if 'online' in self.description_keywords and ('multiplayer' in self.description_keywords
+                                                              or 'multi-player' in self.description_keywords):
+                    continue
+                text = self._description_tail + data.lower()
+                self.description_keywords.update(keyword for keyword in DESCRIPTION_KEYWORDS if keyword in text)
+                self._description_tail = text[-len(max(DESCRIPTION_KEYWORDS, key=len)):]
+            capture[2].append(data)
+
+    def is_complete(self) -> bool:
+        """Return whether every element needed for the game data has been found, so the rest of the page
+        does not need to be parsed.
+
+        The page is complete once the name, price, release date and first review summary have been found,
+        the block of tags has ended, and the online and multiplayer fields are known to be True from the
+        description or the tags. Otherwise the description decides them, and it only ends near the end of the
+        page. So the page of a game that is single-player or offline is read to the end of its description,
+        since only the whole description can show that a keyword is missing from it.
+
+        The tags are assumed to all be in the first div.glance_tags, like on Steam's store pages, so the tags
+        are complete once that block ends. An a.app_tag after the end of the block is left out when the parse
+        stops early, although parse_store_page and parse_store_page_bs4 would include it.
+        """
+        if self.name is None or self.price is None or self.date is None or not self.tags_complete \
+                or any(capture[1] != 'description' for capture in self._captures):
+            return False
+
+        if self.review_summary is None and not (self.has_review_row and self._review_row_index < 0):
+            return False
+
+        return self.description is not None or self._are_online_and_multiplayer_found()
+
+    def close(self) -> None:
+        """Parse any data that is still buffered and end every element that is still open."""
+        super().close()
+        if len(self._open_elements) > 0:
+            self._close_elements(0)
+
+    def get_game_fields(self) -> Optional[GameFields]:
+        """Return the game fields of the page that has been fed so far.
+        Return None if the page does not have a game name, which happens for pages that are not games.
+        """
+        if self.name is None:
+            return None
+
+        if self.has_review_row and self.review_summary is None:
+            review_summary = ''
+        else:
+            review_summary = self.review_summary
+
+        if self.description is not None:
+            description = self.description
+        else:
+            # The parser stopped before the description ended, which is only done once the description
+            # keywords that were found decide the online and multiplayer fields
+            description = ' '.join(sorted(self.description_keywords))
+
+        return to_game_fields(self.name, description, self.tags, self.price, review_summary, self.date)
+
+    def _start_capture(self, attribute: str) -> None:
+        """Start collecting the text of the element that was just opened for the given attribute."""
+        self._captures.append([len(self._open_elements) - 1, attribute, []])
+
+    def _are_online_and_multiplayer_found(self) -> bool:
+        """Return whether the online and multiplayer fields are known to be True from the description,
+        or from the tags once every tag has been found.
+        """
+        lower_tags = [tag.lower() for tag in self.tags] if self.tags_complete else []
+        tags_stripped = {tag.strip() for tag in self.tags} if self.tags_complete else set()
+
+        online = 'online' in self.description_keywords or 'online' in tags_stripped or \
+            any('online' in tag for tag in lower_tags)
+        multiplayer = 'multiplayer' in self.description_keywords or 'multi-player' in self.description_keywords \
+            or any('multiplayer' in tag or 'multi-player' in tag for tag in lower_tags)
+        return online and multiplayer
+
+    def _is_captured(self, attribute: str) -> bool:
+        """Return whether the text for attribute has been collected or is being collected."""
+        return getattr(self, attribute) is not None or any(capture[1] == attribute for capture in self._captures)
+
+    def _close_elements(self, index: int) -> None:
+        """End the element at the given index of _open_elements and every element inside it."""
+        for tag in self._open_elements[index:]:
+            if tag in RAW_TEXT_ELEMENTS:
+                self._num_raw_text_elements -= 1
+        del self._open_elements[index:]
+
+        if self._review_row_index >= index:
+            self._review_row_index = -1
+        if self._tag_block_index >= index:
+            self._tag_block_index = -1
+            self.tags_complete = True
+
+        while len(self._captures) > 0 and self._captures[-1][0] >= index:
+            _, attribute, pieces = self._captures.pop()
+            if attribute == 'tags':
+                self.tags.append(''.join(pieces))
+            else:
+                setattr(self, attribute, ''.join(pieces))
+
+
+def parse_store_page(content: bytes) -> Optional[GameFields]:
+    """Return the game fields of the given store page.
+    Return None if the page does not have a game name, which happens for pages that are not games.
+    """
+    parser = StorePageParser()
+    parser.feed(content.decode('utf-8', errors='replace'))
+    parser.close()
+    return parser.get_game_fields()
+
+
+def parse_store_page_stream(chunks: Iterable[bytes]) -> Optional[GameFields]:
+    """Return the game fields of the store page whose content is made of the given chunks.
+
+    The chunks are parsed as they arrive, and no more chunks are read once every element needed for the game
+    fields has been found. See StorePageParser.is_complete for when that is, and for the one way the result can
+    differ from parse_store_page. Return None if the page does not have a game name.
+    """
+    parser = StorePageParser()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        if parser.is_complete():
+            return parser.get_game_fields()
+
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    return parser.get_game_fields()
+
+
+def to_game_fields(name: str, description: str, tags: list[str], price: Optional[str],
+                   review_summary: Optional[str], date: Optional[str]) -> GameFields:
+    """Return the game fields given the text of the elements of a store page.
+
+    price, review_summary and date are None if their element is not on the page.
+
+    >>> to_game_fields(' Portal ', 'A puzzle game', [' Puzzle '], '$9.99', 'Very Positive', 'Oct 10, 2007')
+    ('Portal', {'Puzzle'}, 9.99, False, False, 0.9, 2007)
+    """
+    genres = {tag.strip() for tag in tags}
+    description = description.lower()
+    lower_tags = [tag.lower() for tag in tags]
+
+    # Get game player modes
+    is_multiplayer = 'multiplayer' in description or 'multi-player' in description or \
+                     any('multiplayer' in tag or 'multi-player' in tag for tag in lower_tags)
+
+    # Get game online component
+    has_online_component = 'online' in description or 'online' in genres or \
+                           any('online' in tag for tag in lower_tags)
+
+    # Get game price. Strip any dollar signs and currency symbols. If there is no price, the game is free.
+    price_digits = ''.join(filter(str.isdigit, price.strip())) if price is not None else ''
+    game_price = float(price_digits) / 100 if price_digits else 0
+
+    # Get game rating
+    if review_summary is not None:
+        rating = REVIEW_SUMMARY_TO_RATING.get(review_summary.strip().replace(",", ""), 0.1)
+    else:
+        rating = 0.0
+
+    # Get game release year
+    release_year = date.strip()[-4:] if date is not None else ""
+
+    return name.strip(), genres, game_price, has_online_component, is_multiplayer, rating, int(release_year)
+
+
+def parse_store_page_bs4(content: bytes) -> Optional[GameFields]:
+    """Return the game fields of the given store page using BeautifulSoup.
+
+    This is how store pages were parsed before StorePageParser. It is kept as the reference that
+    benchmark_store_page_parsers compares StorePageParser against.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+
+    name_section = soup.select_one("div.apphub_AppName")
+    if name_section is None:
+        return None
+
+    description = soup.select_one('div').text
+    tags = [tag.text for tag in soup.select("a.app_tag")]
+
+    price_section = soup.select_one("div.game_purchase_price")
+    price = price_section.text if price_section else None
+
+    review_row = soup.select_one("div.user_reviews_summary_row")
+    review_summary = None
+    if review_row:
+        review_summary_section = review_row.select_one("span.game_review_summary")
+        review_summary = review_summary_section.text if review_summary_section else ''
+
+    date_section = soup.select_one("div.date")
+    date = date_section.text if date_section else None
+
+    return to_game_fields(name_section.text, description, tags, price, review_summary, date)
+
+
+def save_store_page(content: bytes, app_id: int, pages_dir: str) -> None:
+    """Save a downloaded store page to pages_dir, so it can be used by benchmark_store_page_parsers.
+    games_network saves every store page it scrapes this way while games_network.STORE_PAGES_DIR is set.
+    """
+    os.makedirs(pages_dir, exist_ok=True)
+    with open(os.path.join(pages_dir, f'{app_id}.html'), 'wb') as file:
+        file.write(content)
+
+
+def benchmark_store_page_parsers(pages_dir: str, repeat: int = 5) -> dict[str, float]:
+    """Parse every saved store page (*.html) in pages_dir repeat times with parse_store_page and with
+    parse_store_page_bs4, and print and return the average number of milliseconds each takes per page.
+
+    Raise a ValueError if the parsers do not give the same game fields for a page.
+    """
+    pages = {}
+    for file_name in sorted(os.listdir(pages_dir)):
+        if file_name.endswith('.html'):
+            with open(os.path.join(pages_dir, file_name), 'rb') as file:
+                pages[file_name] = file.read()
+
+    for file_name, content in pages.items():
+        if parse_store_page(content) != parse_store_page_bs4(content):
+            raise ValueError(f'The parsers give different game fields for {file_name}')
+
+    results = {}
+    for parser in (parse_store_page, parse_store_page_bs4):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for content in pages.values():
+                parser(content)
+        results[parser.__name__] = (time.perf_counter() - start) * 1000 / (repeat * max(len(pages), 1))
+        print(f'{parser.__name__}: {round(results[parser.__name__], 2)} ms per page')
+
+    return results
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['codecs', 'os', 'time', 'html.parser', 'bs4'],
+        'allowed-io': ['save_store_page', 'benchmark_store_page_parsers'],
+        'max-line-length': 120
+    })
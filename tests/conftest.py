@@ -0,0 +1,100 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the pytest fixtures shared by the tests, including a local fake of the Steam endpoints,
+so that the tests do not send any request to Steam.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Ahmed Hassini, Daniel Lee, Chris Oh, Andy Zhang
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator
+from urllib.parse import parse_qs, urlsplit
+import pytest
+
+# The modules of the project are at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+
+
+class FakeSteam:
+    """A local HTTP server that answers the requests for each path with a fixed response or a function.
+
+    Instance Attributes:
+    - url: The URL of the server, without a trailing slash
+    - routes: The response of each path. A response is a (status code, body) tuple, where the body is bytes,
+              a string or JSON data, or a function that takes the query parameters of a request and returns
+              such a tuple. Keys: the paths
+    - requests: The path and query parameters of every request the server received, in order
+
+    Representation Invariants:
+    - not self.url.endswith('/')
+    """
+    url: str
+    routes: dict[str, tuple[int, Any] | Callable[[dict[str, str]], tuple[int, Any]]]
+    requests: list[tuple[str, dict[str, str]]]
+
+    # Private Instance Attributes
+    #   - _server: The HTTP server
+    _server: ThreadingHTTPServer
+
+    def __init__(self) -> None:
+        self.routes = {}
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answer each request with the response of its path in fake.routes, or a 404."""
+
+            def do_GET(self) -> None:
+                """Answer a GET request."""
+                parts = urlsplit(self.path)
+                query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                fake.requests.append((parts.path, query))
+
+                response = fake.routes.get(parts.path, (404, 'Not Found'))
+                status, body = response(query) if callable(response) else response
+                if isinstance(body, str):
+                    body = body.encode('utf-8')
+                elif not isinstance(body, bytes):
+                    body = json.dumps(body).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                """Do not log the requests."""
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self._server.server_address[1]}'
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_steam(monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeSteam]:
+    """Return a running FakeSteam with no routes. Failed requests are not retried and requests are not
+    rate limited, so that the tests run quickly.
+    """
+    monkeypatch.setattr(http_client, 'MAX_RETRIES', 0)
+    monkeypatch.setattr(http_client, '_session', None)  # So that the session is created without retries
+    monkeypatch.setattr(http_client, 'RATE_LIMITER', RateLimiter(1000.0, 1000.0, 1000.0))
+    fake = FakeSteam()
+    yield fake
+    fake.close()
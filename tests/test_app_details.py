@@ -0,0 +1,98 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the tests of the JSON app details backend of get_game_data, run against a local fake of
+the app details and review summary endpoints.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Daniel Lee, Chris Oh, Andy Zhang, Ahmed Hassini
+"""
+from __future__ import annotations
+import pytest
+import app_details
+import games_network
+from compact_games import GENRES_FILE
+from game_data_cache import GameDataCache
+from negative_cache import NegativeCache
+
+STUMBLE_GUYS = {
+    'name': 'Stumble Guys',
+    'is_free': True,
+    'short_description': 'Race through obstacle courses against up to 32 players online!',
+    'genres': [{'description': 'Action'}, {'description': 'Casual'}],
+    'categories': [{'description': 'Online PvP'}, {'description': 'Multi-player'}],
+    'release_date': {'date': 'Oct 7, 2021'}
+}
+
+
+@pytest.fixture
+def fake_app_details(fake_steam, monkeypatch):
+    """Return fake_steam with the app details of Stumble Guys, and point app_details at it.
+    Every other app id has no app details.
+    """
+    def get_app_details(query: dict[str, str]) -> tuple[int, dict]:
+        """Return the app details response of the app id in query."""
+        if query['appids'] == '1677740':
+            return 200, {'1677740': {'success': True, 'data': STUMBLE_GUYS}}
+        return 200, {query['appids']: {'success': False}}
+
+    fake_steam.routes['/api/appdetails'] = get_app_details
+    fake_steam.routes['/appreviews/1677740'] = (200, {'success': 1,
+                                                      'query_summary': {'review_score_desc': 'Very Positive'}})
+    monkeypatch.setattr(app_details, 'APP_DETAILS_URL', fake_steam.url + '/api/appdetails')
+    monkeypatch.setattr(app_details, 'APP_REVIEWS_URL', fake_steam.url + '/appreviews/')
+    return fake_steam
+
+
+def test_get_app_details_fields(fake_app_details) -> None:
+    """Test that the fields of a game are read from the app details and review summary."""
+    assert app_details.get_app_details_fields(1677740) == \
+        ('Stumble Guys', {'Action', 'Casual', 'PvP', 'Multiplayer'}, 0, True, True, 0.9, 2021)
+
+
+def test_get_app_details_fields_no_game(fake_app_details) -> None:
+    """Test that an app id without app details has no fields, and that its reviews are not requested."""
+    assert app_details.get_app_details_fields(1677741) is None
+    assert [path for path, _ in fake_app_details.requests] == ['/api/appdetails']
+
+
+def test_get_game_data_caches_each_backend(fake_app_details, monkeypatch) -> None:
+    """Test that get_game_data does not return the data cached from one backend while another is chosen."""
+    html_fields = ('Stumble Guys', {'Multiplayer', 'Battle Royale'}, 0, True, True, 0.9, 2021)
+    monkeypatch.setitem(games_network.METADATA_BACKENDS, 'html', lambda app_id: html_fields)
+    monkeypatch.setattr(games_network, 'GAME_DATA_CACHE', GameDataCache())
+    monkeypatch.setattr(games_network, 'INVALID_APP_IDS', NegativeCache())
+
+    monkeypatch.setattr(games_network, 'METADATA_BACKEND', 'html')
+    assert games_network.get_game_data(1677740).genres == {'Multiplayer', 'Battle Royale'}
+
+    monkeypatch.setattr(games_network, 'METADATA_BACKEND', 'json')
+    assert games_network.get_game_data(1677740).genres == {'Action', 'Casual', 'PvP', 'Multiplayer'}
+    assert games_network.get_game_data(1677740).genres == {'Action', 'Casual', 'PvP', 'Multiplayer'}
+    assert len(fake_app_details.requests) == 2
+
+    monkeypatch.setattr(games_network, 'METADATA_BACKEND', 'html')
+    assert games_network.get_game_data(1677740).genres == {'Multiplayer', 'Battle Royale'}
+
+
+def test_category_tags_are_genres() -> None:
+    """Test that every tag a category is turned into is a genre of genres.txt, so that the genre answers can match
+    it.
+    """
+    with open(GENRES_FILE) as file:
+        genres = {line.strip().lower() for line in file}
+    assert all(tag.lower() in genres for tag in app_details.CATEGORY_TO_TAG.values())
+
+
+def test_genres_without_tags_are_not_found() -> None:
+    """Test that the genres of the store page that are neither a Steam genre nor a category, like Puzzle, are not
+    found by the app details backend, which is why it matches fewer genre answers.
+    """
+    data = {'name': 'Portal 2', 'short_description': 'A puzzle game.',
+            'genres': [{'description': 'Action'}, {'description': 'Adventure'}],
+            'categories': [{'description': 'Single-player'}, {'description': 'Steam Achievements'}]}
+    genres = app_details.to_game_fields(data, None)[1]
+    assert genres == {'Action', 'Adventure', 'Singleplayer'}
+    assert 'Puzzle' not in genres
@@ -0,0 +1,46 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the tests of how the crawl workers store the games they fetch in the crawl queue.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Daniel Lee, Andy Zhang, Chris Oh, Ahmed Hassini
+"""
+from __future__ import annotations
+from typing import Optional
+import crawl_workers
+import games_network
+import http_client
+from games_network import Game
+from negative_cache import NegativeCache
+
+
+def get_fake_game_data(app_id: int) -> Optional[Game]:
+    """Return a game for app id 10, no game for app id 20, and fail the request of app id 30."""
+    if app_id == 10:
+        return Game(10, 'Game 10', {'Action'}, 9.99, True, False, 0.9, 2020)
+    elif app_id == 20:
+        return None
+    else:
+        raise http_client.SteamRequestError(f'Request for {app_id} failed')
+
+
+def test_failed_games_are_fetched_again(tmp_path, monkeypatch) -> None:
+    """Test that a game whose request failed is left out of the queue instead of being stored as invalid, so that
+    the next reviewer who has it fetches it again.
+    """
+    monkeypatch.setattr(crawl_workers, 'get_game_data', get_fake_game_data)
+    monkeypatch.setattr(games_network, 'INVALID_APP_IDS', NegativeCache())
+    queue = crawl_workers.CrawlQueue(str(tmp_path / 'crawl.sqlite3'), 'test')
+    queue.add_seed_games([Game(1, 'Game 1', {'Action'}, 0.0, True, True, 0.8, 2019)])
+
+    fetched_games = crawl_workers.fetch_games(queue.get_unknown_app_ids([10, 20, 30]))
+    assert set(fetched_games) == {10, 20}
+    assert fetched_games[20] is None
+
+    queue.add_reviewer_games(1, 100, [10, 20, 30], fetched_games)
+    assert queue.get_unknown_app_ids([10, 20, 30]) == [30]
+    assert queue.num_games() == 2
+    queue.close()
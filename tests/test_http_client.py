@@ -0,0 +1,66 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the tests of how failed requests to Steam are reported by http_client and skipped by the
+crawl, run against a local fake of Steam.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Ahmed Hassini, Andy Zhang, Chris Oh, Daniel Lee
+"""
+from __future__ import annotations
+import socket
+import pytest
+import games_network
+import http_client
+import rate_limiter
+import scrape_app_ids
+import scrape_profile_ids
+from negative_cache import NegativeCache
+from owned_games_cache import OwnedGamesCache
+
+
+def get_closed_url() -> str:
+    """Return the URL of a local port that no server listens on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/'
+
+
+def test_get_json_not_json(fake_steam) -> None:
+    """Test that a successful response whose body is not JSON raises a SteamRequestError."""
+    fake_steam.routes['/error'] = (200, '<html><body>Something went wrong</body></html>')
+    with pytest.raises(http_client.SteamRequestError):
+        http_client.get_json(fake_steam.url + '/error')
+
+
+def test_get_connection_error(fake_steam) -> None:
+    """Test that a request whose connection fails raises a SteamRequestError."""
+    with pytest.raises(http_client.SteamRequestError):
+        http_client.get(get_closed_url())
+
+
+def test_fetch_helpers_skip_failures(fake_steam, monkeypatch) -> None:
+    """Test that the crawl skips a game whose reviews are not JSON and a reviewer whose games cannot be fetched."""
+    fake_steam.routes['/appreviews/400'] = (200, '<html><body>Something went wrong</body></html>')
+    monkeypatch.setattr(scrape_profile_ids, 'REVIEWS_URL', fake_steam.url + '/appreviews/')
+    monkeypatch.setattr(scrape_app_ids, 'OWNED_GAMES_URL', get_closed_url())
+    monkeypatch.setattr(scrape_app_ids, 'OWNED_GAMES_CACHE', OwnedGamesCache())
+    monkeypatch.setattr(scrape_app_ids, 'EMPTY_PROFILES', NegativeCache())
+
+    assert games_network.fetch_reviewer_ids(400) == []
+    assert games_network.fetch_reviewer_app_ids(76561199000093113) == []
+    # A failed request does not mean that the profile is empty
+    assert not scrape_app_ids.is_empty_profile(76561199000093113)
+
+
+def test_retry_after_is_capped(monkeypatch) -> None:
+    """Test that a throttled response does not pause its host for longer than MAX_PAUSE, whatever its
+    Retry-After header asks for.
+    """
+    monkeypatch.setattr(rate_limiter.time, 'sleep', lambda seconds: None)
+    bucket = rate_limiter.TokenBucket(rate=1000.0, max_rate=1000.0)
+    bucket.record_response(429, retry_after=3600.0)
+    assert bucket.acquire() < rate_limiter.TokenBucket.MAX_PAUSE + 1
@@ -0,0 +1,62 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the tests of how the owned games of users are requested and cached, run against a local
+fake of the GetOwnedGames endpoint.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Chris Oh, Daniel Lee, Ahmed Hassini, Andy Zhang
+"""
+from __future__ import annotations
+import pytest
+import scrape_app_ids
+from negative_cache import NegativeCache
+from owned_games_cache import OwnedGamesCache
+
+STEAM_ID = '76561199000093113'
+
+# The games of the user, whose playtime is their app id modulo 97, so that the most played games are not first
+GAMES = [{'appid': app_id, 'playtime_forever': app_id % 97, 'rtime_last_played': 1690000000}
+         for app_id in range(10, 10010, 10)]
+
+
+@pytest.fixture
+def fake_owned_games(fake_steam, monkeypatch):
+    """Return fake_steam with the owned games of STEAM_ID, and point scrape_app_ids at it with empty caches."""
+    fake_steam.routes['/IPlayerService/GetOwnedGames/v0001/'] = (200, {'response': {'game_count': len(GAMES),
+                                                                                    'games': GAMES}})
+    monkeypatch.setattr(scrape_app_ids, 'OWNED_GAMES_URL', fake_steam.url + '/IPlayerService/GetOwnedGames/v0001/')
+    monkeypatch.setattr(scrape_app_ids, 'OWNED_GAMES_CACHE', OwnedGamesCache())
+    monkeypatch.setattr(scrape_app_ids, 'EMPTY_PROFILES', NegativeCache())
+    return fake_steam
+
+
+@pytest.mark.parametrize('stream', [True, False])
+def test_owned_games_are_cached_compactly(fake_owned_games, monkeypatch, stream) -> None:
+    """Test that the cache keeps every app id but only the most played games of a user, and answers from it."""
+    monkeypatch.setattr(scrape_app_ids, 'STREAM_OWNED_GAMES', stream)
+    expected = [game['appid'] for game in sorted(GAMES, key=lambda game: -game['playtime_forever'])]
+
+    assert scrape_app_ids.scrape_app_ids(STEAM_ID, 5) == expected[:5]
+    cached_games = scrape_app_ids.OWNED_GAMES_CACHE.get(STEAM_ID)
+    assert len(cached_games['top_games']) == scrape_app_ids.NUM_CACHED_TOP_GAMES
+    assert cached_games['app_ids'] == [game['appid'] for game in GAMES]
+
+    assert scrape_app_ids.scrape_owned_app_ids(STEAM_ID) == {game['appid'] for game in GAMES}
+    assert scrape_app_ids.scrape_app_ids(STEAM_ID, 6) == expected[:6]
+    assert len(fake_owned_games.requests) == 1
+
+    # More games than are cached are requested again
+    assert scrape_app_ids.scrape_app_ids(STEAM_ID, 50) == expected[:50]
+    assert len(fake_owned_games.requests) == 2
+
+
+def test_empty_profile(fake_owned_games) -> None:
+    """Test that a user with hidden game details is remembered as an empty profile."""
+    fake_owned_games.routes['/IPlayerService/GetOwnedGames/v0001/'] = (200, {'response': {}})
+    assert scrape_app_ids.scrape_app_ids(STEAM_ID, 5) == []
+    assert scrape_app_ids.scrape_owned_app_ids(STEAM_ID) == set()
+    assert scrape_app_ids.is_empty_profile(STEAM_ID)
+    assert len(fake_owned_games.requests) == 1
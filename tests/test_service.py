@@ -0,0 +1,164 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the tests of the recommendation service, run against a local fake of the Steam store
+pages, reviews and GetOwnedGames endpoints.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Chris Oh, Andy Zhang, Daniel Lee, Ahmed Hassini
+"""
+from __future__ import annotations
+import json
+import threading
+import urllib.error
+import urllib.request
+from typing import Any, Iterator
+import pytest
+import games_network
+import scrape_app_ids
+import scrape_profile_ids
+import service
+from game_data_cache import GameDataCache
+from negative_cache import NegativeCache
+from owned_games_cache import OwnedGamesCache
+
+USER_ID = 76561199000000001
+FAILING_USER_ID = 76561199000000002
+
+# The app ids each user owns, from the most played to the least
+OWNED_GAMES = {
+    USER_ID: [10, 20, 30],
+    76561198000000001: [10, 40, 50],
+    76561198000000002: [20, 40, 60],
+    76561198000000003: [30, 50, 70],
+    76561198000000004: [40, 60, 80]
+}
+
+JOB = {
+    'profile': str(USER_ID),
+    'k': 3,
+    'answers': {'Genre': ['Action'], 'Price': 20, 'Date': 2015, 'Online': True, 'Multiplayer': False},
+    'ranking': ['Genre', 'Price', 'Date', 'Online', 'Multiplayer']
+}
+
+
+def get_owned_games(query: dict[str, str]) -> tuple[int, Any]:
+    """Return the GetOwnedGames response of the user in query, or a server error for FAILING_USER_ID."""
+    steam_id = int(query['steamid'])
+    if steam_id == FAILING_USER_ID:
+        return 500, 'Internal Server Error'
+    app_ids = OWNED_GAMES.get(steam_id, [])
+    games = [{'appid': app_id, 'playtime_forever': 100 - rank} for rank, app_id in enumerate(app_ids)]
+    return 200, {'response': {'game_count': len(games), 'games': games}}
+
+
+def get_reviews(app_id: int) -> tuple[int, Any]:
+    """Return the reviews response of the game with the given app id, reviewed by the users who own it."""
+    reviewers = [steam_id for steam_id, app_ids in OWNED_GAMES.items() if app_id in app_ids and steam_id != USER_ID]
+    return 200, {'success': 1, 'cursor': 'AoJ', 'reviews': [{'author': {'steamid': str(steam_id)}}
+                                                            for steam_id in reviewers]}
+
+
+def get_store_page(app_id: int) -> tuple[int, str]:
+    """Return the store page of the game with the given app id."""
+    genre = 'Action' if app_id % 20 == 0 else 'Puzzle'
+    return 200, f'''<html><body><div class="apphub_AppName">Game {app_id}</div>
+        <div class="glance_tags popular_tags"><a class="app_tag">{genre}</a><a class="app_tag">Online Co-Op</a></div>
+        <div class="release_date"><div class="date">7 Oct, {2000 + app_id // 10}</div></div>
+        <div class="user_reviews_summary_row"><span class="game_review_summary">Very Positive</span></div>
+        <div class="game_purchase_price price">CDN$ {app_id / 4:.2f}</div></body></html>'''
+
+
+@pytest.fixture
+def server_url(fake_steam, monkeypatch) -> Iterator[str]:
+    """Start a recommendation service that sends its requests to fake_steam and return its URL."""
+    for app_id in range(10, 90, 10):
+        fake_steam.routes[f'/app/{app_id}/'] = get_store_page(app_id)
+        fake_steam.routes[f'/appreviews/{app_id}'] = get_reviews(app_id)
+    fake_steam.routes['/IPlayerService/GetOwnedGames/v0001/'] = get_owned_games
+
+    monkeypatch.setattr(games_network, 'STORE_PAGE_URL', fake_steam.url + '/app/')
+    monkeypatch.setattr(scrape_profile_ids, 'REVIEWS_URL', fake_steam.url + '/appreviews/')
+    monkeypatch.setattr(scrape_app_ids, 'OWNED_GAMES_URL', fake_steam.url + '/IPlayerService/GetOwnedGames/v0001/')
+
+    # Start from empty caches, kept in memory
+    monkeypatch.setattr(games_network, 'METADATA_BACKEND', 'html')
+    monkeypatch.setattr(games_network, 'GAME_DATA_CACHE', GameDataCache())
+    monkeypatch.setattr(games_network, 'INVALID_APP_IDS', NegativeCache())
+    monkeypatch.setattr(scrape_app_ids, 'OWNED_GAMES_CACHE', OwnedGamesCache())
+    monkeypatch.setattr(scrape_app_ids, 'EMPTY_PROFILES', NegativeCache())
+
+    server = service.create_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def request(url: str, body: bytes | None = None) -> tuple[int, dict[str, Any]]:
+    """Send a GET request to url, or a POST request if body is not None, and return the status and JSON body
+    of the response.
+    """
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, body)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def test_health(server_url) -> None:
+    """Test that /health answers with the stats of the service."""
+    status, body = request(server_url + '/health')
+    assert status == 200
+    assert body['status'] == 'ok'
+    assert body['networks'] == 0
+
+
+def test_recommend(server_url) -> None:
+    """Test that /recommend answers with the top games of the user, leaving out the games they own."""
+    status, body = request(server_url + '/recommend', json.dumps(JOB).encode())
+    assert status == 200
+    assert body['profile_id'] == USER_ID
+
+    app_ids = [game['app_id'] for game in body['top_games']]
+    assert len(app_ids) == 3
+    assert set(app_ids) <= {40, 50, 60, 70, 80}
+    assert request(server_url + '/health')[1]['networks'] == 1
+
+
+def test_recommend_bad_body(server_url) -> None:
+    """Test that /recommend answers a body that is not a valid job with a 400."""
+    assert request(server_url + '/recommend', b'not json')[0] == 400
+    assert request(server_url + '/recommend', json.dumps({'profile': str(USER_ID)}).encode())[0] == 400
+
+
+def test_recommend_upstream_failure(server_url) -> None:
+    """Test that /recommend answers with a 502 when Steam fails to answer a request about the user."""
+    job = {**JOB, 'profile': str(FAILING_USER_ID)}
+    status, body = request(server_url + '/recommend', json.dumps(job).encode())
+    assert status == 502
+    assert '500' in body['error']
+
+
+def test_recommend_pipeline_value_error(server_url, fake_steam) -> None:
+    """Test that a ValueError raised while recommending, like one from a store page that cannot be parsed,
+    is answered as an error of the service and not of the client.
+    """
+    fake_steam.routes['/app/10/'] = (200, get_store_page(10)[1].replace('7 Oct, 2001', 'Coming soon'))
+    status, body = request(server_url + '/recommend', json.dumps(JOB).encode())
+    assert status == 500
+    assert "invalid literal for int() with base 10: 'soon'" in body['error']
+
+
+def test_recommend_unexpected_error(server_url, monkeypatch) -> None:
+    """Test that /recommend answers an unexpected error with a 500 instead of dropping the connection."""
+    def rank_games(*_: Any) -> None:
+        """Fail like a bug in the ranking."""
+        raise RuntimeError('ranking failed')
+
+    monkeypatch.setattr(service, 'rank_games', rank_games)
+    status, body = request(server_url + '/recommend', json.dumps(JOB).encode())
+    assert status == 500
+    assert 'RuntimeError: ranking failed' in body['error']
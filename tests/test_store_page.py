@@ -0,0 +1,80 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the tests of the streamed parse of store pages, which stops reading a page once every
+field of the game has been found.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Andy Zhang, Ahmed Hassini, Daniel Lee, Chris Oh
+"""
+from __future__ import annotations
+from typing import Iterator
+import pytest
+from store_page import parse_store_page, parse_store_page_bs4, parse_store_page_stream
+
+# The end of a page after the fields of the game, like the footer and scripts of a Steam store page
+FOOTER = '<div class="footer">' + '<p>More from the publisher</p>' * 500 + '</div>'
+
+
+def make_page(tags: list[str], description: str, after_fields: str = '') -> bytes:
+    """Return a store page with the given tags and description, with after_fields just after the other fields.
+    Like on Steam, the first div of the page, which is the description used for the game, contains the whole page.
+    """
+    tag_links = ''.join(f'<a class="app_tag">{tag}</a>' for tag in tags)
+    return f'''<html><body><div class="responsive_page_frame">
+        <div class="apphub_AppName">Game</div>
+        <div class="glance_tags popular_tags">{tag_links}<div class="app_tag add_button">+</div></div>
+        <div class="user_reviews_summary_row"><span class="game_review_summary">Very Positive</span></div>
+        <div class="release_date"><div class="date">7 Oct, 2021</div></div>
+        <div class="game_purchase_price price">CDN$ 9.99</div>{after_fields}
+        <div class="game_description">{description}</div>
+        {FOOTER}</div></body></html>'''.encode()
+
+
+PAGES = {
+    'online multiplayer': make_page(['Action', 'Online Co-Op', 'Multiplayer'], 'Play with friends.'),
+    'online from the description': make_page(['Action'], 'An online multiplayer race.'),
+    'single-player': make_page(['Puzzle', 'Singleplayer'], 'A puzzle game for one.'),
+    'no tags': make_page([], 'A game.')
+}
+
+
+def split(content: bytes, size: int, read: list[int]) -> Iterator[bytes]:
+    """Yield content in chunks of size bytes, adding the number of bytes read to read[0]."""
+    for start in range(0, len(content), size):
+        read[0] += len(content[start:start + size])
+        yield content[start:start + size]
+
+
+@pytest.mark.parametrize('name', PAGES)
+@pytest.mark.parametrize('size', [1, 7, 64, 4096])
+def test_stream_matches_full_parse(name: str, size: int) -> None:
+    """Test that the streamed parse gives the same fields as the full parse, however the page is split."""
+    content = PAGES[name]
+    assert parse_store_page_stream(split(content, size, [0])) == parse_store_page(content)
+    assert parse_store_page(content) == parse_store_page_bs4(content)
+
+
+def test_stream_stops_early_only_for_online_multiplayer() -> None:
+    """Test that the page of an online multiplayer game is not read to its end, and that the page of a
+    single-player game is, since only its whole description shows that it has no online or multiplayer mode.
+    """
+    read = [0]
+    parse_store_page_stream(split(PAGES['online multiplayer'], 1024, read))
+    assert read[0] < len(PAGES['online multiplayer']) / 2
+
+    read = [0]
+    parse_store_page_stream(split(PAGES['single-player'], 1024, read))
+    assert read[0] == len(PAGES['single-player'])
+
+
+def test_tags_after_tag_block_are_not_streamed() -> None:
+    """Test the assumption of StorePageParser.is_complete that every tag is in the first div.glance_tags:
+    a tag after that block is left out when the streamed parse stops early.
+    """
+    content = make_page(['Action', 'Online Co-Op', 'Multiplayer'], 'Play with friends.',
+                        after_fields='<a class="app_tag">Late</a>')
+    assert 'Late' in parse_store_page(content)[1]
+    assert 'Late' not in parse_store_page_stream(split(content, 1, [0]))[1]
@@ -0,0 +1,36 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the tests of how a TimedCache with a database keeps the number of stored entries bounded.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Ahmed Hassini, Andy Zhang, Daniel Lee, Chris Oh
+"""
+from __future__ import annotations
+from timed_cache import TimedCache
+
+
+def test_entries_are_evicted_every_interval(tmp_path, monkeypatch) -> None:
+    """Test that the entries of the database are only counted once every EVICTION_INTERVAL puts, and that the
+    least recently used entries are the ones deleted.
+    """
+    monkeypatch.setattr(TimedCache, 'EVICTION_INTERVAL', 10)
+    cache = TimedCache(str(tmp_path / 'cache.sqlite3'), max_entries=1, max_stored=20)
+    statements = []
+    cache._connect().set_trace_callback(statements.append)
+
+    for key in range(35):
+        cache.put(key, key)
+        if key == 5:
+            assert cache.get(0) == 0
+    assert sum('COUNT(*)' in statement for statement in statements) == 3
+    assert len(cache) == 25
+
+    for key in range(35, 40):
+        cache.put(key, key)
+    assert len(cache) == 20
+    assert cache.get(0) is None
+    assert cache.get(20) == 20
+    cache.close()
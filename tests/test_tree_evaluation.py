@@ -0,0 +1,61 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the tests of the columnar decision tree in tree_evaluation, which must put every game in the
+same leaf as the node-by-node DecisionTree of decision_tree.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Chris Oh, Ahmed Hassini, Daniel Lee, Andy Zhang
+"""
+from __future__ import annotations
+import random
+from typing import Any
+import pytest
+import decision_tree
+from compact_games import get_genre_vocabulary
+from games_network import Game
+from tree_evaluation import GameColumns, get_answers, get_leaf_indices, group_games_by_leaf
+
+QUESTIONS = ['Genre', 'Price', 'Date', 'Online', 'Multiplayer']
+
+
+def get_random_games(rng: random.Random, num_games: int) -> list[Game]:
+    """Return num_games random games, with genres from the genre vocabulary and a few genres outside of it."""
+    genres = get_genre_vocabulary().genres[:40] + ['Not A Tag', 'Another Missing Tag']
+    return [Game(app_id, f'Game {app_id}', set(rng.sample(genres, rng.randint(0, 4))),
+                 rng.choice([0.0, rng.uniform(0, 80)]), rng.random() < 0.5, rng.random() < 0.5, rng.random(),
+                 rng.randint(1980, 2023))
+            for app_id in rng.sample(range(10, 100000), num_games)]
+
+
+def get_random_questions_to_answers(rng: random.Random) -> list[tuple[str, Any]]:
+    """Return random answers to the questions, in a random ranking."""
+    genres = get_genre_vocabulary().genres[:40] + ['Not A Tag']
+    answers = {
+        'Genre': {genre.lower() for genre in rng.sample(genres, rng.randint(0, 3))},
+        'Price': rng.choice([0, rng.randint(0, 80)]),
+        'Date': rng.randint(1980, 2023),
+        'Online': rng.random() < 0.5,
+        'Multiplayer': rng.random() < 0.5
+    }
+    return [(question, answers[question]) for question in rng.sample(QUESTIONS, len(QUESTIONS))]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_leaves_match_decision_tree(monkeypatch, seed) -> None:
+    """Test that get_leaf_indices and group_games_by_leaf put every game in the same leaf as DecisionTree, with
+    the user's games left out.
+    """
+    rng = random.Random(seed)
+    games = get_random_games(rng, 300)
+    user_app_ids = {game.app_id for game in rng.sample(games, 20)}
+    questions_to_answers = get_random_questions_to_answers(rng)
+    monkeypatch.setattr(decision_tree, 'QUESTIONS_TO_ANSWERS', questions_to_answers)
+
+    expected = decision_tree.DecisionTree(set(games), user_app_ids).get_order_of_games()
+
+    columns = GameColumns.from_games(games)
+    leaf_indices = get_leaf_indices(get_answers(columns, questions_to_answers))
+    assert group_games_by_leaf(columns, leaf_indices, user_app_ids) == expected
@@ -0,0 +1,241 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains the cache that the caches of Steam responses are built on. It keeps the most recently
+used entries in memory and can also store every entry in a SQLite database, so that the entries are shared
+between runs of the program and between processes. Each entry expires some time after it was stored.
+
+The caches built on it only choose how their values are stored in the database.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Chris Oh, Andy Zhang, Ahmed Hassini, Daniel Lee
+"""
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class TimedCache:
+    """A cache of values keyed by strings, with a memory tier and an optional SQLite tier.
+
+    Each entry expires ttl seconds after it was stored. If more than max_entries entries are in memory, the
+    least recently used entries are evicted from memory, but not from the database. If max_stored is not None,
+    the entries least recently read from or written to the database are deleted from it once every
+    EVICTION_INTERVAL puts, so that at most max_stored entries are left. Counting the entries of the database
+    takes time linear in their number, so between two evictions each cache can store up to EVICTION_INTERVAL
+    entries more than max_stored.
+
+    Keys can be given as ints or strings, and a key is the same as its string. Values are stored in the
+    database as JSON. Subclasses can store them differently by overriding _encode and _decode, and can
+    give their table a name with TABLE.
+
+    Instance Attributes:
+    - path: The path of the SQLite database file, or None if the entries are only kept in memory
+    - ttl: The number of seconds an entry stays fresh
+    - max_entries: The maximum number of entries kept in memory
+    - max_stored: The maximum number of entries kept in the database, or None if there is no maximum
+    - hits: The number of lookups that found a fresh entry
+    - misses: The number of lookups that did not find a fresh entry
+
+    Representation Invariants:
+    - self.ttl > 0
+    - self.max_entries > 0
+    - self.max_stored is None or self.max_stored > 0
+    - self.hits >= 0
+    - self.misses >= 0
+    - len(self._entries) <= self.max_entries
+
+    >>> cache = TimedCache(max_entries=1)
+    >>> cache.put(730, ['Counter-Strike 2'])
+    >>> cache.get('730')
+    ['Counter-Strike 2']
+    >>> cache.put(570, ['Dota 2'])
+    >>> cache.get(730) is None
+    True
+    >>> (cache.hits, cache.misses)
+    (1, 1)
+    """
+    path: Optional[str]
+    ttl: float
+    max_entries: int
+    max_stored: Optional[int]
+    hits: int
+    misses: int
+
+    # Private Instance Attributes
+    #   - _entries: The time each entry in memory was stored and its value, from the least recently used entry
+    #               to the most. Keys: the keys as strings
+    #   - _connection: The connection to the database, opened on first use
+    #   - _lock: A lock so that the cache can be used by the threads of a concurrent crawl
+    #   - _num_puts: The number of entries put in the database since the last eviction
+    _entries: OrderedDict[str, tuple[float, Any]]
+    _connection: Optional[sqlite3.Connection]
+    _lock: threading.Lock
+    _num_puts: int
+
+    # The name of the table of the entries in the database
+    TABLE = 'entries'
+
+    # The number of puts between two evictions from the database, if max_stored is not None
+    EVICTION_INTERVAL: int = 100
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 24 * 60 * 60, max_entries: int = 10000,
+                 max_stored: Optional[int] = None) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_stored = max_stored
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._connection = None
+        self._lock = threading.Lock()
+        self._num_puts = 0
+
+    def _encode(self, value: Any) -> str:
+        """Return value as it is stored in the database."""
+        return json.dumps(value)
+
+    def _decode(self, text: str) -> Any:
+        """Return the value stored in the database as text by _encode."""
+        return json.loads(text)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the connection to the database, creating the database if it does not exist.
+
+        Preconditions:
+        - self.path is not None
+        """
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self._connection.execute(f'CREATE TABLE IF NOT EXISTS {self.TABLE} '
+                                     f'(key TEXT PRIMARY KEY, value TEXT, stored_at REAL, last_used REAL)')
+            self._connection.execute(f'CREATE INDEX IF NOT EXISTS {self.TABLE}_last_used ON {self.TABLE} (last_used)')
+            self._connection.commit()
+        return self._connection
+
+    def get(self, key: int | str) -> Optional[Any]:
+        """Return the value of the entry with the given key.
+        Return None if the key is not in the cache or its entry has expired.
+        """
+        key = str(key)
+        now = time.time()
+        cutoff = now - self.ttl
+        with self._lock:
+            if key in self._entries:
+                stored_at, value = self._entries[key]
+                if stored_at > cutoff:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self.path is not None:
+                connection = self._connect()
+                row = connection.execute(f'SELECT stored_at, value FROM {self.TABLE} WHERE key = ? AND stored_at > ?',
+                                         (key, cutoff)).fetchone()
+                if row is not None:
+                    if self.max_stored is not None:
+                        connection.execute(f'UPDATE {self.TABLE} SET last_used = ? WHERE key = ?', (now, key))
+                        connection.commit()
+                    value = self._decode(row[1])
+                    self._add_entry(key, row[0], value)
+                    self.hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: int | str, value: Any) -> None:
+        """Store value as the entry of the given key, replacing any existing entry."""
+        key = str(key)
+        now = time.time()
+        with self._lock:
+            self._add_entry(key, now, value)
+            if self.path is not None:
+                connection = self._connect()
+                connection.execute(f'INSERT OR REPLACE INTO {self.TABLE} VALUES (?, ?, ?, ?)',
+                                   (key, self._encode(value), now, now))
+                if self.max_stored is not None:
+                    self._num_puts += 1
+                    if self._num_puts >= self.EVICTION_INTERVAL:
+                        self._evict_stored(connection)
+                connection.commit()
+
+    def _evict_stored(self, connection: sqlite3.Connection) -> None:
+        """Delete the entries least recently used from the database until at most max_stored are left.
+
+        Preconditions:
+        - self.max_stored is not None
+        """
+        num_extra = connection.execute(f'SELECT COUNT(*) FROM {self.TABLE}').fetchone()[0] - self.max_stored
+        if num_extra > 0:
+            connection.execute(f'DELETE FROM {self.TABLE} WHERE key IN '
+                               f'(SELECT key FROM {self.TABLE} ORDER BY last_used LIMIT ?)', (num_extra,))
+        self._num_puts = 0
+
+    def _add_entry(self, key: str, stored_at: float, value: Any) -> None:
+        """Keep an entry in memory as the most recently used, evicting the least recently used if needed."""
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def remove_expired(self) -> int:
+        """Delete every expired entry from memory and the database and return the number of entries deleted
+        from the database, or from memory if there is no database.
+        """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [key for key, (stored_at, _) in self._entries.items() if stored_at <= cutoff]
+            for key in expired:
+                del self._entries[key]
+
+            if self.path is None:
+                return len(expired)
+            connection = self._connect()
+            cursor = connection.execute(f'DELETE FROM {self.TABLE} WHERE stored_at <= ?', (cutoff,))
+            connection.commit()
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        """Return the number of entries in the database, or in memory if there is no database,
+        including expired ones.
+        """
+        with self._lock:
+            if self.path is None:
+                return len(self._entries)
+            return self._connect().execute(f'SELECT COUNT(*) FROM {self.TABLE}').fetchone()[0]
+
+    def hit_rate(self) -> float:
+        """Return the fraction of lookups that were hits, or 0.0 if there were no lookups."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def close(self) -> None:
+        """Close the connection to the database. The cache reopens it if it is used again."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['json', 'sqlite3', 'threading', 'time', 'collections'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })
@@ -0,0 +1,322 @@
+"""CSC111 Final Project: Steam Waiter
+
+Module Description
+===============================
+This module contains a columnar version of the decision tree in decision_tree.py.
+
+Instead of moving games between the sets of 63 tree nodes, the data of every game is stored in NumPy arrays,
+and each of the five questions is answered for every game at once as a boolean array. Since every game is asked
+every question, the leaf a game ends up in only depends on its five answers: the answers are bits, with the
+answer to the highest ranked question as the most significant bit, and a negative answer as 0.
+
+Copyright and Usage Information
+===============================
+This file is Copyright (c) 2023 Daniel Lee, Andy Zhang, Chris Oh, Ahmed Hassini
+"""
+from __future__ import annotations
+import heapq
+import time
+from typing import Any, Optional
+import numpy as np
+from games_network import Game
+from compact_games import CompactGame, GenreVocabulary, get_genre_vocabulary
+
+# The number of questions in the decision tree, and so the number of leaves
+NUM_QUESTIONS = 5
+NUM_LEAVES = 2 ** NUM_QUESTIONS
+
+# The tuning parameter of the price similarity, and the lowest similarity that matches the user's price
+PRICE_SIMILARITY_K = 0.05
+MIN_PRICE_SIMILARITY = 0.5
+
+# The largest difference in years that matches the user's release year
+MAX_DATE_DIFFERENCE = 7
+
+# The most a game's score is increased by, for games in the leaf most similar to the user's preferences
+MAX_PREFERENCE_SCORE = 5
+
+# The number of genres stored in each word of a genre bitmask row
+WORD_SIZE = 64
+
+
+class GameColumns:
+    """The data of a collection of games, stored as one array per attribute.
+
+    The game at index i of games has its data at index i of every array. Genres are stored as bitmasks over
+    the genre vocabulary, split into 64-bit words. genre_words has one row per word, so that a genre question
+    only reads the words that hold one of the user's genres.
+
+    Instance Attributes:
+    - games: The games of the columns, in order. It is empty if the columns were made without game objects.
+    - vocabulary: The genre vocabulary of the genre bitmasks
+    - app_ids: The app id of each game
+    - prices: The price of each game
+    - release_dates: The release year of each game
+    - online: Whether each game has an online component
+    - multiplayer: Whether each game has a multiplayer option
+    - genre_words: The genre bitmasks, where genre_words[w, i] is word w of the bitmask of the game at index i
+
+    Representation Invariants:
+    - len(self.games) == 0 or len(self.games) == len(self.app_ids)
+    - len(self.app_ids) == len(self.prices) == len(self.release_dates) == len(self.online) \
+        == len(self.multiplayer) == self.genre_words.shape[1]
+    - self.genre_words.shape[0] * WORD_SIZE >= len(self.vocabulary)
+    """
+    games: list[Game | CompactGame]
+    vocabulary: GenreVocabulary
+    app_ids: np.ndarray
+    prices: np.ndarray
+    release_dates: np.ndarray
+    online: np.ndarray
+    multiplayer: np.ndarray
+    genre_words: np.ndarray
+
+    # Private Instance Attributes
+    #   - _extra_genres: The lowercase genres that are not in the vocabulary, of the games that have any.
+    #                    Keys: index of the game, Values: its extra genres
+    _extra_genres: dict[int, set[str]]
+
+    def __init__(self, games: list[Game | CompactGame], vocabulary: GenreVocabulary, app_ids: np.ndarray,
+                 prices: np.ndarray, release_dates: np.ndarray, online: np.ndarray, multiplayer: np.ndarray,
+                 genre_words: np.ndarray, extra_genres: Optional[dict[int, set[str]]] = None) -> None:
+        self.games = games
+        self.vocabulary = vocabulary
+        self.app_ids = app_ids
+        self.prices = prices
+        self.release_dates = release_dates
+        self.online = online
+        self.multiplayer = multiplayer
+        self.genre_words = genre_words
+        self._extra_genres = extra_genres if extra_genres is not None else {}
+
+    @classmethod
+    def from_games(cls, games: list[Game | CompactGame], vocabulary: Optional[GenreVocabulary] = None) \
+            -> GameColumns:
+        """Return the columns of the given games, using the genre vocabulary of genres.txt if vocabulary is None.
+
+        >>> columns = GameColumns.from_games([Game(400, 'Portal', {'Puzzle'}, 9.99, False, False, 1.0, 2007)])
+        >>> columns.app_ids.tolist(), columns.prices.tolist()
+        ([400], [9.99])
+        """
+        if vocabulary is None:
+            vocabulary = get_genre_vocabulary()
+
+        num_words = max(1, -(-len(vocabulary) // WORD_SIZE))
+        word_mask = (1 << WORD_SIZE) - 1
+        genre_words = np.zeros((num_words, len(games)), dtype=np.uint64)
+        extra_genres = {}
+
+        for i, game in enumerate(games):
+            if isinstance(game, CompactGame):
+                bitmask = game.genre_bits
+                if game.extra_genres is not None:
+                    extra_genres[i] = {genre.lower() for genre in game.extra_genres}
+            else:
+                bitmask = vocabulary.encode(game.genres)
+                extra = {genre.lower() for genre in game.genres if vocabulary.get_bit(genre) is None}
+                if len(extra) > 0:
+                    extra_genres[i] = extra
+
+            for word in range(num_words):
+                if bitmask == 0:
+                    break
+                genre_words[word, i] = bitmask & word_mask
+                bitmask >>= WORD_SIZE
+
+        return cls(games, vocabulary,
+                   np.array([game.app_id for game in games], dtype=np.int64),
+                   np.array([game.price for game in games], dtype=float),
+                   np.array([game.release_date for game in games], dtype=np.int64),
+                   np.array([game.online for game in games], dtype=bool),
+                   np.array([game.multiplayer for game in games], dtype=bool),
+                   genre_words, extra_genres)
+
+    def __len__(self) -> int:
+        """Return the number of games in the columns."""
+        return len(self.app_ids)
+
+    def matches_genres(self, user_genres: set[str]) -> np.ndarray:
+        """Return whether each game has at least one of user_genres, or True for every game if user_genres is empty.
+
+        Like DecisionTree.filter_by_genre, a genre of a game matches if its lowercase form is in user_genres.
+        """
+        if len(user_genres) == 0:
+            return np.ones(len(self), dtype=bool)
+
+        # Only lowercase genres can be equal to the lowercase form of a genre
+        user_bitmask = self.vocabulary.encode({genre for genre in user_genres if genre == genre.lower()})
+        matches = np.zeros(len(self), dtype=bool)
+        for word in range(self.genre_words.shape[0]):
+            user_word = (user_bitmask >> (WORD_SIZE * word)) & ((1 << WORD_SIZE) - 1)
+            if user_word != 0:
+                matches |= (self.genre_words[word] & np.uint64(user_word)) != 0
+
+        for i, extra in self._extra_genres.items():
+            if not matches[i] and not extra.isdisjoint(user_genres):
+                matches[i] = True
+
+        return matches
+
+    def matches_price(self, user_price: float) -> np.ndarray:
+        """Return whether the price similarity of each game to user_price is at least MIN_PRICE_SIMILARITY."""
+        return np.exp(-PRICE_SIMILARITY_K * np.abs(self.prices - user_price)) >= MIN_PRICE_SIMILARITY
+
+    def matches_date(self, user_date: int) -> np.ndarray:
+        """Return whether each game was released at most MAX_DATE_DIFFERENCE years from user_date."""
+        return np.abs(self.release_dates - user_date) <= MAX_DATE_DIFFERENCE
+
+    def matches_online(self, user_online: bool) -> np.ndarray:
+        """Return whether the online component of each game is user_online."""
+        return self.online == user_online
+
+    def matches_multiplayer(self, user_multiplayer: bool) -> np.ndarray:
+        """Return whether the multiplayer option of each game is user_multiplayer."""
+        return self.multiplayer == user_multiplayer
+
+
+def get_answers(columns: GameColumns, questions_to_answers: list[tuple[str, Any]]) -> np.ndarray:
+    """Return the answer of every game to each question, as a boolean array with one row per question,
+    in the order of questions_to_answers.
+
+    questions_to_answers has the same form as decision_tree.QUESTIONS_TO_ANSWERS.
+    """
+    answers = np.empty((len(questions_to_answers), len(columns)), dtype=bool)
+
+    for i, (question, user_answer) in enumerate(questions_to_answers):
+        if question == "Genre":
+            answers[i] = columns.matches_genres(user_answer)
+        elif question == "Price":
+            answers[i] = columns.matches_price(user_answer)
+        elif question == "Date":
+            answers[i] = columns.matches_date(user_answer)
+        elif question == "Online":
+            answers[i] = columns.matches_online(user_answer)
+        else:
+            answers[i] = columns.matches_multiplayer(user_answer)
+
+    return answers
+
+
+def get_leaf_indices(answers: np.ndarray) -> np.ndarray:
+    """Return the index of the leaf each game ends up in, given the answers from get_answers.
+
+    The leaves are indexed from least to most similar to the user's preferences, in the same order as the
+    order_of_games built by decision_tree.display_decision_tree.
+
+    >>> get_leaf_indices(np.array([[True, False], [False, False], [True, True]])).tolist()
+    [5, 1]
+    """
+    leaf_indices = np.zeros(answers.shape[1], dtype=np.uint8)
+    for row in answers:
+        leaf_indices <<= 1
+        leaf_indices |= row
+    return leaf_indices
+
+
+def get_order_of_games(columns: GameColumns, questions_to_answers: list[tuple[str, Any]],
+                       excluded_app_ids: Optional[set[int]] = None) -> list[set[Game | CompactGame]]:
+    """Return the games in each leaf of the decision tree, from least to most similar to the user's preferences.
+
+    Games whose app id is in excluded_app_ids are left out, like the user's games in DecisionTree.
+
+    Preconditions:
+    - len(columns.games) == len(columns)
+    - len(questions_to_answers) == NUM_QUESTIONS
+    """
+    leaf_indices = get_leaf_indices(get_answers(columns, questions_to_answers))
+    return group_games_by_leaf(columns, leaf_indices, excluded_app_ids)
+
+
+def group_games_by_leaf(columns: GameColumns, leaf_indices: np.ndarray,
+                        excluded_app_ids: Optional[set[int]] = None) -> list[set[Game | CompactGame]]:
+    """Return the games of columns in each leaf, given the leaf index of every game from get_leaf_indices.
+
+    Games whose app id is in excluded_app_ids are left out.
+
+    Preconditions:
+    - len(columns.games) == len(columns) == len(leaf_indices)
+    """
+    order_of_games = [set() for _ in range(NUM_LEAVES)]
+
+    if excluded_app_ids:
+        included = ~np.isin(columns.app_ids, np.fromiter(excluded_app_ids, dtype=np.int64))
+        indices = np.flatnonzero(included)
+    else:
+        indices = np.arange(len(columns))
+
+    for index, leaf in zip(indices.tolist(), leaf_indices[indices].tolist()):
+        order_of_games[leaf].add(columns.games[index])
+
+    return order_of_games
+
+
+def get_game_score(game: Game | CompactGame, order: int) -> float:
+    """Return the score of a game whose order is order, combining its likeability and the similarity of
+    its leaf to the user's preferences.
+
+    The order of a game is the index of its leaf plus 1, so it is between 1 and NUM_LEAVES.
+    """
+    return game.likeability + (order / NUM_LEAVES) * MAX_PREFERENCE_SCORE
+
+
+def rank_top_games(order_of_games: list[set[Game | CompactGame]], k: int = 5) -> list[tuple[Game | CompactGame, int]]:
+    """Return the k games with the highest scores in order_of_games and their order, from the highest score
+    to the lowest. Return every game if there are at most k.
+
+    If two games have the same score the game with the higher order is ranked higher, then the game with the
+    higher likeability, then the game with the lower app id, so the result does not depend on set order.
+    This takes O(n log k) time for n games, and order_of_games is not mutated.
+
+    >>> portal = Game(400, 'Portal', {'Puzzle'}, 9.99, False, False, 1.0, 2007)
+    >>> portal_2 = Game(620, 'Portal 2', {'Puzzle'}, 12.99, True, True, 1.0, 2011)
+    >>> portal.likeability, portal_2.likeability = 2.0, 1.0
+    >>> [(game.name, order) for game, order in rank_top_games([{portal}, {portal_2}], 2)]
+    [('Portal', 1), ('Portal 2', 2)]
+    """
+    games_and_orders = ((game, order + 1) for order, games in enumerate(order_of_games) for game in games)
+    return heapq.nlargest(k, games_and_orders, key=_get_rank_key)
+
+
+def _get_rank_key(game_and_order: tuple[Game | CompactGame, int]) -> tuple[float, int, float, int]:
+    """Return the key that rank_top_games sorts a game and its order by."""
+    game, order = game_and_order
+    return get_game_score(game, order), order, game.likeability, -game.app_id
+
+
+def benchmark_tree_evaluation(num_games: int = 1000000, repeat: int = 5) -> float:
+    """Return the fewest seconds taken to compute the leaf index of num_games random games over repeat runs."""
+    rng = np.random.default_rng(111)
+    vocabulary = get_genre_vocabulary()
+    num_words = -(-len(vocabulary) // WORD_SIZE)
+    columns = GameColumns([], vocabulary,
+                          np.arange(num_games, dtype=np.int64),
+                          np.round(rng.uniform(0, 80, num_games), 2),
+                          rng.integers(1980, 2024, num_games),
+                          rng.random(num_games) < 0.5,
+                          rng.random(num_games) < 0.5,
+                          rng.integers(0, 2 ** 63, (num_words, num_games), dtype=np.uint64)
+                          & rng.integers(0, 2 ** 63, (num_words, num_games), dtype=np.uint64))
+    questions_to_answers = [("Genre", {'action', 'indie', 'rpg'}), ("Price", 20), ("Date", 2015),
+                            ("Online", True), ("Multiplayer", False)]
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        get_leaf_indices(get_answers(columns, questions_to_answers))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    import python_ta
+    import python_ta.contracts
+
+    import doctest
+
+    doctest.testmod()
+
+    python_ta.check_all(config={
+        'extra-imports': ['heapq', 'time', 'numpy', 'games_network', 'compact_games'],
+        'allowed-io': [],
+        'max-line-length': 120
+    })